@@ -1,36 +1,238 @@
-from flask import Flask, Blueprint, request, jsonify, render_template, Response, redirect, url_for
+from flask import (Flask, Blueprint, request, jsonify, render_template, Response, url_for, g,
+                   stream_with_context, make_response, send_from_directory)
 from flask_cors import CORS
 import sqlite3
-from datetime import datetime
+import queue
+import threading
+from datetime import datetime, timedelta
 import os
 import io
 import csv
-from PIL import Image, ImageOps
+import codecs
+import json
+import gzip
+import mimetypes
+import time
+import functools
+import uuid
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from markupsafe import Markup, escape
+
+try:
+    import brotli
+except ImportError:   # 없으면 JSON 응답은 gzip 으로만 압축
+    brotli = None
+
+import season_scores
+import archive_stats
+import font_assets
+import image_assets
+import metrics
+import pt_kernel
+import static_assets
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-DB_PATH = os.path.join(BASE_DIR, "games.db")
-SCHEDULE_DB_PATH = os.path.join(BASE_DIR, "schedules.db")
+# DB / 업로드 파일 위치 (기본은 app.py 옆. 벤치마크 등에서 MAHJONG_DATA_DIR 로 바꿀 수 있음)
+DATA_DIR = os.environ.get("MAHJONG_DATA_DIR", BASE_DIR)
+DB_PATH = os.path.join(DATA_DIR, "games.db")
+SCHEDULE_DB_PATH = os.path.join(DATA_DIR, "schedules.db")
+JOBS_DB_PATH = os.path.join(DATA_DIR, "jobs.db")            # 백그라운드 작업 큐 (진행률 갱신이 games.db 잠금과 엮이지 않게 분리)
+JOB_UPLOAD_DIR = os.path.join(DATA_DIR, "job_uploads")     # 작업이 끝날 때까지 업로드 파일을 보관
 CLUB_NAME = "그릴마당"  # 동아리 이름 (변경 가능)
 
-# 마작 포인트 계산용 상수
+# 마작 포인트 계산용 기본 룰 (처음 DB 를 만들 때 "기본 룰" 룰 세트로 등록, 이후 변경은 /api/rule_sets 로)
 UMA_VALUES = [50, 10, -10, -30]   # 1등~4등 우마 (+오카 반영한 버전)
 RETURN_SCORE = 30000
+START_SCORE = 25000
 
 
+def calc_pts(scores):
+    """4인 점수 -> 기본 룰의 우마/오카 반영 pt (동점이면 앞자리 우선)"""
+    return pt_kernel.calc_pts(scores, UMA_VALUES, RETURN_SCORE)
+
+
+def calc_ranks(scores):
+    """4인 점수 -> 각 자리의 등수(1~4)"""
+    return pt_kernel.calc_ranks(scores)
+
+
+# ================== SQLite 커넥션 풀 ==================
+
+# 커넥션마다 한 번 적용하는 PRAGMA (WAL 은 DB 파일에 영구 적용)
+SQLITE_PRAGMAS = (
+    "PRAGMA journal_mode = WAL",
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA cache_size = -16000",      # 약 16MB (음수 = KiB 단위)
+    "PRAGMA mmap_size = 134217728",    # 128MB
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA busy_timeout = 5000",      # 동시 쓰기 시 "database is locked" 대신 최대 5초 대기
+)
+
+
+class SQLitePool:
+    """
+    워커 프로세스별 SQLite 커넥션 풀.
+    요청마다 connect 하지 않고, 쓰고 난 커넥션을 max_idle 개까지 보관했다가 재사용합니다.
+    gunicorn 이 fork 한 뒤에는 부모 프로세스의 커넥션을 버리고 새로 엽니다.
+    """
+
+    def __init__(self, path, max_idle=8):
+        self.path = path
+        self.max_idle = max_idle
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+        self._stats = {"created": 0, "reused": 0, "released": 0, "discarded": 0, "in_use": 0, "peak_in_use": 0}
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=5.0, check_same_thread=False,
+                               factory=metrics.ProfiledConnection)
+        conn.db_name = os.path.splitext(os.path.basename(self.path))[0]
+        conn.metrics = app_metrics
+        conn.row_factory = sqlite3.Row
+        for pragma in SQLITE_PRAGMAS:
+            conn.execute(pragma)
+        return conn
+
+    def _check_fork(self):
+        if self._pid != os.getpid():
+            self._idle = queue.LifoQueue()
+            self._pid = os.getpid()
+            with self._lock:
+                self._stats["in_use"] = 0
+
+    def acquire(self):
+        self._check_fork()
+        try:
+            conn = self._idle.get_nowait()
+            reused = True
+        except queue.Empty:
+            conn = self._connect()
+            reused = False
+        with self._lock:
+            self._stats["reused" if reused else "created"] += 1
+            self._stats["in_use"] += 1
+            self._stats["peak_in_use"] = max(self._stats["peak_in_use"], self._stats["in_use"])
+        return conn
+
+    def release(self, conn):
+        with self._lock:
+            self._stats["in_use"] = max(self._stats["in_use"] - 1, 0)
+        try:
+            # commit 안 된 채 끝난 요청(에러 등)은 되돌리고 반납
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            conn.close()
+            with self._lock:
+                self._stats["discarded"] += 1
+            return
+
+        if self._pid == os.getpid() and self._idle.qsize() < self.max_idle:
+            self._idle.put(conn)
+            with self._lock:
+                self._stats["released"] += 1
+        else:
+            conn.close()
+            with self._lock:
+                self._stats["discarded"] += 1
+
+    def stats(self):
+        with self._lock:
+            data = dict(self._stats)
+        data.update({"path": os.path.basename(self.path), "idle": self._idle.qsize(),
+                     "max_idle": self.max_idle, "pid": os.getpid()})
+        return data
+
+
+# 요청 / 쿼리 계측 (워커별, /api/admin/metrics 로 확인)
+app_metrics = metrics.Metrics()
+
+db_pool = SQLitePool(DB_PATH)
+schedule_db_pool = SQLitePool(SCHEDULE_DB_PATH)
+jobs_db_pool = SQLitePool(JOBS_DB_PATH, max_idle=2)
 
 
 def get_db():
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
-    return conn
+    """요청(앱 컨텍스트)마다 커넥션 하나를 풀에서 빌려 g 에 보관. 반납은 teardown 에서."""
+    if "db" not in g:
+        g.db = db_pool.acquire()
+    return g.db
 
 def get_schedule_db():
-    conn = sqlite3.connect(SCHEDULE_DB_PATH)
-    conn.row_factory = sqlite3.Row
-    return conn
+    if "schedule_db" not in g:
+        g.schedule_db = schedule_db_pool.acquire()
+    return g.schedule_db
 
-def init_schedule_db():
-    conn = get_schedule_db()
+
+def release_db_connections(exc=None):
+    conn = g.pop("db", None)
+    if conn is not None:
+        db_pool.release(conn)
+    conn = g.pop("schedule_db", None)
+    if conn is not None:
+        schedule_db_pool.release(conn)
+
+# ================== 스키마 마이그레이션 (PRAGMA user_version) ==================
+# DB 파일마다 (버전, 설명, 함수) 목록을 두고, 파일의 user_version 보다 높은 것만 차례로 적용.
+# 이미 배포된 마이그레이션은 고치지 말고 다음 번호로 새로 추가할 것.
+# v1 은 user_version 도입 전에 만들어진 DB 에도 돌아가도록 IF NOT EXISTS / 컬럼 확인으로만 작성되어 있음.
+
+GAMES_MIGRATIONS = []
+SCHEDULE_MIGRATIONS = []
+JOBS_MIGRATIONS = []
+
+
+def migration(registry, version, description):
+    def decorator(fn):
+        registry.append((version, description, fn))
+        registry.sort(key=lambda m: m[0])
+        return fn
+    return decorator
+
+
+def schema_version(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def run_migrations(conn, migrations, label):
+    """
+    아직 적용 안 된 마이그레이션을 하나씩 각자의 트랜잭션으로 적용 (실패하면 그 버전만 되돌리고 예외).
+    워커 여러 개가 동시에 시작해도 BEGIN IMMEDIATE 로 한 번에 하나만 진행하고,
+    잠금을 잡은 뒤 버전을 다시 확인하므로 같은 마이그레이션이 두 번 돌지 않습니다.
+    반환: 적용한 개수
+    """
+    if conn.in_transaction:
+        conn.commit()
+    latest = migrations[-1][0] if migrations else 0
+    if schema_version(conn) > latest:
+        print(f"[MIGRATE] {label}: DB 버전 {schema_version(conn)} 이 코드({latest})보다 높음 (이전 버전 코드?)")
+        return 0
+
+    applied = 0
+    for version, description, fn in migrations:
+        if schema_version(conn) >= version:
+            continue
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if schema_version(conn) >= version:
+                conn.rollback()
+                continue
+            fn(conn)
+            conn.execute(f"PRAGMA user_version = {int(version)}")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        print(f"[MIGRATE] {label} v{version}: {description}")
+        applied += 1
+    return applied
+
+
+@migration(SCHEDULE_MIGRATIONS, 1, "기본 스키마")
+def migrate_schedules_base(conn):
     conn.execute("""
         CREATE TABLE IF NOT EXISTS schedules (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -45,12 +247,61 @@ def init_schedule_db():
             created_at TEXT NOT NULL
         )
     """)
-    conn.commit()
-    conn.close()
+    ensure_data_versions(conn)
 
 
-def init_db():
-    conn = get_db()
+@migration(SCHEDULE_MIGRATIONS, 2, "일정 조회 인덱스")
+def migrate_schedules_indexes(conn):
+    # 확정 일정: WHERE status = 'confirmed' ORDER BY date, time_start → 정렬 없이 인덱스 순서대로
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_schedules_status_date
+        ON schedules (status, date, time_start)
+    """)
+    # 대기 중 신청: WHERE status = 'pending' ORDER BY created_at DESC
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_schedules_status_created
+        ON schedules (status, created_at)
+    """)
+
+
+def init_schedule_db():
+    run_migrations(get_schedule_db(), SCHEDULE_MIGRATIONS, "schedules.db")
+
+
+@migration(JOBS_MIGRATIONS, 1, "기본 스키마")
+def migrate_jobs_base(conn):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS jobs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            kind TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'queued',
+            params TEXT,
+            upload_path TEXT,
+            progress INTEGER NOT NULL DEFAULT 0,
+            total INTEGER NOT NULL DEFAULT 0,
+            result TEXT,
+            error TEXT,
+            worker TEXT,
+            created_at TEXT NOT NULL,
+            started_at TEXT,
+            finished_at TEXT,
+            updated_at TEXT NOT NULL
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, id)")
+
+
+def init_jobs_db():
+    conn = jobs_db_pool.acquire()
+    try:
+        run_migrations(conn, JOBS_MIGRATIONS, "jobs.db")
+    finally:
+        jobs_db_pool.release(conn)
+
+
+@migration(GAMES_MIGRATIONS, 1, "기본 스키마")
+def migrate_games_base(conn):
+    ensure_data_versions(conn)
 
     # 개인전 게임 기록 (4인 마작)
     conn.execute("""
@@ -85,86 +336,2175 @@ def init_db():
     """)
 
 
-    # 뱃지 정의
-    conn.execute("""
-        CREATE TABLE IF NOT EXISTS badges (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            code INTEGER UNIQUE NOT NULL,
-            name TEXT NOT NULL,
-            grade TEXT NOT NULL,
-            description TEXT
-        )
-    """)
+    # 뱃지 정의
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS badges (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            code INTEGER UNIQUE NOT NULL,
+            name TEXT NOT NULL,
+            grade TEXT NOT NULL,
+            description TEXT
+        )
+    """)
+
+    # 플레이어별 뱃지 부여
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS player_badges (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            player_name TEXT NOT NULL,
+            badge_code INTEGER NOT NULL,
+            granted_at TEXT NOT NULL
+        )
+    """)
+
+    # 시즌 아카이브
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS archives (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            created_at TEXT NOT NULL
+        )
+    """)
+
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS archive_games (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            archive_id INTEGER NOT NULL,
+            created_at TEXT NOT NULL,
+            player1_name TEXT NOT NULL,
+            player2_name TEXT NOT NULL,
+            player3_name TEXT NOT NULL,
+            player4_name TEXT NOT NULL,
+            player1_score INTEGER NOT NULL,
+            player2_score INTEGER NOT NULL,
+            player3_score INTEGER NOT NULL,
+            player4_score INTEGER NOT NULL
+        )
+    """)
+
+    # 대국 목록 기간 필터용 인덱스 (선수 필터는 game_participants 인덱스로)
+    for table in ("games", "tournament_games", "archive_games"):
+        conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_created_at ON {table} (created_at)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_archive_games_archive_id ON archive_games (archive_id, id)")
+
+    # 개인전 플레이어별 누적 집계 (랭킹용, games 변경 시 같은 트랜잭션에서 갱신)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS player_stats (
+            player_name TEXT PRIMARY KEY,
+            games INTEGER NOT NULL DEFAULT 0,
+            total_pt REAL NOT NULL DEFAULT 0,
+            rank1_count INTEGER NOT NULL DEFAULT 0,
+            rank2_count INTEGER NOT NULL DEFAULT 0,
+            rank3_count INTEGER NOT NULL DEFAULT 0,
+            rank4_count INTEGER NOT NULL DEFAULT 0
+        )
+    """)
+
+    # 플레이어별 참가 기록 (이름 4칸 대신 이 테이블로 "X의 대국" 조회)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS game_participants (
+            game_table TEXT NOT NULL,
+            game_id INTEGER NOT NULL,
+            seat INTEGER NOT NULL,
+            player_name TEXT NOT NULL,
+            score INTEGER NOT NULL,
+            pt REAL NOT NULL,
+            rank INTEGER NOT NULL,
+            PRIMARY KEY (game_table, game_id, seat)
+        )
+    """)
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_game_participants_player
+        ON game_participants (player_name, game_id)
+    """)
+
+    # 날짜별 플레이어 상태 스냅샷 (개인 통계 그래프용, 그날 마지막 대국 반영 후 기준)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS daily_player_snapshots (
+            snap_date TEXT NOT NULL,
+            player_name TEXT NOT NULL,
+            games INTEGER NOT NULL,
+            total_pt REAL NOT NULL,
+            tournament_games INTEGER NOT NULL,
+            tournament_pt REAL NOT NULL,
+            season_score REAL NOT NULL,
+            pt_rank INTEGER NOT NULL,
+            season_rank INTEGER NOT NULL,
+            total_players INTEGER NOT NULL,
+            PRIMARY KEY (player_name, snap_date)
+        )
+    """)
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_daily_player_snapshots_date
+        ON daily_player_snapshots (snap_date)
+    """)
+
+    # 아카이브(대회)별 플레이어 통계. archives.stats_version 이 현재 pt 룰과 다르면 다시 계산
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS archive_player_stats (
+            archive_id INTEGER NOT NULL,
+            player_name TEXT NOT NULL,
+            games INTEGER NOT NULL,
+            total_pt REAL NOT NULL,
+            rank1_count INTEGER NOT NULL,
+            rank2_count INTEGER NOT NULL,
+            rank3_count INTEGER NOT NULL,
+            rank4_count INTEGER NOT NULL,
+            tobi_count INTEGER NOT NULL,
+            max_score INTEGER,
+            pos_pt_sum REAL NOT NULL,
+            PRIMARY KEY (archive_id, player_name)
+        )
+    """)
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_archive_player_stats_player
+        ON archive_player_stats (player_name, archive_id)
+    """)
+    if "stats_version" not in {r["name"] for r in conn.execute("PRAGMA table_info(archives)")}:
+        conn.execute("ALTER TABLE archives ADD COLUMN stats_version TEXT")
+
+    # 실시간 푸시(SSE)용 변경 이벤트. 쓰기와 같은 트랜잭션에서 기록 → 모든 워커가 읽어 전달
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS live_events (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            created_at TEXT NOT NULL,
+            kind TEXT NOT NULL,
+            payload TEXT NOT NULL
+        )
+    """)
+
+    # 델타 동기화용 변경 로그 (행마다 마지막 변경 하나만 남김)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS change_log (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            table_name TEXT NOT NULL,
+            row_id INTEGER,
+            op TEXT NOT NULL,
+            created_at TEXT NOT NULL
+        )
+    """)
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_change_log_row
+        ON change_log (table_name, row_id)
+    """)
+
+    # 룰 세트 (비어 있으면 기본 룰 등록)
+    ensure_rule_sets(conn)
+
+    # 저장 pt / 등수 컬럼 (없으면 추가)
+    for table in PARTICIPANT_TABLES:
+        ensure_pt_columns(conn, table)
+
+
+@migration(GAMES_MIGRATIONS, 2, "뱃지 조회 인덱스")
+def migrate_games_badge_indexes(conn):
+    # 플레이어별 뱃지: WHERE player_name = ? ORDER BY granted_at, id
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_player_badges_player
+        ON player_badges (player_name, granted_at, id)
+    """)
+    # 뱃지 삭제 시 부여 기록 정리: WHERE badge_code = ?
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_player_badges_badge_code
+        ON player_badges (badge_code)
+    """)
+
+
+@migration(GAMES_MIGRATIONS, 3, "좌석별 이름 인덱스 삭제")
+def migrate_games_drop_seat_name_indexes(conn):
+    # 선수 필터가 game_participants 로 옮겨 가 읽는 곳이 없고, 쓰기마다 인덱스 12개를 갱신하던 것
+    for table in ("games", "tournament_games", "archive_games"):
+        for seat in range(1, 5):
+            conn.execute(f"DROP INDEX IF EXISTS idx_{table}_player{seat}_name")
+
+
+def init_db():
+    conn = get_db()
+    run_migrations(conn, GAMES_MIGRATIONS, "games.db")
+
+    # 옛 행 / 룰 변경분 저장 pt 재계산
+    recompute_stored_pts(conn)
+
+    # 기존 DB: 참가 기록이 비어 있으면 세 게임 테이블로부터 한 번 채움
+    if not conn.execute("SELECT 1 FROM game_participants LIMIT 1").fetchone():
+        rebuild_participants(conn)
+
+    # 기존 DB: 집계 테이블이 비어 있으면 games 로부터 한 번 채움
+    has_stats = conn.execute("SELECT 1 FROM player_stats LIMIT 1").fetchone()
+    has_games = conn.execute("SELECT 1 FROM games LIMIT 1").fetchone()
+    if has_games and not has_stats:
+        rebuild_player_stats(conn)
+
+    # 기존 DB: 변경 로그가 비어 있으면 지금 있는 행들을 put 으로 한 번 기록
+    if not conn.execute("SELECT 1 FROM change_log LIMIT 1").fetchone():
+        for table in CHANGE_TABLES:
+            log_changes(conn, table, "put", [r[0] for r in conn.execute(f"SELECT id FROM {table}")])
+
+    # 기존 DB: 스냅샷이 비어 있으면 개인전 + 대회전 전체로부터 한 번 쌓음
+    if not conn.execute("SELECT 1 FROM daily_player_snapshots LIMIT 1").fetchone():
+        refresh_daily_snapshots(conn)
+
+    conn.commit()
+
+
+# ================== 룰 세트 (우마 / 오카 / 반환점) ==================
+# 개인전 / 대회전은 현재 시즌 룰(is_current), 아카이브는 archives.rule_set_id 의 룰로 pt 를 저장.
+# 저장 pt 의 pt_version 은 rule_key() 값이라, 룰 내용이 바뀐 행만 다시 계산됩니다.
+
+def ensure_rule_sets(conn):
+    """rule_sets 테이블 + archives.rule_set_id (없으면 추가). 비어 있으면 코드의 기본 룰로 채움"""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS rule_sets (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            uma TEXT NOT NULL,
+            oka REAL NOT NULL DEFAULT 0,
+            return_score INTEGER NOT NULL,
+            start_score INTEGER NOT NULL,
+            version INTEGER NOT NULL DEFAULT 1,
+            is_current INTEGER NOT NULL DEFAULT 0,
+            created_at TEXT NOT NULL,
+            updated_at TEXT NOT NULL
+        )
+    """)
+    if not conn.execute("SELECT 1 FROM rule_sets LIMIT 1").fetchone():
+        now = datetime.now().isoformat(timespec="seconds")
+        conn.execute("""
+            INSERT INTO rule_sets (name, uma, oka, return_score, start_score, is_current, created_at, updated_at)
+            VALUES ('기본 룰', ?, 0, ?, ?, 1, ?, ?)
+        """, (json.dumps(UMA_VALUES), RETURN_SCORE, START_SCORE, now, now))
+
+    if "rule_set_id" not in {r["name"] for r in conn.execute("PRAGMA table_info(archives)")}:
+        conn.execute("ALTER TABLE archives ADD COLUMN rule_set_id INTEGER")
+    # 룰이 지정되지 않은 (옛) 아카이브는 지금 룰로 고정
+    conn.execute("UPDATE archives SET rule_set_id = ? WHERE rule_set_id IS NULL", (current_rule(conn)["id"],))
+
+
+def rule_from_row(r):
+    return {
+        "id": r["id"],
+        "name": r["name"],
+        "uma": json.loads(r["uma"]),
+        "oka": r["oka"],
+        "return_score": r["return_score"],
+        "start_score": r["start_score"],
+        "version": r["version"],
+        "is_current": bool(r["is_current"]),
+    }
+
+
+def rule_key(rule):
+    """저장 pt 의 pt_version 값. 우마/오카/반환점이 같으면 같은 키 (이름 / 시작 점수는 무관)"""
+    key = "uma={};return={}".format(",".join(f"{u:g}" for u in rule["uma"]), rule["return_score"])
+    if rule["oka"]:
+        key += f";oka={rule['oka']:g}"
+    return key
+
+
+def effective_uma(rule):
+    """오카(1등 추가 pt)를 1등 우마에 합친 값"""
+    return [u + (rule["oka"] if i == 0 else 0) for i, u in enumerate(rule["uma"])]
+
+
+def current_rule(conn):
+    r = conn.execute("SELECT * FROM rule_sets WHERE is_current = 1 ORDER BY id LIMIT 1").fetchone()
+    return rule_from_row(r)
+
+
+def rule_for_table(conn, table, archive_id=None):
+    """그 테이블(아카이브)의 대국에 적용할 룰"""
+    if table == "archive_games" and archive_id is not None:
+        r = conn.execute("""
+            SELECT rs.* FROM archives a JOIN rule_sets rs ON rs.id = a.rule_set_id
+            WHERE a.id = ?
+        """, (archive_id,)).fetchone()
+        if r is not None:
+            return rule_from_row(r)
+    return current_rule(conn)
+
+
+# ================== 저장 pt / 등수 (쓰기 시점에 한 번만 계산) ==================
+
+PARTICIPANT_TABLES = ("games", "tournament_games", "archive_games")
+
+PT_COLUMNS = (
+    [f"player{i}_pt" for i in range(1, 5)]
+    + [f"player{i}_rank" for i in range(1, 5)]
+)
+
+
+def score_game(scores, rule):
+    """저장용 (pt 4개, 등수 4개). pt 는 화면과 같게 소수 첫째 자리로 반올림"""
+    pts, ranks = score_games([scores], rule)
+    return pts[0], ranks[0]
+
+
+def score_games(scores_list, rule):
+    """여러 판을 한 번에 score_game (CSV 업로드 / 재계산용, NumPy 가 있으면 벡터 연산)"""
+    return pt_kernel.score_games(scores_list, effective_uma(rule), rule["return_score"])
+
+
+def ensure_pt_columns(conn, table):
+    existing = {r["name"] for r in conn.execute(f"PRAGMA table_info({table})")}
+    for col in PT_COLUMNS:
+        if col not in existing:
+            col_type = "REAL" if col.endswith("_pt") else "INTEGER"
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN {col} {col_type}")
+    if "pt_version" not in existing:
+        conn.execute(f"ALTER TABLE {table} ADD COLUMN pt_version TEXT")
+
+
+def row_names(row):
+    return [row["player1_name"], row["player2_name"], row["player3_name"], row["player4_name"]]
+
+
+def row_scores(row):
+    return [row["player1_score"], row["player2_score"], row["player3_score"], row["player4_score"]]
+
+
+def row_pts(row):
+    return [row["player1_pt"], row["player2_pt"], row["player3_pt"], row["player4_pt"]]
+
+
+def row_ranks(row):
+    return [row["player1_rank"], row["player2_rank"], row["player3_rank"], row["player4_rank"]]
+
+
+GAME_INSERT_COLUMNS = [
+    "created_at",
+    "player1_name", "player2_name", "player3_name", "player4_name",
+    "player1_score", "player2_score", "player3_score", "player4_score",
+    *PT_COLUMNS, "pt_version",
+]
+
+
+def game_insert_sql(table, with_archive_id=False):
+    columns = (["archive_id"] if with_archive_id else []) + GAME_INSERT_COLUMNS
+    return f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})"
+
+
+def game_insert_values(created_at, names, scores, pts, ranks, version, archive_id=None):
+    values = (created_at, *names, *scores, *pts, *ranks, version)
+    return values if archive_id is None else (archive_id, *values)
+
+
+def insert_game(conn, table, created_at, names, scores, archive_id=None):
+    """
+    게임 한 판 INSERT + 저장 pt/등수 + game_participants (+ games 면 player_stats,
+    games / tournament_games 면 그날부터 일별 스냅샷).
+    commit 은 호출한 쪽에서. 새 id 반환.
+    """
+    rule = rule_for_table(conn, table, archive_id)
+    pts, ranks = score_game(scores, rule)
+    cur = conn.execute(
+        game_insert_sql(table, archive_id is not None),
+        game_insert_values(created_at, names, scores, pts, ranks, rule_key(rule), archive_id),
+    )
+    game_id = cur.lastrowid
+
+    add_participants(conn, table, game_id, names, scores, pts, ranks)
+    if table == "games":
+        apply_game_to_player_stats(conn, names, pts, ranks)
+    if table in SNAPSHOT_TABLES:
+        refresh_daily_snapshots(conn, snapshot_date(created_at))
+    if table in CHANGE_TABLES:
+        log_changes(conn, table, "put", [game_id])
+    bump_data_version(conn, table)
+    return game_id
+
+
+def insert_games_bulk(conn, table, games, archive_id=None, refresh_snapshots=True):
+    """
+    여러 판을 executemany 로 한 번에 INSERT (CSV 업로드용).
+    games: [(created_at, names, scores), ...]
+    여러 배치로 나눠 넣을 때는 refresh_snapshots=False 로 두고 끝에 한 번만 스냅샷을 갱신하세요.
+    쓰기 잠금을 잡은 상태에서 넣으므로 새 id 는 "직전 최대 id 이후" 로 바로 찾을 수 있습니다.
+    commit 은 호출한 쪽에서. 넣은 행 수 반환.
+    """
+    if not games:
+        return 0
+    if not conn.in_transaction:
+        conn.execute("BEGIN IMMEDIATE")
+    last_id = conn.execute(f"SELECT COALESCE(MAX(id), 0) FROM {table}").fetchone()[0]
+    seq = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = ?", (table,)).fetchone()
+    if seq:
+        last_id = max(last_id, seq[0])
+
+    rule = rule_for_table(conn, table, archive_id)
+    version = rule_key(rule)
+    all_pts, all_ranks = score_games([g[2] for g in games], rule)
+    scored = []
+    values = []
+    for (created_at, names, scores), pts, ranks in zip(games, all_pts, all_ranks):
+        scored.append((names, scores, pts, ranks))
+        values.append(game_insert_values(created_at, names, scores, pts, ranks, version, archive_id))
+    conn.executemany(game_insert_sql(table, archive_id is not None), values)
+
+    new_ids = [r[0] for r in conn.execute(
+        f"SELECT id FROM {table} WHERE id > ? ORDER BY id ASC", (last_id,)
+    )]
+
+    participant_rows = []
+    for game_id, (names, scores, pts, ranks) in zip(new_ids, scored):
+        participant_rows.extend(participant_values(table, game_id, names, scores, pts, ranks))
+    insert_participant_rows(conn, participant_rows)
+
+    if table == "games":
+        apply_player_stats_deltas(conn, pt_kernel.aggregate_players(
+            [g[1] for g in games], all_pts, all_ranks))
+    if refresh_snapshots and table in SNAPSHOT_TABLES:
+        refresh_daily_snapshots(conn, min(snapshot_date(g[0]) for g in games))
+    if table in CHANGE_TABLES:
+        log_changes(conn, table, "put", new_ids)
+    bump_data_version(conn, table)
+    return len(values)
+
+
+def recompute_stored_pts(conn, tables=PARTICIPANT_TABLES):
+    """
+    pt_version 이 적용할 룰의 키와 다른 행(옛 DB 의 NULL 포함)만 다시 계산해서
+    저장 pt/등수, game_participants 를 갱신합니다. 개인전 / 대회전은 현재 시즌 룰,
+    아카이브 대국은 아카이브마다 지정된 룰을 씁니다. games 가 바뀌면 player_stats 도 재집계,
+    games / tournament_games 가 바뀌면 일별 스냅샷도 다시 쌓습니다.
+    반환: 다시 계산한 행 수
+    """
+    total = 0
+    snapshots_stale = False
+    set_clause = ", ".join(f"{c} = ?" for c in PT_COLUMNS)
+    for table in tables:
+        if table == "archive_games":
+            groups = [
+                (rule_from_row(r), "archive_id IN (SELECT id FROM archives WHERE rule_set_id = ?)", (r["id"],))
+                for r in conn.execute("SELECT * FROM rule_sets").fetchall()
+            ]
+        else:
+            groups = [(current_rule(conn), "1 = 1", ())]
+
+        changed = []
+        for rule, where, params in groups:
+            version = rule_key(rule)
+            rows = conn.execute(f"""
+                SELECT id, player1_score, player2_score, player3_score, player4_score
+                FROM {table}
+                WHERE pt_version IS NOT ? AND {where}
+            """, (version, *params)).fetchall()
+            if not rows:
+                continue
+
+            game_updates = []
+            participant_updates = []
+            all_pts, all_ranks = score_games([row_scores(row) for row in rows], rule)
+            for row, pts, ranks in zip(rows, all_pts, all_ranks):
+                game_updates.append((*pts, *ranks, version, row["id"]))
+                for i in range(4):
+                    participant_updates.append((pts[i], ranks[i], table, row["id"], i + 1))
+
+            conn.executemany(
+                f"UPDATE {table} SET {set_clause}, pt_version = ? WHERE id = ?",
+                game_updates,
+            )
+            conn.executemany("""
+                UPDATE game_participants SET pt = ?, rank = ?
+                WHERE game_table = ? AND game_id = ? AND seat = ?
+            """, participant_updates)
+            if table == "archive_games":
+                # 이 룰을 쓰는 아카이브 통계는 recompute_pts / archive_stats 작업이 다시 계산
+                conn.execute("UPDATE archives SET stats_version = NULL WHERE rule_set_id = ?", params)
+            changed.extend(row["id"] for row in rows)
+            print(f"[PT_RECOMPUTE] {table}: {len(rows)} rows ({version})")
+
+        if not changed:
+            continue
+        if table == "games":
+            rebuild_player_stats(conn)
+        if table in SNAPSHOT_TABLES:
+            snapshots_stale = True
+        if table in CHANGE_TABLES:
+            log_changes(conn, table, "put", changed)
+        bump_data_version(conn, table)
+        publish_event(conn, "reload", {"table": DATA_VERSION_ALIASES.get(table, table), "reason": "rules"})
+        total += len(changed)
+
+    if snapshots_stale:
+        refresh_daily_snapshots(conn)
+    return total
+
+
+# ================== 개인전 플레이어 집계 (player_stats) ==================
+
+def add_player_stats_delta(deltas, names, pts, ranks, sign=1):
+    """deltas[name] = [판수, pt 합, 1등, 2등, 3등, 4등] 에 한 판을 누적"""
+    for i in range(4):
+        name = (names[i] or "").strip()
+        if not name:
+            continue
+        d = deltas.setdefault(name, [0, 0.0, 0, 0, 0, 0])
+        d[0] += sign
+        d[1] += sign * pts[i]
+        d[1 + ranks[i]] += sign
+
+
+def apply_player_stats_deltas(conn, deltas):
+    """누적한 변화량을 player_stats 에 한 번에 upsert (commit 은 호출한 쪽에서)"""
+    conn.executemany("""
+        INSERT INTO player_stats (
+            player_name, games, total_pt,
+            rank1_count, rank2_count, rank3_count, rank4_count
+        ) VALUES (?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT(player_name) DO UPDATE SET
+            games = games + excluded.games,
+            total_pt = total_pt + excluded.total_pt,
+            rank1_count = rank1_count + excluded.rank1_count,
+            rank2_count = rank2_count + excluded.rank2_count,
+            rank3_count = rank3_count + excluded.rank3_count,
+            rank4_count = rank4_count + excluded.rank4_count
+    """, [(name, *d) for name, d in deltas.items()])
+
+    if any(d[0] < 0 for d in deltas.values()):
+        conn.execute("DELETE FROM player_stats WHERE games <= 0")
+
+
+def apply_game_to_player_stats(conn, names, pts, ranks, sign=1):
+    """
+    한 판의 결과(저장 pt/등수)를 player_stats 에 더하거나(sign=1) 뺍니다(sign=-1).
+    commit 은 호출한 쪽에서 (게임 INSERT/DELETE 와 같은 트랜잭션).
+    """
+    deltas = {}
+    add_player_stats_delta(deltas, names, pts, ranks, sign)
+    apply_player_stats_deltas(conn, deltas)
+
+
+def rebuild_player_stats(conn):
+    """games 의 저장 pt/등수로부터 player_stats 를 다시 계산합니다."""
+    conn.execute("DELETE FROM player_stats")
+    cur = conn.execute(f"""
+        SELECT
+            player1_name, player2_name, player3_name, player4_name,
+            {", ".join(PT_COLUMNS)}
+        FROM games
+    """)
+    rows = cur.fetchall()
+    apply_player_stats_deltas(conn, pt_kernel.aggregate_players(
+        [row_names(r) for r in rows], [row_pts(r) for r in rows], [row_ranks(r) for r in rows]))
+
+
+# ================== 일별 플레이어 스냅샷 (daily_player_snapshots) ==================
+
+# 스냅샷에 반영하는 테이블 (아카이브는 제외)
+SNAPSHOT_TABLES = ("games", "tournament_games")
+
+
+def snapshot_date(created_at):
+    """created_at ("2025-01-01T10:00" / "2025-01-01 10:00:00") 의 날짜 부분"""
+    return (created_at or "")[:10]
+
+
+def competition_ranks(values):
+    """{이름: 값} -> {이름: 등수}. 값이 같으면 같은 등수 (1, 1, 3, ...)"""
+    first = {}
+    for i, v in enumerate(sorted(values.values(), reverse=True)):
+        first.setdefault(v, i + 1)
+    return {name: first[v] for name, v in values.items()}
+
+
+def snapshot_rows(day, state):
+    """state[name] = [개인전 판수, 개인전 pt 합, 대회 판수, 대회 pt 합] 으로 그날의 스냅샷 행들"""
+    total_pts = {name: round(s[1], 1) for name, s in state.items()}
+    season = {
+        name: round(season_scores.calculate_season_score(s[1], s[0], s[2], s[3])["season_score"], 1)
+        for name, s in state.items()
+    }
+    pt_ranks = competition_ranks(total_pts)
+    season_ranks = competition_ranks(season)
+    return [
+        (day, name, s[0], total_pts[name], s[2], round(s[3], 1), season[name],
+         pt_ranks[name], season_ranks[name], len(state))
+        for name, s in state.items()
+    ]
+
+
+def refresh_daily_snapshots(conn, from_date=None):
+    """
+    from_date 이후의 스냅샷을 지우고, 직전 스냅샷 상태에서 그날부터 대국을 다시 반영합니다.
+    (None 이면 전체 재계산) 당일 대국 추가는 그날 하루만 다시 쌓으므로 가볍습니다.
+    commit 은 호출한 쪽에서.
+    """
+    from_date = from_date or ""
+    conn.execute("DELETE FROM daily_player_snapshots WHERE snap_date >= ?", (from_date,))
+
+    state = {}
+    prev = conn.execute(
+        "SELECT MAX(snap_date) FROM daily_player_snapshots WHERE snap_date < ?", (from_date,)
+    ).fetchone()[0]
+    if prev:
+        for r in conn.execute("""
+            SELECT player_name, games, total_pt, tournament_games, tournament_pt
+            FROM daily_player_snapshots WHERE snap_date = ?
+        """, (prev,)):
+            state[r["player_name"]] = [r["games"], r["total_pt"], r["tournament_games"], r["tournament_pt"]]
+
+    cur = conn.execute("""
+        SELECT substr(g.created_at, 1, 10) AS day, 0 AS is_tournament, gp.player_name, gp.pt
+        FROM games g
+        JOIN game_participants gp ON gp.game_table = 'games' AND gp.game_id = g.id
+        WHERE g.created_at >= ?
+        UNION ALL
+        SELECT substr(t.created_at, 1, 10), 1, gp.player_name, gp.pt
+        FROM tournament_games t
+        JOIN game_participants gp ON gp.game_table = 'tournament_games' AND gp.game_id = t.id
+        WHERE t.created_at >= ?
+        ORDER BY day
+    """, (from_date, from_date))
+
+    rows = []
+    day = None
+    for r in cur:
+        if day is not None and r["day"] != day:
+            rows.extend(snapshot_rows(day, state))
+        day = r["day"]
+        s = state.setdefault(r["player_name"], [0, 0.0, 0, 0.0])
+        if r["is_tournament"]:
+            s[2] += 1
+            s[3] += r["pt"]
+        else:
+            s[0] += 1
+            s[1] += r["pt"]
+    if day is not None:
+        rows.extend(snapshot_rows(day, state))
+
+    conn.executemany("""
+        INSERT INTO daily_player_snapshots (
+            snap_date, player_name, games, total_pt, tournament_games, tournament_pt,
+            season_score, pt_rank, season_rank, total_players
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """, rows)
+
+
+# ================== 플레이어별 참가 기록 (game_participants) ==================
+
+def participant_values(table, game_id, names, scores, pts, ranks):
+    rows = []
+    for i in range(4):
+        name = (names[i] or "").strip()
+        if not name:
+            continue
+        rows.append((table, game_id, i + 1, name, scores[i], pts[i], ranks[i]))
+    return rows
+
+
+def insert_participant_rows(conn, rows):
+    conn.executemany("""
+        INSERT OR REPLACE INTO game_participants (
+            game_table, game_id, seat, player_name, score, pt, rank
+        ) VALUES (?, ?, ?, ?, ?, ?, ?)
+    """, rows)
+
+
+def add_participants(conn, table, game_id, names, scores, pts, ranks):
+    """한 판의 네 자리를 game_participants 에 기록 (commit 은 호출한 쪽에서)"""
+    insert_participant_rows(conn, participant_values(table, game_id, names, scores, pts, ranks))
+
+
+def remove_participants(conn, table, game_id):
+    conn.execute(
+        "DELETE FROM game_participants WHERE game_table = ? AND game_id = ?",
+        (table, game_id),
+    )
+
+
+def rebuild_participants(conn, table=None):
+    """게임 테이블(들)의 저장 pt/등수로부터 game_participants 를 다시 채웁니다."""
+    tables = [table] if table else PARTICIPANT_TABLES
+    for t in tables:
+        conn.execute("DELETE FROM game_participants WHERE game_table = ?", (t,))
+        cur = conn.execute(f"""
+            SELECT
+                id,
+                player1_name, player2_name, player3_name, player4_name,
+                player1_score, player2_score, player3_score, player4_score,
+                {", ".join(PT_COLUMNS)}
+            FROM {t}
+        """)
+        rows = []
+        for row in cur:
+            rows.extend(participant_values(t, row["id"], row_names(row), row_scores(row),
+                                           row_pts(row), row_ranks(row)))
+        insert_participant_rows(conn, rows)
+
+
+# ================== 아카이브 플레이어 통계 (archive_player_stats) ==================
+
+ARCHIVE_STATS_PROCESSES = int(os.environ.get("ARCHIVE_STATS_PROCESSES", str(min(4, os.cpu_count() or 1))))
+ARCHIVE_STATS_PARALLEL_MIN = 2   # 다시 계산할 아카이브가 이보다 적으면 프로세스를 띄우지 않고 바로 계산
+
+
+def archive_rule_keys(conn, archive_ids=None, stale_only=False):
+    """
+    {아카이브 id: 그 아카이브 룰의 rule_key}. stale_only 면 stats_version 이 그 키와 다른
+    (아직 계산 안 했거나 pt 재계산 뒤인) 아카이브만.
+    """
+    rules = {r["id"]: rule_key(rule_from_row(r)) for r in conn.execute("SELECT * FROM rule_sets")}
+    sql = "SELECT id, rule_set_id, stats_version FROM archives"
+    params = []
+    if archive_ids is not None:
+        if not archive_ids:
+            return {}
+        sql += f" WHERE id IN ({', '.join('?' * len(archive_ids))})"
+        params = list(archive_ids)
+    keys = {}
+    for r in conn.execute(sql + " ORDER BY id", params):
+        key = rules.get(r["rule_set_id"])
+        if not stale_only or r["stats_version"] != key:
+            keys[r["id"]] = key
+    return keys
+
+
+def compute_archive_stats_batch(archive_ids):
+    """
+    아카이브별 통계를 계산해서 (archive_id, {이름: 통계}) 를 차례로 돌려줌.
+    여러 개면 ProcessPoolExecutor 로 아카이브 단위로 나눠 병렬 계산 (각 프로세스가 DB 를 직접 읽음).
+    작업 실행기 / 시작 시에만 부름 (GET 요청 안에서 프로세스를 띄우지 않음).
+    """
+    # `python app.py` 로 띄우면 spawn 자식이 __main__(app.py) 전체를 다시 실행하므로 풀을 쓰지 않음
+    if (len(archive_ids) < ARCHIVE_STATS_PARALLEL_MIN or ARCHIVE_STATS_PROCESSES <= 1
+            or __name__ == "__main__"):
+        for archive_id in archive_ids:
+            yield archive_stats.compute_archive_stats(DB_PATH, archive_id)
+        return
+    # 스레드가 여럿인 워커에서 fork 하면 다른 스레드가 잡고 있던 락 / SQLite 핸들이 자식에 딸려 가므로 spawn
+    ctx = multiprocessing.get_context("spawn")
+    workers = min(ARCHIVE_STATS_PROCESSES, len(archive_ids))
+    with ProcessPoolExecutor(max_workers=workers, mp_context=ctx) as executor:
+        yield from executor.map(archive_stats.compute_archive_stats,
+                                [DB_PATH] * len(archive_ids), archive_ids)
+
+
+def refresh_archive_stats(conn, archive_ids=None, force=False):
+    """
+    오래된 아카이브 통계만 (force 면 전부) 다시 계산해서 archive_player_stats 에 저장.
+    계산은 DB 파일을 따로 읽으므로 archive_games 는 commit 된 상태여야 합니다.
+    commit 은 호출한 쪽에서. 반환: 다시 계산한 아카이브 수
+    """
+    keys = archive_rule_keys(conn, archive_ids, stale_only=not force)
+    ids = list(keys)
+    if not ids:
+        return 0
+
+    columns = ", ".join(archive_stats.STAT_COLUMNS)
+    placeholders = ", ".join("?" * (len(archive_stats.STAT_COLUMNS) + 2))
+    for archive_id, stats in compute_archive_stats_batch(ids):
+        conn.execute("DELETE FROM archive_player_stats WHERE archive_id = ?", (archive_id,))
+        cur = conn.execute("UPDATE archives SET stats_version = ? WHERE id = ?", (keys[archive_id], archive_id))
+        if not cur.rowcount:
+            continue   # 계산하는 사이에 지워진 아카이브
+        conn.executemany(
+            f"INSERT INTO archive_player_stats (archive_id, player_name, {columns}) VALUES ({placeholders})",
+            [(archive_id, name, *(s[c] for c in archive_stats.STAT_COLUMNS)) for name, s in stats.items()],
+        )
+    bump_data_version(conn, "archives")
+    print(f"[ARCHIVE_STATS] {len(ids)} archives")
+    return len(ids)
+
+
+def queue_stale_archive_stats(conn):
+    """
+    통계가 없거나 룰이 바뀐 아카이브가 있으면 archive_stats 작업 등록 (워커의 첫 요청 때).
+    여러 워커가 동시에 떠도 이미 대기 / 실행 중인 작업이 있으면 다시 넣지 않고,
+    이전 프로세스가 남긴 대기 작업이 이 워커에서도 실행되도록 실행기만 띄움.
+    """
+    if not archive_rule_keys(conn, stale_only=True):
+        return None
+    jobs_conn = jobs_db_pool.acquire()
+    try:
+        pending = jobs_conn.execute(
+            "SELECT 1 FROM jobs WHERE kind = 'archive_stats' AND status IN ('queued', 'running') LIMIT 1"
+        ).fetchone()
+    finally:
+        jobs_db_pool.release(jobs_conn)
+    if pending:
+        job_runner.ensure_started()
+        return None
+    return job_runner.submit("archive_stats", {"stale_only": True})
+
+
+# 모듈 로드 때 등록하면 JobRunner 스레드가 fork 이전(gunicorn preload_app 의 마스터)에 떠 버리므로
+# 프로세스마다 첫 요청에서 한 번만
+_stale_stats_checked = False
+_stale_stats_lock = threading.Lock()
+
+
+def queue_stale_archive_stats_once():
+    global _stale_stats_checked
+    if _stale_stats_checked:
+        return
+    with _stale_stats_lock:
+        if _stale_stats_checked:
+            return
+        _stale_stats_checked = True
+    try:
+        queue_stale_archive_stats(get_db())
+    except sqlite3.Error as e:
+        print(f"[ARCHIVE_STATS] queue failed: {e}")
+
+
+# ================== 데이터 버전 / 조건부 GET (ETag) ==================
+
+# 테이블별 데이터 버전. 쓰기 핸들러가 같은 트랜잭션에서 올리므로 모든 워커가 같은 값을 봅니다.
+# GET 응답의 ETag 와 프로세스 내 응답 캐시 키로 사용.
+DATA_VERSION_ALIASES = {"archive_games": "archives"}   # 아카이브 대국은 archives 버전으로
+RESPONSE_CACHE_MAX = 256
+
+
+def ensure_data_versions(conn):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS data_versions (
+            name TEXT PRIMARY KEY,
+            version INTEGER NOT NULL
+        )
+    """)
+    # DB 를 새로 만들면 버전이 다시 1부터 시작하므로, 옛 ETag 와 겹치지 않게 epoch 를 둠
+    conn.execute(
+        "INSERT OR IGNORE INTO data_versions (name, version) VALUES ('epoch', ?)",
+        (int.from_bytes(os.urandom(4), "big"),),
+    )
+
+
+def bump_data_version(conn, *names):
+    """쓰기 직후 호출 (commit 은 호출한 쪽에서). 이름은 테이블명 (archive_games 는 archives 로)"""
+    conn.executemany("""
+        INSERT INTO data_versions (name, version) VALUES (?, 1)
+        ON CONFLICT(name) DO UPDATE SET version = version + 1
+    """, [(DATA_VERSION_ALIASES.get(n, n),) for n in names])
+
+
+def read_data_versions(conn, names):
+    """(epoch, 각 이름의 버전 ...) 튜플. 한 번도 안 바뀐 이름은 0"""
+    keys = ("epoch", *names)
+    rows = conn.execute(
+        f"SELECT name, version FROM data_versions WHERE name IN ({','.join('?' * len(keys))})",
+        keys,
+    ).fetchall()
+    found = {r["name"]: r["version"] for r in rows}
+    return tuple(found.get(k, 0) for k in keys)
+
+
+class ResponseCache:
+    """URL -> (데이터 버전, {본문, 헤더, 압축본}) LRU. 버전이 다르면 miss 로 보고 새로 채움"""
+
+    def __init__(self, max_entries=RESPONSE_CACHE_MAX):
+        self.max_entries = max_entries
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def get(self, key, version):
+        with self._lock:
+            item = self._items.get(key)
+            if item is None or item[0] != version:
+                self._misses += 1
+                return None
+            self._items.move_to_end(key)
+            self._hits += 1
+            return item[1]
+
+    def put(self, key, version, entry):
+        with self._lock:
+            self._items[key] = (version, entry)
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_entries:
+                self._items.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._items), "max_entries": self.max_entries,
+                    "hits": self._hits, "misses": self._misses}
+
+
+response_cache = ResponseCache()
+
+
+# ================== JSON 응답 압축 ==================
+
+COMPRESS_MIN_BYTES = 1024   # 이보다 작으면 압축 이득이 거의 없음
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5          # 11 은 요청마다 압축하기엔 너무 느림
+
+
+def negotiate_encoding():
+    """Accept-Encoding 에 맞는 압축 방식 ('br' / 'gzip' / None). brotli 가 없으면 gzip 만"""
+    accepted = request.accept_encodings
+    if brotli is not None and accepted["br"]:
+        return "br"
+    if accepted["gzip"]:
+        return "gzip"
+    return None
+
+
+def compress_body(data, encoding):
+    if encoding == "br":
+        return brotli.compress(data, quality=BROTLI_QUALITY)
+    return gzip.compress(data, compresslevel=GZIP_LEVEL)
+
+
+def versioned_json(*names, schedule=False):
+    """
+    GET 핸들러용 데코레이터.
+    names 의 데이터 버전으로 강한 ETag 를 만들고, If-None-Match 가 맞으면 304 만 돌려줍니다.
+    같은 URL · 같은 버전이면 쿼리/직렬화 없이 캐시된 본문을 그대로 보냅니다.
+    schedule=True 면 schedules.db 의 버전을 봅니다. GET 이 아닌 요청은 그대로 통과.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            if request.method != "GET":
+                return view(*args, **kwargs)
+
+            conn = get_schedule_db() if schedule else get_db()
+            version = read_data_versions(conn, names)
+            encoding = negotiate_encoding()
+            etag = "-".join(str(v) for v in version)
+            # 실제로 압축해서 보낸 본문만 ETag 에 압축 방식을 붙임 (작은 본문은 어느 클라이언트든 같은 ETag)
+            matched = next((t for t in (etag, f"{etag}-{encoding}" if encoding else None)
+                            if t and request.if_none_match.contains(t)), None)
+            if matched:
+                resp = Response(status=304)
+                etag = matched
+            else:
+                key = request.full_path
+                entry = response_cache.get(key, version)
+                if entry is None:
+                    resp = make_response(view(*args, **kwargs))
+                    # 오류 응답은 캐시/ETag 없이 그대로
+                    if resp.status_code != 200:
+                        return resp
+                    headers = [(k, v) for k, v in resp.headers if k != "Content-Length"]
+                    entry = {"body": resp.get_data(), "headers": headers, "encoded": {}}
+                    response_cache.put(key, version, entry)
+                body = entry["body"]
+                if encoding and len(body) >= COMPRESS_MIN_BYTES:
+                    # 압축본도 캐시 항목에 붙여 두고 재사용 (동시에 만들어도 결과가 같으므로 잠금 없음)
+                    encoded = entry["encoded"].get(encoding)
+                    if encoded is None:
+                        encoded = entry["encoded"][encoding] = compress_body(body, encoding)
+                    resp = Response(encoded, headers=entry["headers"])
+                    resp.headers["Content-Encoding"] = encoding
+                    etag = f"{etag}-{encoding}"
+                else:
+                    resp = Response(body, headers=entry["headers"])
+            resp.vary.add("Accept-Encoding")
+            resp.set_etag(etag)
+            resp.headers["Cache-Control"] = "no-cache"
+            return resp
+        return wrapper
+    return decorator
+
+
+# ================== 변경 로그 (델타 동기화용) ==================
+
+# /api/changes 로 내려주는 테이블
+CHANGE_TABLES = ("games", "tournament_games", "badges", "player_badges", "archives")
+
+
+def log_changes(conn, table, op, ids):
+    """
+    change_log 에 put / delete 기록 (commit 은 호출한 쪽에서).
+    같은 행의 이전 기록은 지우므로 로그에는 행마다 마지막 상태 하나만 남습니다.
+    """
+    ids = list(ids)
+    if not ids:
+        return
+    now = datetime.now().isoformat(timespec="seconds")
+    conn.executemany(
+        "DELETE FROM change_log WHERE table_name = ? AND row_id = ?",
+        [(table, i) for i in ids],
+    )
+    conn.executemany(
+        "INSERT INTO change_log (table_name, row_id, op, created_at) VALUES (?, ?, ?, ?)",
+        [(table, i, op, now) for i in ids],
+    )
+
+
+def log_table_reset(conn, table):
+    """테이블 전체 삭제: 이전 기록을 모두 지우고 reset 하나만 남김"""
+    conn.execute("DELETE FROM change_log WHERE table_name = ?", (table,))
+    conn.execute(
+        "INSERT INTO change_log (table_name, row_id, op, created_at) VALUES (?, NULL, 'reset', ?)",
+        (table, datetime.now().isoformat(timespec="seconds")),
+    )
+
+
+app = Flask(__name__, static_folder="static", template_folder="templates")
+# 한글 등 비아스키 문자 처리를 위해
+app.config['JSON_AS_ASCII'] = False
+# TEMPLATES_AUTO_RELOAD 는 기본값 (debug 모드에서만 템플릿 수정을 바로 반영)
+# 실시간 푸시(SSE) 사용 여부. 연결마다 응답 하나를 계속 붙잡으므로 sync 워커에서는 끄고
+# 페이지가 /api/changes 폴링으로 대신함. asgi.py / gunicorn.conf.py(gthread) / python app.py 가 켬
+app.config['LIVE_STREAM'] = os.environ.get("MAHJONG_LIVE_STREAM") == "1"
+
+# 마작 레이팅 서브 앱 Blueprint
+mahjong_bp = Blueprint('mahjong', __name__)
+
+# 일정 캘린더 서브 앱 Blueprint
+schedule_bp = Blueprint('schedule', __name__)
+
+app.teardown_appcontext(release_db_connections)
+
+
+# ================== 요청 / SQL 계측 ==================
+
+def start_request_timer():
+    rule = request.url_rule
+    # URL 규칙 단위로 묶음 (/api/players/<player_name>/games 처럼 이름별로 갈라지지 않게)
+    g.request_stats = app_metrics.begin_request(rule.rule if rule else request.path)
+    g.request_started = time.perf_counter()
+
+
+def record_request_timing(response):
+    stats = g.pop("request_stats", None)
+    if stats is None:
+        return response
+    started = g.pop("request_started")
+    method = request.method
+    status = response.status_code
+
+    def finish():
+        app_metrics.finish_request(stats, method, status, time.perf_counter() - started)
+
+    if response.is_streamed:
+        # 스트리밍 응답(CSV 내보내기 등)은 본문을 다 보낸 뒤에 기록
+        response.call_on_close(finish)
+    else:
+        finish()
+    return response
+
+
+for bp in (mahjong_bp, schedule_bp):
+    bp.before_request(start_request_timer)
+    bp.after_request(record_request_timing)
+mahjong_bp.before_request(queue_stale_archive_stats_once)
+
+
+@app.context_processor
+def inject_club_name():
+    rule = current_rule(get_db())
+    return dict(club_name=CLUB_NAME, uma_values=effective_uma(rule), return_score=rule["return_score"],
+                live_stream=app.config["LIVE_STREAM"])
+
+CORS(app)
+
+
+# ================== 최적화 이미지 (static/build, image_assets.py) ==================
+
+def load_image_manifest():
+    """원본이 바뀌었으면 다시 만들고 목록 반환. 실패하면 None (템플릿은 원본 파일로)"""
+    try:
+        return image_assets.ensure_built(app.static_folder)
+    except (OSError, ValueError) as e:
+        print(f"[IMAGES] build failed, serving originals: {e}")
+        return None
+
+
+image_manifest = load_image_manifest()
+
+
+def html_attrs(attrs):
+    # class_ -> class, data_depth -> data-depth
+    return "".join(f' {k.rstrip("_").replace("_", "-")}="{escape(v)}"' for k, v in attrs.items() if v is not None)
+
+
+@app.template_global()
+def image_url(name):
+    """원본 이름('left_char.png') 또는 아이콘 이름('favicon.ico', 'icon-192', 'apple-touch-icon') -> URL"""
+    if image_manifest:
+        path = image_manifest["icons"].get(name)
+        if path is None and name in image_manifest["images"]:
+            path = image_manifest["images"][name]["fallback"]
+        if path:
+            return url_for("static", filename=path)
+    if name in image_assets.ICON_PNG_SIZES:
+        name = image_assets.ICON_SOURCE
+    return url_for("static", filename=name)
+
+
+@app.template_global()
+def picture(name, alt="", sizes="100vw", **attrs):
+    """
+    <picture> 태그: 화면 폭에 맞는 WebP(srcset) + PNG. sizes 는 실제 표시 폭 (CSS 와 맞출 것).
+    나머지 키워드는 <img> 속성 (class_="...", loading="lazy" 등)
+    """
+    entry = image_manifest["images"].get(name) if image_manifest else None
+    if entry is None:
+        return Markup(f'<img src="{escape(url_for("static", filename=name))}"{html_attrs(dict(alt=alt, **attrs))}>')
+    srcset = ", ".join(f'{url_for("static", filename=path)} {w}w' for w, path in entry["webp"])
+    # width/height 속성은 넣지 않음 (CSS 가 한쪽 치수만 정하는 이미지가 찌그러지지 않게)
+    img = html_attrs(dict(src=url_for("static", filename=entry["fallback"]), alt=alt, **attrs))
+    return Markup(
+        f'<picture><source type="image/webp" srcset="{escape(srcset)}" sizes="{escape(sizes)}">'
+        f'<img{img}></picture>'
+    )
+
+
+# ================== 제목 폰트 (서브셋 WOFF2, font_assets.py) ==================
+
+def load_font_manifest():
+    """쓰인 글자가 바뀌었으면 서브셋을 다시 만듦. fontTools 가 없거나 실패하면 None (원본 TTF)"""
+    try:
+        return font_assets.ensure_built(app.static_folder, BASE_DIR, CLUB_NAME)
+    except Exception as e:
+        print(f"[FONTS] build failed, serving original TTF: {e}")
+        return None
+
+
+font_manifest = load_font_manifest()
+
+
+@app.template_global()
+def font_links():
+    """<head> 에 넣는 제목 폰트 태그 (서브셋 preload + @font-face CSS)"""
+    if font_manifest:
+        subset_url = url_for("static", filename=font_manifest["subset"])
+        css_url = url_for("static", filename=font_manifest["css"])
+        return Markup(
+            f'<link rel="preload" href="{subset_url}" as="font" type="font/woff2" crossorigin>\n'
+            f'  <link rel="stylesheet" href="{css_url}">'
+        )
+    ttf_url = url_for("static", filename=font_assets.FONT_SOURCE)
+    return Markup(
+        f"<style>@font-face {{ font-family: '{font_assets.FONT_FAMILY}'; src: url('{ttf_url}') format('truetype'); "
+        f"font-weight: {font_assets.FONT_WEIGHT}; font-style: normal; font-display: swap; }}</style>"
+    )
+
+
+# ================== CSS / JS 지문 + 미리 압축 (static_assets.py) ==================
+
+def load_asset_manifest():
+    """
+    CSS / JS 가 바뀌었으면 다시 만듦. 실패하면 None (원본 파일 그대로, 다음 시작 때 다시 시도).
+    static/vendor/ 파일이 없거나 vendor.lock.json 과 다르면 그 파일만 지문 없이 원본 URL 로 나감
+    """
+    for name, why in static_assets.vendor_problems(app.static_folder):
+        print(f"[ASSETS] ERROR {static_assets.VENDOR_DIR}/{name}: {why} (python static_assets.py vendor)")
+    try:
+        return static_assets.ensure_built(app.static_folder)
+    except Exception as e:
+        print(f"[ASSETS] build failed, serving originals: {e}")
+        return None
+
+
+# 이미지 / 폰트 빌드가 만든 CSS 도 압축하므로 그 뒤에
+asset_manifest = load_asset_manifest()
+
+
+@app.template_global()
+def asset_url(name):
+    """
+    static 기준 이름('style.css', 'vendor/chart.umd.js') -> 내용 해시가 붙은 build/ URL.
+    debug 모드에서는 고친 내용이 바로 보이도록 원본을 돌려줌
+    """
+    path = asset_manifest["files"].get(name) if asset_manifest and not app.debug else None
+    return url_for("static", filename=path or name)
+
+
+def send_static(filename):
+    """build/ 의 CSS / JS 는 Accept-Encoding 에 맞는 미리 압축본(.br / .gz)을 그대로 보냄"""
+    if not (filename.startswith(f"{image_assets.BUILD_SUBDIR}/")
+            and filename.endswith(static_assets.PRECOMPRESS_EXTS)):
+        return app.send_static_file(filename)
+    response = None
+    for encoding, ext in (("br", ".br"), ("gzip", ".gz")):
+        compressed = filename + ext
+        if request.accept_encodings[encoding] and os.path.isfile(os.path.join(app.static_folder, compressed)):
+            response = send_from_directory(app.static_folder, compressed,
+                                           mimetype=mimetypes.guess_type(filename)[0])
+            response.headers["Content-Encoding"] = encoding
+            break
+    if response is None:
+        response = app.send_static_file(filename)
+    response.vary.add("Accept-Encoding")
+    return response
+
+
+app.view_functions["static"] = send_static
+
+
+@app.after_request
+def compress_json(response):
+    """JSON 응답 압축 (versioned_json 이 이미 압축해 보낸 응답 / 스트리밍 응답은 그대로)"""
+    if (response.mimetype != "application/json" or response.status_code != 200
+            or response.is_streamed or response.direct_passthrough
+            or "Content-Encoding" in response.headers):
+        return response
+    response.vary.add("Accept-Encoding")
+    encoding = negotiate_encoding()
+    data = response.get_data()
+    if encoding and len(data) >= COMPRESS_MIN_BYTES:
+        response.set_data(compress_body(data, encoding))
+        response.headers["Content-Encoding"] = encoding
+    return response
+
+
+@app.after_request
+def cache_built_assets(response):
+    """static/build/ 파일은 이름에 내용 해시가 있어 바뀌면 URL 이 달라지므로 1년 + immutable"""
+    if request.path.startswith(f"{app.static_url_path}/{image_assets.BUILD_SUBDIR}/") and response.status_code == 200:
+        response.cache_control.public = True
+        response.cache_control.max_age = 365 * 24 * 3600
+        response.cache_control.immutable = True
+        response.cache_control.no_cache = None
+    return response
+
+
+# ================== 대국 목록 조회 (커서 페이지네이션 / 필터) ==================
+
+GAME_PAGE_MAX = 500
+
+
+def parse_game_list_args(args):
+    """
+    대국 목록 공통 쿼리 파라미터
+      ?limit=50        한 페이지 크기 (없으면 전체)
+      ?cursor=<id>     이전 페이지의 X-Next-Cursor 값 (keyset)
+      ?player=<이름>   해당 플레이어가 포함된 판만
+      ?from=YYYY-MM-DD / ?to=YYYY-MM-DD  (created_at 기준, to 포함)
+    잘못된 값이면 ValueError
+    """
+    limit = args.get("limit")
+    limit = min(max(int(limit), 1), GAME_PAGE_MAX) if limit else None
+
+    cursor = args.get("cursor")
+    cursor = int(cursor) if cursor else None
+
+    date_from = (args.get("from") or "").strip()
+    date_to = (args.get("to") or "").strip()
+    if date_from:
+        datetime.strptime(date_from, "%Y-%m-%d")
+    if date_to:
+        # to 날짜 하루 전체 포함 -> 다음날 0시 미만
+        date_to = (datetime.strptime(date_to, "%Y-%m-%d") + timedelta(days=1)).strftime("%Y-%m-%d")
+
+    return {
+        "limit": limit,
+        "cursor": cursor,
+        "player": (args.get("player") or "").strip(),
+        "from": date_from,
+        "to": date_to,
+    }
+
+
+def query_game_page(conn, table, opts, columns="*", where=None, params=(), ascending=False):
+    """
+    games / tournament_games / archive_games 공통 목록 조회.
+    id 기준 keyset 페이지네이션이라 몇 페이지째든 인덱스 탐색 한 번으로 끝납니다.
+    반환: (rows, next_cursor)  next_cursor 는 다음 페이지가 없으면 None
+    """
+    clauses = [where] if where else []
+    params = list(params)
+
+    if opts["cursor"] is not None:
+        clauses.append("id > ?" if ascending else "id < ?")
+        params.append(opts["cursor"])
+    if opts["player"]:
+        clauses.append("""id IN (
+            SELECT game_id FROM game_participants
+            WHERE player_name = ? AND game_table = ?
+        )""")
+        params.extend([opts["player"], table])
+    if opts["from"]:
+        clauses.append("created_at >= ?")
+        params.append(opts["from"])
+    if opts["to"]:
+        clauses.append("created_at < ?")
+        params.append(opts["to"])
+
+    sql = f"SELECT {columns} FROM {table}"
+    if clauses:
+        sql += " WHERE " + " AND ".join(clauses)
+    sql += " ORDER BY id " + ("ASC" if ascending else "DESC")
+    if opts["limit"]:
+        # 한 줄 더 읽어서 다음 페이지 존재 여부 판단
+        sql += " LIMIT ?"
+        params.append(opts["limit"] + 1)
+
+    rows = conn.execute(sql, params).fetchall()
+
+    next_cursor = None
+    if opts["limit"] and len(rows) > opts["limit"]:
+        rows = rows[:opts["limit"]]
+        next_cursor = rows[-1]["id"]
+    return rows, next_cursor
+
+
+def columnar_payload(rows):
+    """
+    ?format=columnar 응답: 객체 배열 대신 열마다 값 배열.
+    *_name 열은 players 배열의 번호로 보내므로 같은 이름은 응답에 한 번만 들어갑니다.
+    """
+    columns = {key: [] for key in rows[0].keys()} if rows else {}
+    name_columns = [key for key in columns if key.endswith("_name")]
+    players, player_ids = [], {}
+    for row in rows:
+        for key, values in columns.items():
+            value = row[key]
+            if key in name_columns:
+                idx = player_ids.get(value)
+                if idx is None:
+                    idx = player_ids[value] = len(players)
+                    players.append(value)
+                value = idx
+            values.append(value)
+    return {
+        "format": "columnar",
+        "count": len(rows),
+        "players": players,
+        "name_columns": name_columns,
+        "columns": columns,
+    }
+
+
+def game_page_response(rows, next_cursor):
+    if request.args.get("format") == "columnar":
+        resp = jsonify(columnar_payload(rows))
+    else:
+        resp = jsonify([dict(row) for row in rows])
+    if next_cursor is not None:
+        resp.headers["X-Next-Cursor"] = str(next_cursor)
+    return resp
+
+
+# ================== CSV 업로드 공통 엔진 ==================
+
+IMPORT_READ_CHUNK = 64 * 1024   # 업로드 스트림을 이 크기씩 읽어 디코딩
+IMPORT_BATCH_SIZE = 500         # executemany 한 번에 넣는 행 수
+IMPORT_MAX_ERRORS = 50          # 리포트에 남길 오류 줄 수
+
+
+def _game_csv_aliases():
+    aliases = {"created_at": ["created_at", "시간"]}
+    for i in range(1, 5):
+        aliases[f"player{i}_name"] = [f"player{i}_name", f"P{i} 이름", f"P{i}이름"]
+        aliases[f"player{i}_score"] = [f"player{i}_score", f"P{i} 점수", f"P{i}점수"]
+    return aliases
+
+
+# 헤더 별칭: /export 형식(P1 이름 ...)과 DB 컬럼명 모두 인식
+GAME_CSV_ALIASES = _game_csv_aliases()
+BADGE_CSV_ALIASES = {
+    "code": ["code", "코드"],
+    "name": ["name", "이름"],
+    "grade": ["grade", "등급"],
+    "description": ["description", "설명"],
+}
+PLAYER_BADGE_CSV_ALIASES = {
+    "player_name": ["player_name", "플레이어", "이름"],
+    "badge_code": ["badge_code", "code", "뱃지코드", "뱃지 코드"],
+    "granted_at": ["granted_at", "부여시각", "시간"],
+}
+
+
+class CsvImportError(Exception):
+    """파일 자체를 읽을 수 없을 때 (인코딩 등). 메시지는 그대로 사용자에게 보여줌"""
+
+
+class ImportReport:
+    def __init__(self):
+        self.inserted = 0
+        self.updated = 0
+        self.skipped = 0
+        self.invalid = 0
+        self.errors = []
+
+    def invalid_row(self, line_no, reason):
+        self.invalid += 1
+        if len(self.errors) < IMPORT_MAX_ERRORS:
+            self.errors.append({"line": line_no, "reason": reason})
+
+    def as_dict(self):
+        return {
+            "inserted": self.inserted,
+            "updated": self.updated,
+            "skipped": self.skipped,
+            "invalid": self.invalid,
+            "errors": self.errors,
+        }
+
+    def summary(self):
+        return (f"inserted={self.inserted}, updated={self.updated}, "
+                f"skipped={self.skipped}, invalid={self.invalid}")
+
+
+def detect_csv_encoding(head):
+    """앞부분 바이트로 인코딩 판별 (UTF-8, BOM 포함 -> CP949 순)"""
+    for encoding, decoder_name in (("utf-8-sig", "utf-8"), ("cp949", "cp949")):
+        try:
+            codecs.getincrementaldecoder(decoder_name)().decode(head, final=False)
+            return encoding
+        except UnicodeDecodeError:
+            continue
+    raise CsvImportError("알 수 없는 인코딩입니다. UTF-8 또는 CP949로 저장해주세요.")
+
+
+def iter_upload_lines(stream, head, encoding):
+    """업로드 스트림을 조각 단위로 디코딩하며 한 줄씩 (메모리는 조각 크기만큼만 사용)"""
+    decoder = codecs.getincrementaldecoder(encoding)()
+    pending = ""
+    chunk = head
+    while True:
+        final = not chunk
+        try:
+            pending += decoder.decode(chunk, final=final)
+        except UnicodeDecodeError:
+            raise CsvImportError("파일 중간에 인코딩이 맞지 않는 부분이 있습니다. UTF-8 또는 CP949로 저장해주세요.")
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            yield line + "\n"
+        if final:
+            break
+        chunk = stream.read(IMPORT_READ_CHUNK)
+    if pending:
+        yield pending
+
+
+def read_csv_upload(file, aliases):
+    """
+    업로드 CSV 를 스트리밍으로 읽어 (줄 번호, {필드: 값}) 를 돌려주는 제너레이터.
+    file 은 업로드 객체(FileStorage) 또는 바이너리 스트림.
+    헤더 별칭은 파일당 한 번만 해석하고, 값이 빈 칸이면 다음 별칭 컬럼을 봅니다.
+    """
+    stream = getattr(file, "stream", file)
+    head = stream.read(IMPORT_READ_CHUNK)
+    encoding = detect_csv_encoding(head)
+
+    sample = "\n".join(head.decode(encoding, errors="ignore").splitlines()[:5])
+    try:
+        dialect = csv.Sniffer().sniff(sample, delimiters=",;")
+    except Exception:
+        dialect = csv.excel
+
+    reader = csv.reader(iter_upload_lines(stream, head, encoding), dialect=dialect)
+    header = next(reader, None) or []
+    columns = {
+        field: [header.index(name) for name in names if name in header]
+        for field, names in aliases.items()
+    }
+
+    for row in reader:
+        if not row:
+            continue
+        values = {}
+        for field, indexes in columns.items():
+            value = ""
+            for i in indexes:
+                if i < len(row) and row[i] != "":
+                    value = row[i]
+                    break
+            values[field] = value
+        yield reader.line_num, values
+
+
+def csv_int(value, default=0):
+    """빈 칸은 default, 숫자가 아니면 ValueError ("25000.0" 같은 값도 허용)"""
+    if value is None or str(value).strip() == "":
+        return default
+    return int(float(value))
+
+
+def import_game_csv(conn, file, table, archive_id=None, default_created_at=None):
+    """games / tournament_games / archive_games 공통 CSV 업로드 (commit 은 호출한 쪽에서)"""
+    report = ImportReport()
+    default_created_at = default_created_at or datetime.now().isoformat(timespec="minutes")
+    batch = []
+    first_date = None   # 가장 이른 날짜부터 스냅샷을 한 번만 다시 쌓음
+
+    for line_no, values in read_csv_upload(file, GAME_CSV_ALIASES):
+        names = [values[f"player{i}_name"] for i in range(1, 5)]
+        # 네 명 이름이 다 비어 있으면 스킵
+        if not any(names):
+            report.skipped += 1
+            continue
+        try:
+            scores = [csv_int(values[f"player{i}_score"]) for i in range(1, 5)]
+        except ValueError:
+            report.invalid_row(line_no, "점수가 숫자가 아닙니다.")
+            continue
+
+        created_at = values["created_at"] or default_created_at
+        batch.append((created_at, names, scores))
+        day = snapshot_date(created_at)
+        if first_date is None or day < first_date:
+            first_date = day
+        if len(batch) >= IMPORT_BATCH_SIZE:
+            report.inserted += insert_games_bulk(conn, table, batch, archive_id, refresh_snapshots=False)
+            batch = []
+
+    report.inserted += insert_games_bulk(conn, table, batch, archive_id, refresh_snapshots=False)
+    if report.inserted and table in SNAPSHOT_TABLES:
+        refresh_daily_snapshots(conn, first_date)
+    if report.inserted:
+        publish_event(conn, "reload", {"table": DATA_VERSION_ALIASES.get(table, table), "reason": "import"})
+    return report
+
+
+def import_badge_csv(conn, file):
+    """뱃지 목록 CSV: code 기준 업서트 (commit 은 호출한 쪽에서)"""
+    report = ImportReport()
+    seen = set()
+    batch = []
+
+    def flush():
+        codes = [b[0] for b in batch]
+        existing = {r[0] for r in conn.execute(
+            f"SELECT code FROM badges WHERE code IN ({', '.join('?' * len(codes))})", codes
+        )}
+        for code in codes:
+            if code in existing or code in seen:
+                report.updated += 1
+            else:
+                report.inserted += 1
+            seen.add(code)
+        conn.executemany("""
+            INSERT INTO badges (code, name, grade, description) VALUES (?, ?, ?, ?)
+            ON CONFLICT(code) DO UPDATE SET
+                name = excluded.name,
+                grade = excluded.grade,
+                description = excluded.description
+        """, batch)
+
+    for line_no, values in read_csv_upload(file, BADGE_CSV_ALIASES):
+        if not any(values.values()):
+            report.skipped += 1
+            continue
+        try:
+            code = csv_int(values["code"])
+        except ValueError:
+            code = 0
+        name = values["name"].strip()
+        grade = values["grade"].strip()
+        desc = values["description"].strip()
+        if not code or not name or not grade:
+            report.invalid_row(line_no, "code, name, grade 가 필요합니다.")
+            continue
+
+        batch.append((code, name, grade, desc))
+        if len(batch) >= IMPORT_BATCH_SIZE:
+            flush()
+            batch = []
+
+    if batch:
+        flush()
+    if report.inserted or report.updated:
+        codes = sorted(seen)
+        for i in range(0, len(codes), IMPORT_BATCH_SIZE):
+            chunk = codes[i:i + IMPORT_BATCH_SIZE]
+            log_changes(conn, "badges", "put", [r[0] for r in conn.execute(
+                f"SELECT id FROM badges WHERE code IN ({', '.join('?' * len(chunk))})", chunk
+            )])
+        bump_data_version(conn, "badges")
+    return report
+
+
+def import_player_badge_csv(conn, file):
+    """플레이어 뱃지 부여 CSV: 완전히 같은 (이름, 코드, 시각) 은 건너뜀 (commit 은 호출한 쪽에서)"""
+    report = ImportReport()
+    now = datetime.now().isoformat(timespec="minutes")
+    seen = set()
+    batch = []
+    # 쓰기 잠금을 먼저 잡아 두면 새 행은 "지금 최대 id 이후" 로 바로 찾을 수 있음 (변경 로그용)
+    if not conn.in_transaction:
+        conn.execute("BEGIN IMMEDIATE")
+    last_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM player_badges").fetchone()[0]
+
+    def flush():
+        names = sorted({b[0] for b in batch})
+        existing = {tuple(r) for r in conn.execute(f"""
+            SELECT player_name, badge_code, granted_at FROM player_badges
+            WHERE player_name IN ({', '.join('?' * len(names))})
+        """, names)}
+        rows = []
+        for key in batch:
+            if key in existing or key in seen:
+                report.skipped += 1
+                continue
+            seen.add(key)
+            rows.append(key)
+        conn.executemany("""
+            INSERT INTO player_badges (player_name, badge_code, granted_at)
+            VALUES (?, ?, ?)
+        """, rows)
+        report.inserted += len(rows)
+
+    for line_no, values in read_csv_upload(file, PLAYER_BADGE_CSV_ALIASES):
+        player_name = values["player_name"].strip()
+        try:
+            badge_code = csv_int(values["badge_code"])
+        except ValueError:
+            badge_code = 0
+        granted_at = values["granted_at"].strip() or now
+
+        if not player_name or not badge_code:
+            report.invalid_row(line_no, "player_name, badge_code 가 필요합니다.")
+            continue
+
+        batch.append((player_name, badge_code, granted_at))
+        if len(batch) >= IMPORT_BATCH_SIZE:
+            flush()
+            batch = []
+
+    if batch:
+        flush()
+    if report.inserted:
+        log_changes(conn, "player_badges", "put", [r[0] for r in conn.execute(
+            "SELECT id FROM player_badges WHERE id > ?", (last_id,)
+        )])
+        bump_data_version(conn, "player_badges")
+    return report
+
+
+def wants_json_report():
+    return (request.args.get("format") == "json"
+            or request.accept_mimetypes.best == "application/json")
+
+
+def job_accepted_response(job_id, title):
+    """
+    업로드를 작업 큐에 넣은 뒤의 응답 (202).
+    ?format=json 이면 작업 id, 아니면 /api/jobs/<id> 를 확인하다가 끝나면 메인으로 돌아가는 안내 페이지.
+    """
+    status_url = url_for("mahjong.job_status_api", job_id=job_id)
+    if wants_json_report():
+        return jsonify({"job_id": job_id, "status": "queued", "status_url": status_url}), 202
+    return f"""
+        <!DOCTYPE html>
+        <html lang="ko">
+        <head>
+          <meta charset="UTF-8">
+          <title>{title} - {CLUB_NAME} 마작 레이팅</title>
+          <link rel="stylesheet" href="{asset_url('style.css')}">
+          {font_links()}
+        </head>
+        <body>
+          <div class="top-bar">
+            <h1>{CLUB_NAME} {title}</h1>
+            <div class="view-switch">
+              <a href="/mahjong_rating" class="view-switch-btn">메인으로 돌아가기</a>
+            </div>
+          </div>
+          <div class="main-layout">
+            <div class="left-panel">
+              <section class="games-panel">
+                <h2>업로드 처리 중 (작업 #{job_id})</h2>
+                <p id="job-status" class="hint-text">대기 중...</p>
+              </section>
+            </div>
+          </div>
+          <script>
+            (function poll() {{
+              fetch("{status_url}")
+                .then((res) => res.json())
+                .then((job) => {{
+                  const el = document.getElementById("job-status");
+                  if (job.status === "done") {{
+                    window.location.href = "/mahjong_rating";
+                  }} else if (job.status === "failed") {{
+                    el.textContent = "실패: " + (job.error || "알 수 없는 오류");
+                  }} else {{
+                    el.textContent = job.status === "running"
+                      ? "처리 중... " + (job.percent != null ? job.percent + "%" : "")
+                      : "대기 중...";
+                    setTimeout(poll, 1000);
+                  }}
+                }})
+                .catch(() => setTimeout(poll, 2000));
+            }})();
+          </script>
+        </body>
+        </html>
+        """, 202
+
+
+# ================== 백그라운드 작업 큐 (jobs) ==================
+
+JOB_WORKERS = int(os.environ.get("JOB_WORKERS", "1"))   # 워커 프로세스별 작업 스레드 수 (SQLite 쓰기는 어차피 한 번에 하나)
+JOB_POLL_INTERVAL = 1.0       # 다른 워커가 넣은 작업을 확인하는 간격(초)
+JOB_PROGRESS_INTERVAL = 0.5   # 진행률을 jobs.db 에 기록하는 최소 간격(초)
+JOB_HEARTBEAT_INTERVAL = 30   # 실행 중인 작업의 updated_at 을 갱신하는 간격(초)
+JOB_STALE_SECONDS = 180       # running 인데 이만큼 하트비트가 없으면 (프로세스가 죽었다고 보고) 다시 가져감
+JOB_KEEP_DAYS = 7             # 끝난 작업 기록 보관 기간
+
+
+class JobError(Exception):
+    """작업을 실패로 끝낼 때. 메시지는 그대로 사용자에게 보여주고, result 는 함께 저장"""
+
+    def __init__(self, message, result=None):
+        super().__init__(message)
+        self.result = result
+
+
+class ProgressReader:
+    """업로드 파일을 읽으면서 읽은 바이트 수를 콜백으로 알려줌 (CSV 업로드 진행률)"""
+
+    def __init__(self, f, callback):
+        self.f = f
+        self.callback = callback
+        self.done = 0
+
+    def read(self, size=-1):
+        data = self.f.read(size)
+        self.done += len(data)
+        self.callback(self.done)
+        return data
+
+
+# kind -> (처리 함수, 로그 라벨). 처리 함수는 (games.db 커넥션, params, 업로드 스트림) 을 받아
+# 결과 딕셔너리를 돌려주고, commit 까지 직접 합니다.
+JOB_HANDLERS = {}
+
+
+def job_handler(kind, label):
+    def decorator(fn):
+        JOB_HANDLERS[kind] = (fn, label)
+        return fn
+    return decorator
+
+
+@job_handler("import_games", "IMPORT")
+def run_import_games_job(conn, params, upload):
+    report = import_game_csv(conn, upload, "games")
+    conn.commit()
+    return report.as_dict()
+
+
+@job_handler("import_tournament", "IMPORT_TOURNAMENT")
+def run_import_tournament_job(conn, params, upload):
+    report = import_game_csv(conn, upload, "tournament_games")
+    conn.commit()
+    return report.as_dict()
+
+
+@job_handler("import_badges", "IMPORT_BADGES")
+def run_import_badges_job(conn, params, upload):
+    report = import_badge_csv(conn, upload)
+    conn.commit()
+    return report.as_dict()
+
+
+@job_handler("import_player_badges", "IMPORT_PLAYER_BADGES")
+def run_import_player_badges_job(conn, params, upload):
+    report = import_player_badge_csv(conn, upload)
+    conn.commit()
+    return report.as_dict()
+
+
+@job_handler("archive_import", "ARCHIVE_IMPORT")
+def run_archive_import_job(conn, params, upload):
+    created_at = params["created_at"]
+    # archives 테이블에 먼저 등록 (대국과 같은 트랜잭션)
+    cur = conn.execute(
+        "INSERT INTO archives (name, created_at, rule_set_id) VALUES (?, ?, ?)",
+        (params["archive_name"], created_at, params["rule_set_id"]),
+    )
+    archive_id = cur.lastrowid
+
+    report = import_game_csv(conn, upload, "archive_games",
+                             archive_id=archive_id, default_created_at=created_at)
+    if report.inserted == 0:
+        # 유효 데이터가 하나도 없으면 아카이브도 되돌리기
+        conn.rollback()
+        raise JobError("CSV에서 읽을 수 있는 대국 기록이 없습니다.", report.as_dict())
+
+    log_changes(conn, "archives", "put", [archive_id])
+    conn.commit()
+    refresh_archive_stats(conn, [archive_id])
+    conn.commit()
+    result = report.as_dict()
+    result["archive_id"] = archive_id
+    return result
+
 
-    # 플레이어별 뱃지 부여
-    conn.execute("""
-        CREATE TABLE IF NOT EXISTS player_badges (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            player_name TEXT NOT NULL,
-            badge_code INTEGER NOT NULL,
-            granted_at TEXT NOT NULL
-        )
-    """)
+@job_handler("recompute_pts", "PT_RECOMPUTE")
+def run_recompute_pts_job(conn, params, upload):
+    """룰 변경 후 저장 pt 다시 계산 (pt_version 이 다른 행만) + 영향받은 아카이브 통계"""
+    count = recompute_stored_pts(conn)
+    conn.commit()
+    archives = refresh_archive_stats(conn)
+    conn.commit()
+    return {"recomputed": count, "archives": archives}
 
-    # 시즌 아카이브
-    conn.execute("""
-        CREATE TABLE IF NOT EXISTS archives (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT NOT NULL,
-            created_at TEXT NOT NULL
-        )
-    """)
 
-    conn.execute("""
-        CREATE TABLE IF NOT EXISTS archive_games (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            archive_id INTEGER NOT NULL,
-            created_at TEXT NOT NULL,
-            player1_name TEXT NOT NULL,
-            player2_name TEXT NOT NULL,
-            player3_name TEXT NOT NULL,
-            player4_name TEXT NOT NULL,
-            player1_score INTEGER NOT NULL,
-            player2_score INTEGER NOT NULL,
-            player3_score INTEGER NOT NULL,
-            player4_score INTEGER NOT NULL
-        )
-    """)
+@job_handler("archive_stats", "ARCHIVE_STATS")
+def run_archive_stats_job(conn, params, upload):
+    """아카이브 플레이어 통계 다시 계산 (stale_only 면 오래된 것만, 아카이브별로 프로세스 분산)"""
+    count = refresh_archive_stats(conn, force=not params.get("stale_only"))
     conn.commit()
-    conn.close()
+    return {"archives": count}
 
 
-app = Flask(__name__, static_folder="static", template_folder="templates")
-# 한글 등 비아스키 문자 처리를 위해
-app.config['JSON_AS_ASCII'] = False
-# HTML 템플릿 자동 리로드 (파일 수정 시 서버 재시작 없이 반영)
-app.config['TEMPLATES_AUTO_RELOAD'] = True
+@job_handler("rebuild_snapshots", "SNAPSHOT_REBUILD")
+def run_rebuild_snapshots_job(conn, params, upload):
+    """플레이어 집계와 일별 스냅샷을 처음부터 다시 쌓기"""
+    rebuild_player_stats(conn)
+    refresh_daily_snapshots(conn)
+    bump_data_version(conn, "games", "tournament_games")
+    conn.commit()
+    return {"ok": True}
 
-# 마작 레이팅 서브 앱 Blueprint
-mahjong_bp = Blueprint('mahjong', __name__)
 
-# 일정 캘린더 서브 앱 Blueprint
-schedule_bp = Blueprint('schedule', __name__)
+# 업로드 없이 /api/admin/jobs 로 넣을 수 있는 작업
+MAINTENANCE_JOB_KINDS = ("recompute_pts", "rebuild_snapshots", "archive_stats")
 
-@app.context_processor
-def inject_club_name():
-    return dict(club_name=CLUB_NAME, uma_values=UMA_VALUES, return_score=RETURN_SCORE)
 
-CORS(app)
-init_db()
+def job_entry(r):
+    total = r["total"] or 0
+    return {
+        "id": r["id"],
+        "kind": r["kind"],
+        "status": r["status"],
+        "progress": r["progress"],
+        "total": total,
+        "percent": round(r["progress"] * 100 / total) if total else None,
+        "result": json.loads(r["result"]) if r["result"] else None,
+        "error": r["error"],
+        "created_at": r["created_at"],
+        "started_at": r["started_at"],
+        "finished_at": r["finished_at"],
+    }
+
+
+class JobRunner:
+    """
+    jobs.db 를 큐로 쓰는 작업 실행기. 워커(프로세스)마다 JOB_WORKERS 개의 스레드가
+    queued 작업을 하나씩 가져가 실행합니다. 가져가는 건 BEGIN IMMEDIATE 안에서 하므로
+    gunicorn 워커가 여럿이어도 한 작업은 한 번만 실행됨.
+    실행 중에는 하트비트로 updated_at 을 갱신하고, 하트비트가 JOB_STALE_SECONDS 동안 끊긴
+    (프로세스가 죽은) 작업만 다른 워커가 다시 가져갑니다.
+    스레드는 첫 작업 등록 / 조회 때 시작 (fork 이전에 띄우지 않도록).
+    """
+
+    def __init__(self, pool, workers=JOB_WORKERS):
+        self.pool = pool
+        self.workers = workers
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._threads = []
+        self._pid = os.getpid()
+        self._stats = {"done": 0, "failed": 0}
+
+    def ensure_started(self):
+        with self._lock:
+            if self._pid != os.getpid():
+                # fork 된 워커: 부모의 스레드 정보는 버림
+                self._threads = []
+                self._wake = threading.Event()
+                self._pid = os.getpid()
+            if self._threads:
+                return
+            for i in range(self.workers):
+                t = threading.Thread(target=self._run, name=f"job-runner-{i}", daemon=True)
+                t.start()
+                self._threads.append(t)
+
+    def submit(self, kind, params=None, upload=None):
+        """작업 등록 후 id 반환. upload(FileStorage) 는 작업이 끝날 때까지 파일로 보관"""
+        upload_path = None
+        total = 0
+        if upload is not None:
+            os.makedirs(JOB_UPLOAD_DIR, exist_ok=True)
+            upload_path = os.path.join(JOB_UPLOAD_DIR, f"{uuid.uuid4().hex}.csv")
+            upload.save(upload_path)
+            total = os.path.getsize(upload_path)
+
+        now = datetime.now().isoformat(timespec="seconds")
+        conn = self.pool.acquire()
+        try:
+            cur = conn.execute("""
+                INSERT INTO jobs (kind, status, params, upload_path, total, created_at, updated_at)
+                VALUES (?, 'queued', ?, ?, ?, ?, ?)
+            """, (kind, json.dumps(params or {}, ensure_ascii=False), upload_path, total, now, now))
+            job_id = cur.lastrowid
+            # 오래된 완료 기록 정리
+            cutoff = (datetime.now() - timedelta(days=JOB_KEEP_DAYS)).isoformat(timespec="seconds")
+            conn.execute("DELETE FROM jobs WHERE status IN ('done', 'failed') AND finished_at < ?", (cutoff,))
+            conn.commit()
+        finally:
+            self.pool.release(conn)
 
-# 마작 포인트 계산용 상수 (Moved to top)
+        self.ensure_started()
+        self._wake.set()
+        return job_id
+
+    def get(self, job_id):
+        conn = self.pool.acquire()
+        try:
+            return conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        finally:
+            self.pool.release(conn)
+
+    def recent(self, limit):
+        conn = self.pool.acquire()
+        try:
+            return conn.execute("SELECT * FROM jobs ORDER BY id DESC LIMIT ?", (limit,)).fetchall()
+        finally:
+            self.pool.release(conn)
+
+    @staticmethod
+    def _worker_id():
+        return f"{os.getpid()}/{threading.current_thread().name}"
+
+    def _claim(self, conn):
+        """대기 중인 (또는 하트비트가 끊긴) 작업 하나를 running 으로 바꾸고 반환"""
+        now = datetime.now()
+        stale = (now - timedelta(seconds=JOB_STALE_SECONDS)).isoformat(timespec="seconds")
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            job = conn.execute("""
+                SELECT * FROM jobs
+                WHERE status = 'queued' OR (status = 'running' AND updated_at < ?)
+                ORDER BY id ASC LIMIT 1
+            """, (stale,)).fetchone()
+            if job is not None:
+                ts = now.isoformat(timespec="seconds")
+                conn.execute("""
+                    UPDATE jobs SET status = 'running', started_at = ?, updated_at = ?, worker = ?,
+                                    progress = 0
+                    WHERE id = ?
+                """, (ts, ts, self._worker_id(), job["id"]))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        return job
+
+    def _finish(self, conn, job_id, status, result=None, error=None):
+        now = datetime.now().isoformat(timespec="seconds")
+        conn.execute("""
+            UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ?, updated_at = ?,
+                            upload_path = NULL
+            WHERE id = ?
+        """, (status, json.dumps(result, ensure_ascii=False) if result is not None else None,
+              error, now, now, job_id))
+        conn.commit()
+        with self._lock:
+            self._stats[status] += 1
+
+    def _heartbeat(self, job_id, worker, stop):
+        """
+        핸들러가 도는 동안 updated_at 을 JOB_HEARTBEAT_INTERVAL 마다 갱신.
+        진행률을 안 알리는 긴 작업(재계산 등)도 다른 워커가 멈춘 작업으로 보고 다시 실행하지 않도록.
+        """
+        while not stop.wait(JOB_HEARTBEAT_INTERVAL):
+            conn = self.pool.acquire()
+            try:
+                conn.execute(
+                    "UPDATE jobs SET updated_at = ? WHERE id = ? AND status = 'running' AND worker = ?",
+                    (datetime.now().isoformat(timespec="seconds"), job_id, worker),
+                )
+                conn.commit()
+            except sqlite3.Error as e:
+                print(f"[JOBS] heartbeat failed for job {job_id}: {e}")
+            finally:
+                self.pool.release(conn)
+
+    def _execute(self, conn, job):
+        fn, label = JOB_HANDLERS[job["kind"]]
+        params = json.loads(job["params"] or "{}")
+        last_write = [0.0]
+
+        def report_progress(done):
+            if time.monotonic() - last_write[0] < JOB_PROGRESS_INTERVAL:
+                return
+            last_write[0] = time.monotonic()
+            conn.execute("UPDATE jobs SET progress = ?, updated_at = ? WHERE id = ?",
+                         (done, datetime.now().isoformat(timespec="seconds"), job["id"]))
+            conn.commit()
+
+        upload = None
+        stop_heartbeat = threading.Event()
+        heartbeat = threading.Thread(target=self._heartbeat, args=(job["id"], self._worker_id(), stop_heartbeat),
+                                     name=f"job-heartbeat-{job['id']}", daemon=True)
+        heartbeat.start()
+        games_conn = db_pool.acquire()
+        try:
+            if job["upload_path"]:
+                upload = open(job["upload_path"], "rb")
+            try:
+                result = fn(games_conn, params,
+                            ProgressReader(upload, report_progress) if upload else None)
+            except (JobError, CsvImportError) as e:
+                games_conn.rollback()
+                print(f"[{label}] job {job['id']} failed: {e}")
+                self._finish(conn, job["id"], "failed",
+                             result=getattr(e, "result", None), error=str(e))
+                return
+            except Exception as e:
+                games_conn.rollback()
+                print(f"[{label}] job {job['id']} failed: {e!r}")
+                self._finish(conn, job["id"], "failed", error=f"서버 오류: {e}")
+                return
+        finally:
+            stop_heartbeat.set()
+            heartbeat.join()
+            db_pool.release(games_conn)
+            if upload is not None:
+                upload.close()
+                try:
+                    os.remove(job["upload_path"])
+                except OSError:
+                    pass
+
+        if "inserted" in result:
+            print(f"[{label}] job {job['id']} inserted={result['inserted']}, updated={result['updated']}, "
+                  f"skipped={result['skipped']}, invalid={result['invalid']}")
+        if job["total"]:
+            conn.execute("UPDATE jobs SET progress = total WHERE id = ?", (job["id"],))
+        self._finish(conn, job["id"], "done", result=result)
+
+    def _run(self):
+        while True:
+            conn = self.pool.acquire()
+            try:
+                job = self._claim(conn)
+                if job is not None:
+                    self._execute(conn, job)
+            except sqlite3.Error as e:
+                print(f"[JOBS] runner error: {e}")
+                job = None
+            finally:
+                self.pool.release(conn)
+            if job is None:
+                self._wake.wait(JOB_POLL_INTERVAL)
+                self._wake.clear()
+
+    def stats(self):
+        with self._lock:
+            data = dict(self._stats)
+            data.update({"threads": len(self._threads), "pid": os.getpid()})
+        return data
+
+
+job_runner = JobRunner(jobs_db_pool)
+
+
+# ================== CSV 내보내기 공통 엔진 ==================
+
+EXPORT_FLUSH_ROWS = 500   # 이 행 수마다 인코딩해서 내보냄
+# ?encoding= 값 -> (파이썬 코덱, Content-Type charset). utf-8 은 엑셀용 BOM 포함
+EXPORT_ENCODINGS = {
+    "cp949": ("cp949", "cp949"),
+    "utf-8": ("utf-8-sig", "utf-8"),
+}
+
+
+def parse_export_args(args):
+    """?encoding=utf-8|cp949 (기본 cp949), ?since_id=N (해당 id 이후만). 잘못된 값이면 ValueError"""
+    encoding = (args.get("encoding") or "cp949").strip().lower()
+    if encoding in ("utf8", "utf-8-sig"):
+        encoding = "utf-8"
+    if encoding not in EXPORT_ENCODINGS:
+        raise ValueError("encoding")
+    since_id = int(args.get("since_id") or 0)
+    if since_id < 0:
+        raise ValueError("since_id")
+    return encoding, since_id
+
+
+def iter_csv_chunks(header, rows, encoding):
+    """
+    행 이터레이터를 CSV 바이트 조각으로 바꾸는 제너레이터.
+    EXPORT_FLUSH_ROWS 행마다 버퍼를 비우므로 메모리는 조각 크기만큼만 사용.
+    """
+    encoder = codecs.getincrementalencoder(EXPORT_ENCODINGS[encoding][0])(errors="replace")
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(header)
+    pending = 1
+    for values in rows:
+        writer.writerow(values)
+        pending += 1
+        if pending >= EXPORT_FLUSH_ROWS:
+            yield encoder.encode(buf.getvalue())
+            buf.seek(0)
+            buf.truncate()
+            pending = 0
+    yield encoder.encode(buf.getvalue(), final=True)
+
+
+def csv_export_response(sql, params, header, to_values, filename):
+    """
+    쿼리 커서를 그대로 순회하며 CSV 를 스트리밍으로 응답.
+    sql 은 ? 자리에 since_id 를 받는 형태여야 함.
+    """
+    try:
+        encoding, since_id = parse_export_args(request.args)
+    except ValueError:
+        return jsonify({"error": "invalid encoding/since_id"}), 400
+
+    def generate():
+        cur = get_db().execute(sql, params + (since_id,))
+        try:
+            yield from iter_csv_chunks(header, (to_values(r) for r in cur), encoding)
+        finally:
+            cur.close()
+
+    if since_id:
+        stem, ext = os.path.splitext(filename)
+        filename = f"{stem}_since_{since_id}{ext}"
+    return Response(
+        stream_with_context(generate()),
+        content_type=f"text/csv; charset={EXPORT_ENCODINGS[encoding][1]}",
+        headers={"Content-Disposition": f"attachment; filename={filename}"},
+    )
+
+
+GAME_CSV_HEADER = [
+    "ID", "시간",
+    "P1 이름", "P1 점수", "P1 pt",
+    "P2 이름", "P2 점수", "P2 pt",
+    "P3 이름", "P3 점수", "P3 pt",
+    "P4 이름", "P4 점수", "P4 pt",
+]
+
+
+def game_csv_values(row):
+    names = row_names(row)
+    scores = row_scores(row)
+    pts = row_pts(row)
+    values = [row["id"], row["created_at"]]
+    for i in range(4):
+        values += [names[i], scores[i], f"{pts[i]:.1f}"]
+    return values
+
+
+def export_game_csv(table, filename):
+    sql = f"""
+        SELECT
+            id, created_at,
+            player1_name, player2_name, player3_name, player4_name,
+            player1_score, player2_score, player3_score, player4_score,
+            player1_pt, player2_pt, player3_pt, player4_pt
+        FROM {table}
+        WHERE id > ?
+        ORDER BY id ASC
+    """
+    return csv_export_response(sql, (), GAME_CSV_HEADER, game_csv_values, filename)
 
 
 # ================== 개인전 API ==================
 
 @mahjong_bp.route("/api/games", methods=["GET"])
+@versioned_json("games")
 def list_games():
+    try:
+        opts = parse_game_list_args(request.args)
+    except ValueError:
+        return jsonify({"error": "invalid limit/cursor/from/to"}), 400
+
     conn = get_db()
-    cur = conn.execute("SELECT * FROM games ORDER BY id DESC")
-    rows = cur.fetchall()
-    conn.close()
-    return jsonify([dict(row) for row in rows])
+    rows, next_cursor = query_game_page(conn, "games", opts)
+    return game_page_response(rows, next_cursor)
 
 
 @mahjong_bp.route("/api/games", methods=["POST"])
@@ -200,16 +2540,9 @@ def create_game():
     created_at = datetime.now().isoformat(timespec="minutes")
 
     conn = get_db()
-    cur = conn.execute("""
-        INSERT INTO games (
-            created_at,
-            player1_name, player2_name, player3_name, player4_name,
-            player1_score, player2_score, player3_score, player4_score
-        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-    """, (created_at, p1, p2, p3, p4, s1, s2, s3, s4))
+    new_id = insert_game(conn, "games", created_at, [p1, p2, p3, p4], [s1, s2, s3, s4])
+    publish_game_added(conn, "games", new_id)
     conn.commit()
-    new_id = cur.lastrowid
-    conn.close()
 
     return jsonify({"id": new_id}), 201
 
@@ -217,85 +2550,179 @@ def create_game():
 @mahjong_bp.route("/api/games/<int:game_id>", methods=["DELETE"])
 def delete_game(game_id):
     conn = get_db()
-    cur = conn.execute("DELETE FROM games WHERE id = ?", (game_id,))
-    conn.commit()
-    deleted = cur.rowcount
-    conn.close()
-
-    if deleted == 0:
+    row = conn.execute("SELECT * FROM games WHERE id = ?", (game_id,)).fetchone()
+    if not row:
         return jsonify({"error": "not found"}), 404
+
+    conn.execute("DELETE FROM games WHERE id = ?", (game_id,))
+    remove_participants(conn, "games", game_id)
+    apply_game_to_player_stats(conn, row_names(row), row_pts(row), row_ranks(row), sign=-1)
+    refresh_daily_snapshots(conn, snapshot_date(row["created_at"]))
+    log_changes(conn, "games", "delete", [game_id])
+    bump_data_version(conn, "games")
+    publish_event(conn, "game_deleted", {
+        "table": "games",
+        "id": game_id,
+        "rankings": ranking_entries_for(conn, row_names(row)),
+    })
+    conn.commit()
     return jsonify({"ok": True})
 
 
-# ---- 개인전 CSV 내보내기 ----
+def ranking_entry(r):
+    """player_stats 한 행 -> /api/rankings 응답 형식"""
+    games = r["games"]
+    rank_counts = [r["rank1_count"], r["rank2_count"], r["rank3_count"], r["rank4_count"]]
+    return {
+        "name": r["player_name"],
+        "games": games,
+        "total_pt": round(r["total_pt"], 1),
+        "avg_pt": round(r["total_pt"] / games, 1) if games else 0,
+        "yonde_rate": round((rank_counts[0] + rank_counts[1]) * 100 / games, 1) if games else 0,
+        "rankCounts": rank_counts,
+    }
+
+
+def ranking_entries_for(conn, names):
+    """해당 플레이어들의 현재 랭킹 행 (집계에서 빠진 플레이어는 removed 로 표시)"""
+    names = sorted({(n or "").strip() for n in names} - {""})
+    if not names:
+        return []
+    rows = conn.execute(f"""
+        SELECT
+            player_name, games, total_pt,
+            rank1_count, rank2_count, rank3_count, rank4_count
+        FROM player_stats
+        WHERE player_name IN ({",".join("?" * len(names))})
+    """, names).fetchall()
+    found = {r["player_name"]: ranking_entry(r) for r in rows}
+    return [found.get(n) or {"name": n, "removed": True} for n in names]
+
+
+@mahjong_bp.route("/api/rankings", methods=["GET"])
+@versioned_json("games")
+def rankings_api():
+    """
+    개인전 전체 등수 (player_stats 집계 테이블 기반).
+    ?min_games=4 처럼 최소 판수 필터 가능.
+    """
+    try:
+        min_games = int(request.args.get("min_games", 0))
+    except (TypeError, ValueError):
+        return jsonify({"error": "min_games must be integer"}), 400
 
-@mahjong_bp.route("/export", methods=["GET"])
-def export_games():
     conn = get_db()
     cur = conn.execute("""
         SELECT
-            id, created_at,
-            player1_name, player2_name, player3_name, player4_name,
-            player1_score, player2_score, player3_score, player4_score
-        FROM games
-        ORDER BY id ASC
-    """)
-    rows = cur.fetchall()
-    conn.close()
-
-    def calc_pts(scores):
-        order = sorted(range(4), key=lambda i: scores[i], reverse=True)
-
-        uma_for_player = [0, 0, 0, 0]
-        for rank, idx in enumerate(order):
-            uma_for_player[idx] = UMA_VALUES[rank]
-
-        pts = []
-        for i in range(4):
-            base = (scores[i] - RETURN_SCORE) / 1000.0
-            pts.append(base + uma_for_player[i])
-        return pts
-
-    output = io.StringIO()
-    writer = csv.writer(output)
-
-    writer.writerow([
-        "ID", "시간",
-        "P1 이름", "P1 점수", "P1 pt",
-        "P2 이름", "P2 점수", "P2 pt",
-        "P3 이름", "P3 점수", "P3 pt",
-        "P4 이름", "P4 점수", "P4 pt",
-    ])
+            player_name, games, total_pt,
+            rank1_count, rank2_count, rank3_count, rank4_count
+        FROM player_stats
+        WHERE games >= ?
+        ORDER BY total_pt DESC, player_name ASC
+    """, (min_games,))
+    return jsonify([ranking_entry(r) for r in cur.fetchall()])
+
+
+@mahjong_bp.route("/api/players/<player_name>/games", methods=["GET"])
+@versioned_json("games", "tournament_games", "archives")
+def player_games_api(player_name):
+    """
+    한 플레이어가 참가한 대국만 (game_participants 인덱스로 O(k) 조회).
+      ?table=games|tournament_games|archive_games  (기본 games)
+      ?archive_id=<id>  (table=archive_games 일 때 특정 아카이브만)
+    대국 목록 공통 파라미터(limit/cursor/from/to)도 그대로 사용 가능.
+    """
+    table = request.args.get("table", "games")
+    if table not in PARTICIPANT_TABLES:
+        return jsonify({"error": "unknown table"}), 400
+    try:
+        opts = parse_game_list_args(request.args)
+        archive_id = request.args.get("archive_id")
+        archive_id = int(archive_id) if archive_id else None
+    except ValueError:
+        return jsonify({"error": "invalid limit/cursor/from/to/archive_id"}), 400
 
-    for row in rows:
-        s1 = row["player1_score"]
-        s2 = row["player2_score"]
-        s3 = row["player3_score"]
-        s4 = row["player4_score"]
-        scores = [s1, s2, s3, s4]
-        pts = calc_pts(scores)
-
-        writer.writerow([
-            row["id"],
-            row["created_at"],
-            row["player1_name"], s1, f"{pts[0]:.1f}",
-            row["player2_name"], s2, f"{pts[1]:.1f}",
-            row["player3_name"], s3, f"{pts[2]:.1f}",
-            row["player4_name"], s4, f"{pts[3]:.1f}",
-        ])
-
-    csv_data = output.getvalue()
-    output.close()
-
-    csv_bytes = csv_data.encode("cp949", errors="replace")
+    opts["player"] = player_name.strip()
+    where, params = None, ()
+    if table == "archive_games" and archive_id is not None:
+        where, params = "archive_id = ?", (archive_id,)
 
-    return Response(
-        csv_bytes,
-        mimetype="text/csv; charset=cp949",
-        headers={
-            "Content-Disposition": "attachment; filename=madang_majhong_rating.csv"
-        },
-    )
+    conn = get_db()
+    rows, next_cursor = query_game_page(conn, table, opts, where=where, params=params)
+    return game_page_response(rows, next_cursor)
+
+
+# 그래프 기간: 마지막 기록일 포함 N일 (all 은 첫 기록부터)
+HISTORY_RANGES = {"week": 7, "month": 30, "all": None}
+
+
+@mahjong_bp.route("/api/players/<player_name>/history", methods=["GET"])
+@versioned_json("games", "tournament_games")
+def player_history_api(player_name):
+    """
+    일별 누적 pt / 시즌 점수 / 등수 추이 (daily_player_snapshots 기반).
+      ?range=week|month|all  (기본 week)
+    기록이 없는 날은 직전 상태로 채워서 하루 한 점씩 돌려줍니다.
+    """
+    range_key = request.args.get("range", "week")
+    if range_key not in HISTORY_RANGES:
+        return jsonify({"error": "range must be week, month or all"}), 400
+    name = player_name.strip()
+
+    conn = get_db()
+    bounds = conn.execute("""
+        SELECT MIN(snap_date), MAX(snap_date)
+        FROM daily_player_snapshots WHERE player_name = ?
+    """, (name,)).fetchone()
+    if not bounds[1]:
+        return jsonify([])
+
+    end = datetime.strptime(bounds[1], "%Y-%m-%d")
+    days = HISTORY_RANGES[range_key]
+    start = datetime.strptime(bounds[0], "%Y-%m-%d") if days is None else end - timedelta(days=days - 1)
+    start_str = start.strftime("%Y-%m-%d")
+
+    columns = "snap_date, total_pt, season_score, pt_rank, season_rank, total_players"
+    # 시작일 이전 마지막 상태 + 기간 내 스냅샷
+    rows = conn.execute(f"""
+        SELECT * FROM (
+            SELECT {columns} FROM daily_player_snapshots
+            WHERE player_name = ? AND snap_date < ?
+            ORDER BY snap_date DESC LIMIT 1
+        )
+        UNION ALL
+        SELECT {columns} FROM daily_player_snapshots
+        WHERE player_name = ? AND snap_date >= ?
+        ORDER BY snap_date ASC
+    """, (name, start_str, name, start_str)).fetchall()
+
+    result = []
+    last = None
+    i = 0
+    day = start
+    while day <= end:
+        day_str = day.strftime("%Y-%m-%d")
+        while i < len(rows) and rows[i]["snap_date"] <= day_str:
+            last = rows[i]
+            i += 1
+        if last is not None:
+            result.append({
+                "date": day_str,
+                "total_pt": last["total_pt"],
+                "season_score": last["season_score"],
+                "pt_rank": last["pt_rank"],
+                "season_rank": last["season_rank"],
+                "total_players": last["total_players"],
+            })
+        day += timedelta(days=1)
+    return jsonify(result)
+
+
+# ---- 개인전 CSV 내보내기 ----
+
+@mahjong_bp.route("/export", methods=["GET"])
+def export_games():
+    return export_game_csv("games", "madang_majhong_rating.csv")
 
 
 # ---- 개인전 CSV 업로드 ----
@@ -309,7 +2736,8 @@ def import_games():
         <head>
           <meta charset="UTF-8">
           <title>개인전 CSV 업로드 - {CLUB_NAME} 마작 레이팅</title>
-          <link rel="stylesheet" href="/static/style.css">
+          <link rel="stylesheet" href="{asset_url('style.css')}">
+          {font_links()}
         </head>
         <body>
           <div class="top-bar">
@@ -341,89 +2769,20 @@ def import_games():
     if not file:
         return "파일이 없습니다.", 400
 
-    raw = file.read()
-    text = None
-    for enc in ("utf-8-sig", "utf-8", "cp949"):
-        try:
-            text = raw.decode(enc)
-            break
-        except UnicodeDecodeError:
-            continue
-
-    if text is None:
-        return "알 수 없는 인코딩입니다. UTF-8 또는 CP949로 저장해주세요.", 400
-
-    import io as _io
-    sample = "\n".join(text.splitlines()[:5])
-    try:
-        dialect = csv.Sniffer().sniff(sample, delimiters=",;")
-    except Exception:
-        dialect = csv.excel
-        dialect.delimiter = ","
-
-    reader = csv.DictReader(_io.StringIO(text), dialect=dialect)
-
-    def pick(row, keys, default=""):
-        for k in keys:
-            if k in row and row[k] not in (None, ""):
-                return row[k]
-        return default
-
-    def pick_int(row, keys, default=0):
-        val = pick(row, keys, None)
-        if val is None or val == "":
-            return default
-        try:
-            return int(float(val))
-        except (ValueError, TypeError):
-            return default
-
-    conn = get_db()
-    inserted = 0
-
-    for row in reader:
-        created_at = pick(row, ["created_at", "시간"])
-        if not created_at:
-            created_at = datetime.now().isoformat(timespec="minutes")
-
-        p1_name = pick(row, ["player1_name", "P1 이름", "P1이름"])
-        p2_name = pick(row, ["player2_name", "P2 이름", "P2이름"])
-        p3_name = pick(row, ["player3_name", "P3 이름", "P3이름"])
-        p4_name = pick(row, ["player4_name", "P4 이름", "P4이름"])
-
-        s1 = pick_int(row, ["player1_score", "P1 점수", "P1점수"])
-        s2 = pick_int(row, ["player2_score", "P2 점수", "P2점수"])
-        s3 = pick_int(row, ["player3_score", "P3 점수", "P3점수"])
-        s4 = pick_int(row, ["player4_score", "P4 점수", "P4점수"])
-
-        if not (p1_name or p2_name or p3_name or p4_name):
-            continue
-
-        conn.execute("""
-            INSERT INTO games (
-                created_at,
-                player1_name, player2_name, player3_name, player4_name,
-                player1_score, player2_score, player3_score, player4_score
-            )
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, (created_at,
-              p1_name, p2_name, p3_name, p4_name,
-              s1, s2, s3, s4))
-        inserted += 1
-
-    conn.commit()
-    conn.close()
-
-    print(f"[IMPORT] inserted rows: {inserted}")
-    return redirect(url_for("mahjong.index_page"))
+    job_id = job_runner.submit("import_games", upload=file)
+    return job_accepted_response(job_id, "개인전 CSV 업로드")
 
 @mahjong_bp.route("/api/tournament_games", methods=["GET"])
+@versioned_json("tournament_games")
 def list_tournament_games():
+    try:
+        opts = parse_game_list_args(request.args)
+    except ValueError:
+        return jsonify({"error": "invalid limit/cursor/from/to"}), 400
+
     conn = get_db()
-    cur = conn.execute("SELECT * FROM tournament_games ORDER BY id DESC")
-    rows = cur.fetchall()
-    conn.close()
-    return jsonify([dict(row) for row in rows])
+    rows, next_cursor = query_game_page(conn, "tournament_games", opts)
+    return game_page_response(rows, next_cursor)
 
 
 @mahjong_bp.route("/api/tournament_games", methods=["POST"])
@@ -459,16 +2818,9 @@ def create_tournament_game():
     created_at = datetime.now().isoformat(timespec="minutes")
 
     conn = get_db()
-    cur = conn.execute("""
-        INSERT INTO tournament_games (
-            created_at,
-            player1_name, player2_name, player3_name, player4_name,
-            player1_score, player2_score, player3_score, player4_score
-        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-    """, (created_at, p1, p2, p3, p4, s1, s2, s3, s4))
+    new_id = insert_game(conn, "tournament_games", created_at, [p1, p2, p3, p4], [s1, s2, s3, s4])
+    publish_game_added(conn, "tournament_games", new_id)
     conn.commit()
-    new_id = cur.lastrowid
-    conn.close()
 
     return jsonify({"id": new_id}), 201
 
@@ -476,18 +2828,24 @@ def create_tournament_game():
 @mahjong_bp.route("/api/tournament_games/<int:game_id>", methods=["DELETE"])
 def delete_tournament_game(game_id):
     conn = get_db()
-    cur = conn.execute("DELETE FROM tournament_games WHERE id = ?", (game_id,))
-    conn.commit()
-    deleted = cur.rowcount
-    conn.close()
-    if deleted == 0:
+    row = conn.execute("SELECT * FROM tournament_games WHERE id = ?", (game_id,)).fetchone()
+    if not row:
         return jsonify({"error": "not found"}), 404
+
+    conn.execute("DELETE FROM tournament_games WHERE id = ?", (game_id,))
+    remove_participants(conn, "tournament_games", game_id)
+    refresh_daily_snapshots(conn, snapshot_date(row["created_at"]))
+    log_changes(conn, "tournament_games", "delete", [game_id])
+    bump_data_version(conn, "tournament_games")
+    publish_event(conn, "game_deleted", {"table": "tournament_games", "id": game_id})
+    conn.commit()
     return jsonify({"ok": True})
 
 
 # ================== 뱃지 / 관리자 API ==================
 
 @mahjong_bp.route("/api/badges", methods=["GET", "POST"])
+@versioned_json("badges")
 def badges_api():
     if request.method == "POST":
         data = request.get_json() or {}
@@ -509,12 +2867,12 @@ def badges_api():
                 "INSERT INTO badges (code, name, grade, description) VALUES (?, ?, ?, ?)",
                 (code, name, grade, description),
             )
-            conn.commit()
             new_id = cur.lastrowid
+            log_changes(conn, "badges", "put", [new_id])
+            bump_data_version(conn, "badges")
+            conn.commit()
         except sqlite3.IntegrityError:
-            conn.close()
             return jsonify({"error": "badge code already exists"}), 400
-        conn.close()
         return jsonify({"id": new_id}), 201
 
     # GET
@@ -525,7 +2883,6 @@ def badges_api():
         ORDER BY code ASC
     """)
     rows = [dict(r) for r in cur.fetchall()]
-    conn.close()
     return jsonify(rows)
 
 
@@ -535,22 +2892,42 @@ def delete_badge(badge_id):
     cur = conn.execute("SELECT code FROM badges WHERE id = ?", (badge_id,))
     row = cur.fetchone()
     if not row:
-        conn.close()
         return jsonify({"error": "badge not found"}), 404
 
     code = row["code"]
 
+    granted_ids = [r[0] for r in conn.execute(
+        "SELECT id FROM player_badges WHERE badge_code = ?", (code,)
+    )]
     conn.execute("DELETE FROM player_badges WHERE badge_code = ?", (code,))
     cur = conn.execute("DELETE FROM badges WHERE id = ?", (badge_id,))
+    log_changes(conn, "player_badges", "delete", granted_ids)
+    log_changes(conn, "badges", "delete", [badge_id])
+    bump_data_version(conn, "badges", "player_badges")
+    publish_event(conn, "badge_deleted", {"id": badge_id, "code": code})
     conn.commit()
     deleted = cur.rowcount
-    conn.close()
 
     if deleted == 0:
         return jsonify({"error": "badge not found"}), 404
     return jsonify({"ok": True})
 
+def player_badge_entry(r):
+    """player_badges + badges 조인 한 행 -> /api/player_badges 응답 형식"""
+    return {
+        "id": r["id"],
+        "player_name": r["player_name"],
+        "badge_code": r["badge_code"],
+        "code": r["badge_code"],  # 프론트 편의용(옵션)
+        "granted_at": r["granted_at"],
+        "name": r["badge_name"] or "",
+        "grade": r["badge_grade"] or "",
+        "description": r["badge_description"] or "",
+    }
+
+
 @mahjong_bp.route("/api/player_badges", methods=["GET", "POST"])
+@versioned_json("badges", "player_badges")
 def player_badges_api():
     if request.method == "GET":
         conn = get_db()
@@ -567,22 +2944,7 @@ def player_badges_api():
             LEFT JOIN badges b ON pb.badge_code = b.code
             ORDER BY pb.id DESC
         """)
-        rows = cur.fetchall()
-        conn.close()
-
-        return jsonify([
-            {
-                "id": r["id"],
-                "player_name": r["player_name"],
-                "badge_code": r["badge_code"],
-                "code": r["badge_code"],  # 프론트 편의용(옵션)
-                "granted_at": r["granted_at"],
-                "name": r["badge_name"] or "",
-                "grade": r["badge_grade"] or "",
-                "description": r["badge_description"] or "",
-            }
-            for r in rows
-        ])
+        return jsonify([player_badge_entry(r) for r in cur.fetchall()])
 
     # ===== POST (기존 assign_badge 내용 그대로) =====
     data = request.get_json() or {}
@@ -600,20 +2962,33 @@ def player_badges_api():
 
     cur = conn.execute("SELECT 1 FROM badges WHERE code = ?", (badge_code,))
     if not cur.fetchone():
-        conn.close()
         return jsonify({"error": "badge not found"}), 400
 
-    conn.execute("""
+    cur = conn.execute("""
         INSERT INTO player_badges (player_name, badge_code, granted_at)
         VALUES (?, ?, ?)
     """, (player_name, badge_code, granted_at))
+    log_changes(conn, "player_badges", "put", [cur.lastrowid])
+    bump_data_version(conn, "player_badges")
+    badge = conn.execute(
+        "SELECT name, grade, description FROM badges WHERE code = ?", (badge_code,)
+    ).fetchone()
+    publish_event(conn, "badge_granted", {
+        "id": cur.lastrowid,
+        "player_name": player_name,
+        "code": badge_code,
+        "granted_at": granted_at,
+        "name": badge["name"],
+        "grade": badge["grade"],
+        "description": badge["description"] or "",
+    })
     conn.commit()
-    conn.close()
     return jsonify({"ok": True}), 201
 
 
 
 @mahjong_bp.route("/api/player_badges/by_player/<player_name>", methods=["GET"])
+@versioned_json("badges", "player_badges")
 def list_player_badges(player_name):
     name = player_name.strip()
     conn = get_db()
@@ -632,7 +3007,6 @@ def list_player_badges(player_name):
         ORDER BY pb.granted_at ASC, pb.id ASC
     """, (name,))
     rows = cur.fetchall()
-    conn.close()
 
     result = []
     for r in rows:
@@ -651,12 +3025,15 @@ def list_player_badges(player_name):
 @mahjong_bp.route("/api/player_badges/<int:assign_id>", methods=["DELETE"])
 def delete_player_badge(assign_id):
     conn = get_db()
+    row = conn.execute("SELECT player_name FROM player_badges WHERE id = ?", (assign_id,)).fetchone()
     cur = conn.execute("DELETE FROM player_badges WHERE id = ?", (assign_id,))
-    conn.commit()
-    deleted = cur.rowcount
-    conn.close()
-    if deleted == 0:
+    # 지운 행이 없으면 버전을 올리지 않음 (클라이언트 캐시를 괜히 무효화하지 않게)
+    if not row or cur.rowcount == 0:
         return jsonify({"error": "not found"}), 404
+    log_changes(conn, "player_badges", "delete", [assign_id])
+    bump_data_version(conn, "player_badges")
+    publish_event(conn, "badge_revoked", {"id": assign_id, "player_name": row["player_name"]})
+    conn.commit()
     return jsonify({"ok": True})
 
 
@@ -666,30 +3043,17 @@ def delete_player_badge(assign_id):
 
 @mahjong_bp.route("/export_badges", methods=["GET"])
 def export_badges():
-    conn = get_db()
-    cur = conn.execute("""
-        SELECT code, name, grade, description
+    sql = """
+        SELECT id, code, name, grade, description
         FROM badges
+        WHERE id > ?
         ORDER BY code ASC
-    """)
-    rows = cur.fetchall()
-    conn.close()
-
-    output = io.StringIO()
-    writer = csv.writer(output)
-    writer.writerow(["code", "name", "grade", "description"])
-
-    for r in rows:
-        writer.writerow([r["code"], r["name"], r["grade"], r["description"] or ""])
-
-    csv_data = output.getvalue()
-    output.close()
-    csv_bytes = csv_data.encode("cp949", errors="replace")
-
-    return Response(
-        csv_bytes,
-        mimetype="text/csv; charset=cp949",
-        headers={"Content-Disposition": "attachment; filename=badges.csv"},
+    """
+    return csv_export_response(
+        sql, (),
+        ["code", "name", "grade", "description"],
+        lambda r: [r["code"], r["name"], r["grade"], r["description"] or ""],
+        "badges.csv",
     )
 
 
@@ -702,7 +3066,8 @@ def import_badges():
         <head>
           <meta charset="UTF-8">
           <title>뱃지 목록 CSV 업로드 - {CLUB_NAME} 마작 레이팅</title>
-          <link rel="stylesheet" href="/static/style.css">
+          <link rel="stylesheet" href="{asset_url('style.css')}">
+          {font_links()}
         </head>
         <body>
           <div class="top-bar">
@@ -731,80 +3096,18 @@ def import_badges():
         """
 
     file = request.files.get("file")
-    if not file:
-        return "파일이 없습니다.", 400
-
-    raw = file.read()
-    text = None
-    for enc in ("utf-8-sig", "utf-8", "cp949"):
-        try:
-            text = raw.decode(enc)
-            break
-        except UnicodeDecodeError:
-            continue
-    if text is None:
-        return "알 수 없는 인코딩입니다. UTF-8 또는 CP949로 저장해주세요.", 400
-
-    import io as _io
-    sample = "\n".join(text.splitlines()[:5])
-    try:
-        dialect = csv.Sniffer().sniff(sample, delimiters=",;")
-    except Exception:
-        dialect = csv.excel
-        dialect.delimiter = ","
-
-    reader = csv.DictReader(_io.StringIO(text), dialect=dialect)
-
-    def pick(row, keys, default=""):
-        for k in keys:
-            if k in row and row[k] not in (None, ""):
-                return row[k]
-        return default
-
-    conn = get_db()
-    inserted = 0
-    updated = 0
-
-    for row in reader:
-        try:
-            code = int(float(pick(row, ["code", "코드"], "0")))
-        except Exception:
-            code = 0
-
-        name = str(pick(row, ["name", "이름"], "")).strip()
-        grade = str(pick(row, ["grade", "등급"], "")).strip()
-        desc = str(pick(row, ["description", "설명"], "")).strip()
-
-        if not code or not name or not grade:
-            continue
-
-        # code 기준 업서트(있으면 update, 없으면 insert)
-        try:
-            conn.execute(
-                "INSERT INTO badges (code, name, grade, description) VALUES (?, ?, ?, ?)",
-                (code, name, grade, desc),
-            )
-            inserted += 1
-        except sqlite3.IntegrityError:
-            conn.execute(
-                "UPDATE badges SET name = ?, grade = ?, description = ? WHERE code = ?",
-                (name, grade, desc, code),
-            )
-            updated += 1
-
-    conn.commit()
-    conn.close()
+    if not file:
+        return "파일이 없습니다.", 400
 
-    print(f"[IMPORT_BADGES] inserted={inserted}, updated={updated}")
-    return redirect(url_for("mahjong.index_page"))
+    job_id = job_runner.submit("import_badges", upload=file)
+    return job_accepted_response(job_id, "뱃지 목록 CSV 업로드")
 
 
 # ================== 플레이어 뱃지 부여 CSV 내보내기/업로드 ==================
 
 @mahjong_bp.route("/export_player_badges", methods=["GET"])
 def export_player_badges():
-    conn = get_db()
-    cur = conn.execute("""
+    sql = """
         SELECT
           pb.player_name,
           pb.badge_code,
@@ -814,36 +3117,22 @@ def export_player_badges():
           b.description AS badge_description
         FROM player_badges pb
         LEFT JOIN badges b ON pb.badge_code = b.code
+        WHERE pb.id > ?
         ORDER BY pb.id ASC
-    """)
-    rows = cur.fetchall()
-    conn.close()
-
-    output = io.StringIO()
-    writer = csv.writer(output)
-    writer.writerow([
-        "player_name", "badge_code", "granted_at",
-        "badge_name", "badge_grade", "badge_description"
-    ])
-
-    for r in rows:
-        writer.writerow([
+    """
+    return csv_export_response(
+        sql, (),
+        ["player_name", "badge_code", "granted_at",
+         "badge_name", "badge_grade", "badge_description"],
+        lambda r: [
             r["player_name"],
             r["badge_code"],
             r["granted_at"],
             r["badge_name"] or "",
             r["badge_grade"] or "",
             r["badge_description"] or "",
-        ])
-
-    csv_data = output.getvalue()
-    output.close()
-    csv_bytes = csv_data.encode("cp949", errors="replace")
-
-    return Response(
-        csv_bytes,
-        mimetype="text/csv; charset=cp949",
-        headers={"Content-Disposition": "attachment; filename=player_badges.csv"},
+        ],
+        "player_badges.csv",
     )
 
 
@@ -856,7 +3145,8 @@ def import_player_badges():
         <head>
           <meta charset="UTF-8">
           <title>{CLUB_NAME} 플레이어 뱃지 부여 CSV 업로드</title>
-          <link rel="stylesheet" href="/static/style.css">
+          <link rel="stylesheet" href="{asset_url('style.css')}">
+          {font_links()}
         </head>
         <body>
           <div class="top-bar">
@@ -888,78 +3178,14 @@ def import_player_badges():
     if not file:
         return "파일이 없습니다.", 400
 
-    raw = file.read()
-    text = None
-    for enc in ("utf-8-sig", "utf-8", "cp949"):
-        try:
-            text = raw.decode(enc)
-            break
-        except UnicodeDecodeError:
-            continue
-    if text is None:
-        return "알 수 없는 인코딩입니다. UTF-8 또는 CP949로 저장해주세요.", 400
-
-    import io as _io
-    sample = "\n".join(text.splitlines()[:5])
-    try:
-        dialect = csv.Sniffer().sniff(sample, delimiters=",;")
-    except Exception:
-        dialect = csv.excel
-        dialect.delimiter = ","
-
-    reader = csv.DictReader(_io.StringIO(text), dialect=dialect)
-
-    def pick(row, keys, default=""):
-        for k in keys:
-            if k in row and row[k] not in (None, ""):
-                return row[k]
-        return default
-
-    conn = get_db()
-    inserted = 0
-    skipped = 0
-
-    for row in reader:
-        player_name = str(pick(row, ["player_name", "플레이어", "이름"], "")).strip()
-        try:
-            badge_code = int(float(pick(row, ["badge_code", "code", "뱃지코드", "뱃지 코드"], "0")))
-        except Exception:
-            badge_code = 0
-
-        granted_at = str(pick(row, ["granted_at", "부여시각", "시간"], "")).strip()
-        if not granted_at:
-            granted_at = datetime.now().isoformat(timespec="minutes")
-
-        if not player_name or not badge_code:
-            skipped += 1
-            continue
-
-        # 중복 방지(완전 동일 row면 skip)
-        cur = conn.execute("""
-            SELECT 1 FROM player_badges
-            WHERE player_name = ? AND badge_code = ? AND granted_at = ?
-            LIMIT 1
-        """, (player_name, badge_code, granted_at))
-        if cur.fetchone():
-            skipped += 1
-            continue
-
-        conn.execute("""
-            INSERT INTO player_badges (player_name, badge_code, granted_at)
-            VALUES (?, ?, ?)
-        """, (player_name, badge_code, granted_at))
-        inserted += 1
-
-    conn.commit()
-    conn.close()
-
-    print(f"[IMPORT_PLAYER_BADGES] inserted={inserted}, skipped={skipped}")
-    return redirect(url_for("mahjong.index_page"))
+    job_id = job_runner.submit("import_player_badges", upload=file)
+    return job_accepted_response(job_id, "플레이어 뱃지 부여 CSV 업로드")
 
 
 # ================== 아카이브 API ==================
 
 @mahjong_bp.route("/api/archives", methods=["GET"])
+@versioned_json("archives")
 def archives_api():
     conn = get_db()
     cur = conn.execute(
@@ -968,49 +3194,143 @@ def archives_api():
             a.id,
             a.name,
             a.created_at,
+            a.rule_set_id,
             COUNT(ag.id) AS game_count
         FROM archives a
         LEFT JOIN archive_games ag ON ag.archive_id = a.id
-        GROUP BY a.id, a.name, a.created_at
+        GROUP BY a.id, a.name, a.created_at, a.rule_set_id
         ORDER BY a.id DESC
         """
     )
     rows = [dict(r) for r in cur.fetchall()]
-    conn.close()
     return jsonify(rows)
 
 
 @mahjong_bp.route("/api/archives/<int:archive_id>/games", methods=["GET"])
+@versioned_json("archives")
 def archive_games_api(archive_id):
+    try:
+        opts = parse_game_list_args(request.args)
+    except ValueError:
+        return jsonify({"error": "invalid limit/cursor/from/to"}), 400
+
     conn = get_db()
-    cur = conn.execute(
-        """
-        SELECT
+    rows, next_cursor = query_game_page(
+        conn, "archive_games", opts,
+        columns=f"""
             id,
             created_at,
             player1_name, player2_name, player3_name, player4_name,
-            player1_score, player2_score, player3_score, player4_score
-        FROM archive_games
-        WHERE archive_id = ?
-        ORDER BY id ASC
+            player1_score, player2_score, player3_score, player4_score,
+            {", ".join(PT_COLUMNS)}
         """,
-        (archive_id,),
+        where="archive_id = ?",
+        params=(archive_id,),
+        ascending=True,
     )
-    rows = [dict(r) for r in cur.fetchall()]
-    conn.close()
-    return jsonify(rows)
+    return game_page_response(rows, next_cursor)
+
+
+def archive_stats_entry(name, s):
+    """통계 (archive_player_stats 행 또는 딕셔너리) -> 랭킹 형식 + 토비 / 최고 점수 / 양수 pt 합"""
+    entry = ranking_entry({"player_name": name, **{c: s[c] for c in archive_stats.STAT_COLUMNS}})
+    games = s["games"]
+    entry.update({
+        "tobi_count": s["tobi_count"],
+        "tobi_rate": round(s["tobi_count"] * 100 / games, 1) if games else 0,
+        "max_score": s["max_score"],
+        "pos_pt_sum": round(s["pos_pt_sum"], 1),
+    })
+    return entry
+
+
+@mahjong_bp.route("/api/archives/<int:archive_id>/stats", methods=["GET"])
+@versioned_json("archives")
+def archive_stats_api(archive_id):
+    """
+    아카이브 플레이어별 통계 (총 pt 내림차순). 저장된 통계만 읽음 —
+    통계는 아카이브 생성 / pt 재계산 작업이 만들고, 그 전이면 stats_pending 이 true
+    """
+    conn = get_db()
+    archive = conn.execute("SELECT id, name, created_at FROM archives WHERE id = ?", (archive_id,)).fetchone()
+    if archive is None:
+        return jsonify({"error": "archive not found"}), 404
+    pending = bool(archive_rule_keys(conn, [archive_id], stale_only=True))
+
+    rows = conn.execute("""
+        SELECT * FROM archive_player_stats
+        WHERE archive_id = ?
+        ORDER BY total_pt DESC, player_name ASC
+    """, (archive_id,)).fetchall()
+    return jsonify({
+        "archive": dict(archive),
+        "players": [archive_stats_entry(r["player_name"], r) for r in rows],
+        "stats_pending": pending,
+    })
+
+
+@mahjong_bp.route("/api/players/<player_name>/career", methods=["GET"])
+@versioned_json("games", "archives")
+def player_career_api(player_name):
+    """
+    플레이어 통산 기록: 아카이브(대회)별 통계 + 현재 개인전 + 둘을 합친 통산.
+    아카이브 통계는 작업이 저장해 둔 것만 읽음.
+    """
+    name = player_name.strip()
+    conn = get_db()
+
+    archives = []
+    stats = []
+    for r in conn.execute("""
+        SELECT a.id AS archive_id, a.name AS archive_name, a.created_at AS archive_created_at, s.*
+        FROM archive_player_stats s
+        JOIN archives a ON a.id = s.archive_id
+        WHERE s.player_name = ?
+        ORDER BY a.id ASC
+    """, (name,)):
+        entry = archive_stats_entry(name, r)
+        entry["archive"] = {"id": r["archive_id"], "name": r["archive_name"], "created_at": r["archive_created_at"]}
+        archives.append(entry)
+        stats.append(r)
+
+    current = archive_stats.aggregate_player_stats(conn.execute("""
+        SELECT player_name, score, pt, rank FROM game_participants
+        WHERE game_table = 'games' AND player_name = ?
+    """, (name,))).get(name)
+    if current is not None:
+        stats.append(current)
+
+    all_time = None
+    if stats:
+        all_time = archive_stats_entry(name, archive_stats.merge_stats(stats))
+        all_time["archive_count"] = len(archives)
+
+    return jsonify({
+        "name": name,
+        "current": archive_stats_entry(name, current) if current else None,
+        "archives": archives,
+        "all_time": all_time,
+    })
 
 
 @mahjong_bp.route("/api/archives/<int:archive_id>", methods=["DELETE"])
 def delete_archive(archive_id):
     conn = get_db()
+    conn.execute("""
+        DELETE FROM game_participants
+        WHERE game_table = 'archive_games'
+          AND game_id IN (SELECT id FROM archive_games WHERE archive_id = ?)
+    """, (archive_id,))
     conn.execute("DELETE FROM archive_games WHERE archive_id = ?", (archive_id,))
+    conn.execute("DELETE FROM archive_player_stats WHERE archive_id = ?", (archive_id,))
     cur = conn.execute("DELETE FROM archives WHERE id = ?", (archive_id,))
-    conn.commit()
-    deleted = cur.rowcount
-    conn.close()
-    if deleted == 0:
+    if cur.rowcount == 0:
+        conn.rollback()
         return jsonify({"error": "archive not found"}), 404
+    log_changes(conn, "archives", "delete", [archive_id])
+    bump_data_version(conn, "archives")
+    publish_event(conn, "reload", {"table": "archives", "reason": "delete"})
+    conn.commit()
     return jsonify({"ok": True})
 
 @mahjong_bp.route("/admin/archive_import", methods=["POST"])
@@ -1023,178 +3343,257 @@ def admin_archive_import():
     if not file:
         return "CSV 파일이 필요합니다.", 400
 
-    raw = file.read()
-    text = None
-    for enc in ("utf-8-sig", "utf-8", "cp949"):
-        try:
-            text = raw.decode(enc)
-            break
-        except UnicodeDecodeError:
-            continue
-    if text is None:
-        return "알 수 없는 인코딩입니다. UTF-8 또는 CP949로 저장해주세요.", 400
+    # 룰 세트: 지정이 없으면 지금 시즌 룰로 고정 (나중에 시즌 룰이 바뀌어도 이 아카이브 pt 는 그대로)
+    conn = get_db()
+    raw_rule_id = (request.form.get("rule_set_id") or "").strip()
+    if raw_rule_id:
+        row = conn.execute(
+            "SELECT id FROM rule_sets WHERE id = ?", (int(raw_rule_id) if raw_rule_id.isdigit() else 0,)
+        ).fetchone()
+        if row is None:
+            return "존재하지 않는 룰 세트입니다.", 400
+        rule_set_id = row["id"]
+    else:
+        rule_set_id = current_rule(conn)["id"]
+
+    # 아카이브 생성 시각은 업로드 시점 기준 (작업이 늦게 돌아도 같은 값)
+    created_at = datetime.now().isoformat(timespec="minutes")
+    job_id = job_runner.submit("archive_import", {
+        "archive_name": archive_name, "created_at": created_at, "rule_set_id": rule_set_id,
+    }, file)
+    return job_accepted_response(job_id, "아카이브 생성")
+
+# ================== 룰 세트 API ==================
+
+def rule_set_entry(rule, archive_count=0):
+    entry = dict(rule)
+    entry["key"] = rule_key(rule)
+    entry["archive_count"] = archive_count
+    return entry
+
+
+def parse_rule_set_body(data, base=None):
+    """요청 JSON -> 룰 세트 값. base 가 있으면 빠진 항목은 base 값 사용. 잘못된 값이면 ValueError"""
+    base = base or {"name": "", "uma": None, "oka": 0, "return_score": None, "start_score": START_SCORE}
+    name = str(data.get("name", base["name"]) or "").strip()
+    uma = data.get("uma", base["uma"])
+    if not name:
+        raise ValueError("name 이 필요합니다.")
+    if not isinstance(uma, list) or len(uma) != 4:
+        raise ValueError("uma 는 1등~4등 숫자 4개여야 합니다.")
+    uma = [float(u) for u in uma]
+    return {
+        "name": name,
+        "uma": [int(u) if u.is_integer() else u for u in uma],
+        "oka": float(data.get("oka", base["oka"]) or 0),
+        "return_score": int(data.get("return_score", base["return_score"])),
+        "start_score": int(data.get("start_score", base["start_score"])),
+    }
+
+
+def rule_set_in_use(conn, rule):
+    if rule["is_current"]:
+        return True
+    return conn.execute("SELECT 1 FROM archives WHERE rule_set_id = ? LIMIT 1", (rule["id"],)).fetchone() is not None
+
+
+def queue_pt_recompute():
+    """룰이 바뀐 뒤 저장 pt 를 한꺼번에 다시 계산하는 작업 등록 (commit 한 다음 호출)"""
+    return job_runner.submit("recompute_pts")
+
+
+@mahjong_bp.route("/api/rule_sets", methods=["GET"])
+@versioned_json("rule_sets", "archives")
+def list_rule_sets():
+    conn = get_db()
+    counts = {r[0]: r[1] for r in conn.execute(
+        "SELECT rule_set_id, COUNT(*) FROM archives GROUP BY rule_set_id"
+    )}
+    return jsonify([
+        rule_set_entry(rule_from_row(r), counts.get(r["id"], 0))
+        for r in conn.execute("SELECT * FROM rule_sets ORDER BY id ASC")
+    ])
 
-    # CSV 파싱
-    sample = "\n".join(text.splitlines()[:5])
-    try:
-        dialect = csv.Sniffer().sniff(sample, delimiters=",;")
-    except Exception:
-        dialect = csv.excel
-        dialect.delimiter = ","
 
-    reader = csv.DictReader(io.StringIO(text), dialect=dialect)
+@mahjong_bp.route("/api/rule_sets", methods=["POST"])
+def create_rule_set():
+    try:
+        values = parse_rule_set_body(request.get_json(silent=True) or {})
+    except (TypeError, ValueError) as e:
+        return jsonify({"error": str(e) or "invalid rule set"}), 400
 
-    def pick(row, keys, default=""):
-        for k in keys:
-            if k in row and row[k] not in (None, ""):
-                return row[k]
-        return default
+    conn = get_db()
+    now = datetime.now().isoformat(timespec="seconds")
+    cur = conn.execute("""
+        INSERT INTO rule_sets (name, uma, oka, return_score, start_score, created_at, updated_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    """, (values["name"], json.dumps(values["uma"]), values["oka"],
+          values["return_score"], values["start_score"], now, now))
+    bump_data_version(conn, "rule_sets")
+    conn.commit()
+    rule = rule_from_row(conn.execute("SELECT * FROM rule_sets WHERE id = ?", (cur.lastrowid,)).fetchone())
+    return jsonify(rule_set_entry(rule)), 201
 
-    def pick_int(row, keys, default=0):
-        val = pick(row, keys, None)
-        if val is None or val == "":
-            return default
-        try:
-            return int(float(val))
-        except (ValueError, TypeError):
-            return default
 
+@mahjong_bp.route("/api/rule_sets/<int:rule_set_id>", methods=["PUT"])
+def update_rule_set(rule_set_id):
+    """
+    룰 수정. 우마/오카/반환점이 바뀌고 그 룰을 쓰는 시즌/아카이브가 있으면
+    저장 pt 재계산 작업을 등록하고 job_id 를 돌려줍니다.
+    """
     conn = get_db()
-    created_at = datetime.now().isoformat(timespec="minutes")
+    row = conn.execute("SELECT * FROM rule_sets WHERE id = ?", (rule_set_id,)).fetchone()
+    if row is None:
+        return jsonify({"error": "rule set not found"}), 404
+    old = rule_from_row(row)
+    try:
+        values = parse_rule_set_body(request.get_json(silent=True) or {}, old)
+    except (TypeError, ValueError) as e:
+        return jsonify({"error": str(e) or "invalid rule set"}), 400
 
-    # archives 테이블에 먼저 등록
-    cur = conn.execute(
-        "INSERT INTO archives (name, created_at) VALUES (?, ?)",
-        (archive_name, created_at),
-    )
-    archive_id = cur.lastrowid
+    rules_changed = rule_key(values) != rule_key(old)
+    conn.execute("""
+        UPDATE rule_sets
+        SET name = ?, uma = ?, oka = ?, return_score = ?, start_score = ?,
+            version = version + ?, updated_at = ?
+        WHERE id = ?
+    """, (values["name"], json.dumps(values["uma"]), values["oka"], values["return_score"],
+          values["start_score"], 1 if rules_changed else 0,
+          datetime.now().isoformat(timespec="seconds"), rule_set_id))
+    bump_data_version(conn, "rule_sets")
+    conn.commit()
 
-    inserted = 0
-    for row in reader:
-        # 시간
-        game_time = pick(row, ["created_at", "시간"])
-        if not game_time:
-            game_time = created_at
-
-        # 이름
-        p1_name = pick(row, ["player1_name", "P1 이름", "P1이름"])
-        p2_name = pick(row, ["player2_name", "P2 이름", "P2이름"])
-        p3_name = pick(row, ["player3_name", "P3 이름", "P3이름"])
-        p4_name = pick(row, ["player4_name", "P4 이름", "P4이름"])
-
-        # 점수
-        s1 = pick_int(row, ["player1_score", "P1 점수", "P1점수"])
-        s2 = pick_int(row, ["player2_score", "P2 점수", "P2점수"])
-        s3 = pick_int(row, ["player3_score", "P3 점수", "P3점수"])
-        s4 = pick_int(row, ["player4_score", "P4 점수", "P4점수"])
+    job_id = queue_pt_recompute() if rules_changed and rule_set_in_use(conn, old) else None
+    rule = rule_from_row(conn.execute("SELECT * FROM rule_sets WHERE id = ?", (rule_set_id,)).fetchone())
+    return jsonify({"rule_set": rule_set_entry(rule), "job_id": job_id})
 
-        # 네 명 이름이 다 비어 있으면 스킵
-        if not (p1_name or p2_name or p3_name or p4_name):
-            continue
 
-        conn.execute(
-            """
-            INSERT INTO archive_games (
-                archive_id,
-                created_at,
-                player1_name, player2_name, player3_name, player4_name,
-                player1_score, player2_score, player3_score, player4_score
-            )
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """,
-            (
-                archive_id,
-                game_time,
-                p1_name, p2_name, p3_name, p4_name,
-                s1, s2, s3, s4,
-            ),
-        )
-        inserted += 1
+@mahjong_bp.route("/api/rule_sets/<int:rule_set_id>/activate", methods=["POST"])
+def activate_rule_set(rule_set_id):
+    """현재 시즌(개인전 / 대회전) 룰로 지정. 룰이 달라지면 재계산 작업 등록"""
+    conn = get_db()
+    row = conn.execute("SELECT * FROM rule_sets WHERE id = ?", (rule_set_id,)).fetchone()
+    if row is None:
+        return jsonify({"error": "rule set not found"}), 404
+    old = current_rule(conn)
+    conn.execute("UPDATE rule_sets SET is_current = (id = ?)", (rule_set_id,))
+    bump_data_version(conn, "rule_sets")
+    conn.commit()
 
-    if inserted == 0:
-        # 유효 데이터가 하나도 없으면 아카이브도 되돌리기
-        conn.execute("DELETE FROM archive_games WHERE archive_id = ?", (archive_id,))
-        conn.execute("DELETE FROM archives WHERE id = ?", (archive_id,))
-        conn.commit()
-        conn.close()
-        return "CSV에서 읽을 수 있는 대국 기록이 없습니다.", 400
+    job_id = queue_pt_recompute() if rule_key(rule_from_row(row)) != rule_key(old) else None
+    return jsonify({"ok": True, "job_id": job_id})
+
+
+@mahjong_bp.route("/api/archives/<int:archive_id>/rule_set", methods=["PUT"])
+def set_archive_rule_set(archive_id):
+    """아카이브에 룰 세트 지정. body: {"rule_set_id": 2}"""
+    data = request.get_json(silent=True) or {}
+    conn = get_db()
+    archive = conn.execute("SELECT rule_set_id FROM archives WHERE id = ?", (archive_id,)).fetchone()
+    if archive is None:
+        return jsonify({"error": "archive not found"}), 404
+    row = conn.execute("SELECT * FROM rule_sets WHERE id = ?", (data.get("rule_set_id"),)).fetchone()
+    if row is None:
+        return jsonify({"error": "rule set not found"}), 400
 
+    old_keys = archive_rule_keys(conn, [archive_id])
+    conn.execute("UPDATE archives SET rule_set_id = ? WHERE id = ?", (row["id"], archive_id))
+    bump_data_version(conn, "archives")
     conn.commit()
-    conn.close()
 
-    # 다시 메인 화면으로
-    return redirect(url_for("mahjong.index_page"))
+    job_id = queue_pt_recompute() if rule_key(rule_from_row(row)) != old_keys.get(archive_id) else None
+    return jsonify({"ok": True, "job_id": job_id})
 
-# ---- 대회전 CSV 내보내기 ----
 
-@mahjong_bp.route("/export_tournament", methods=["GET"])
-def export_tournament_games():
+# ================== 시즌 점수 ==================
+
+# (시즌 구간, archives 데이터 버전, 해당 아카이브 id 목록) -> 대회 참가/양수 pt 합.
+# 아카이브 추가 / 삭제 / 룰 변경에 따른 pt 재계산이 모두 archives 버전을 올리므로
+# 다른 워커에서 바뀌어도 새 키로 다시 계산됨.
+SEASON_CACHE = {}
+SEASON_CACHE_LOCK = threading.Lock()
+SEASON_CACHE_MAX = 32
+
+
+def parse_season_args(args):
+    """?year=2025|25&from=1&to=6 (기본값은 season_scores 의 현재 시즌). 잘못된 값이면 ValueError"""
+    year = int(args.get("year") or season_scores.SEASON_YEAR2)
+    month_from = int(args.get("from") or season_scores.SEASON_FROM)
+    month_to = int(args.get("to") or season_scores.SEASON_TO)
+    if year < 0 or not (1 <= month_from <= month_to <= 12):
+        raise ValueError("season")
+    return year % 100, month_from, month_to
+
+
+def season_tournament_stats(conn, year2, month_from, month_to):
+    """시즌 대회 아카이브 목록과 플레이어별 대회 통계 (아카이브 구성이 같으면 캐시 사용)"""
+    archives = [
+        {"id": r["id"], "name": r["name"]}
+        for r in conn.execute("SELECT id, name FROM archives ORDER BY id ASC")
+        if season_scores.archive_in_season(r["name"], year2, month_from, month_to)
+    ]
+    version = read_data_versions(conn, ("archives",))
+    key = (year2, month_from, month_to, version, tuple(a["id"] for a in archives))
+
+    with SEASON_CACHE_LOCK:
+        cached = SEASON_CACHE.get(key)
+    if cached is not None:
+        return archives, cached
+
+    ids = key[-1]
+    rows = []
+    if ids:
+        # 대회(아카이브)별 · 플레이어별 양수 pt 합을 한 번에 집계
+        rows = conn.execute(f"""
+            SELECT ag.archive_id, gp.player_name, SUM(MAX(gp.pt, 0))
+            FROM game_participants gp
+            JOIN archive_games ag ON ag.id = gp.game_id
+            WHERE gp.game_table = 'archive_games'
+              AND ag.archive_id IN ({",".join("?" * len(ids))})
+            GROUP BY ag.archive_id, gp.player_name
+        """, ids).fetchall()
+    stats = season_scores.tournament_stats(rows)
+
+    with SEASON_CACHE_LOCK:
+        if len(SEASON_CACHE) >= SEASON_CACHE_MAX:
+            SEASON_CACHE.clear()
+        SEASON_CACHE[key] = stats
+    return archives, stats
+
+
+@mahjong_bp.route("/api/season_scores", methods=["GET"])
+@versioned_json("games", "archives")
+def season_scores_api():
+    """
+    시즌 점수 랭킹 (개인전 누적 + 시즌 월례 대회 아카이브).
+    ?year=25&from=1&to=6 로 시즌 구간 지정.
+    """
+    try:
+        year2, month_from, month_to = parse_season_args(request.args)
+    except (TypeError, ValueError):
+        return jsonify({"error": "invalid year/from/to"}), 400
+
     conn = get_db()
-    cur = conn.execute("""
-        SELECT
-            id, created_at,
-            player1_name, player2_name, player3_name, player4_name,
-            player1_score, player2_score, player3_score, player4_score
-        FROM tournament_games
-        ORDER BY id ASC
-    """)
-    rows = cur.fetchall()
-    conn.close()
-
-    def calc_pts(scores):
-        order = sorted(range(4), key=lambda i: scores[i], reverse=True)
-
-        uma_for_player = [0, 0, 0, 0]
-        for rank, idx in enumerate(order):
-            uma_for_player[idx] = UMA_VALUES[rank]
-
-        pts = []
-        for i in range(4):
-            base = (scores[i] - RETURN_SCORE) / 1000.0
-            pts.append(base + uma_for_player[i])
-        return pts
-
-    output = io.StringIO()
-    writer = csv.writer(output)
-
-    writer.writerow([
-        "ID", "시간",
-        "P1 이름", "P1 점수", "P1 pt",
-        "P2 이름", "P2 점수", "P2 pt",
-        "P3 이름", "P3 점수", "P3 pt",
-        "P4 이름", "P4 점수", "P4 pt",
-    ])
+    archives, t_stats = season_tournament_stats(conn, year2, month_from, month_to)
+    players = [
+        {"name": r["player_name"], "games": r["games"], "total_pt": r["total_pt"]}
+        for r in conn.execute("SELECT player_name, games, total_pt FROM player_stats")
+    ]
+    summary = season_scores.build_season_summary(players, t_stats)
+    return jsonify({
+        "year": year2,
+        "from": month_from,
+        "to": month_to,
+        "archives": archives,
+        "players": summary,
+    })
 
-    for row in rows:
-        scores = [
-            row["player1_score"],
-            row["player2_score"],
-            row["player3_score"],
-            row["player4_score"],
-        ]
-        pts = calc_pts(scores)
-
-        writer.writerow([
-            row["id"],
-            row["created_at"],
-            row["player1_name"], scores[0], f"{pts[0]:.1f}",
-            row["player2_name"], scores[1], f"{pts[1]:.1f}",
-            row["player3_name"], scores[2], f"{pts[2]:.1f}",
-            row["player4_name"], scores[3], f"{pts[3]:.1f}",
-        ])
-
-    csv_data = output.getvalue()
-    output.close()
-
-    csv_bytes = csv_data.encode("cp949", errors="replace")
 
-    return Response(
-        csv_bytes,
-        mimetype="text/csv; charset=cp949",
-        headers={
-            "Content-Disposition": "attachment; filename=madang_mahjong_tournament.csv"
-        },
-    )
+# ---- 대회전 CSV 내보내기 ----
+
+@mahjong_bp.route("/export_tournament", methods=["GET"])
+def export_tournament_games():
+    return export_game_csv("tournament_games", "madang_mahjong_tournament.csv")
 
 
 # ---- 대회전 CSV 업로드 ----
@@ -1208,7 +3607,8 @@ def import_tournament_games():
         <head>
           <meta charset="UTF-8">
           <title>{CLUB_NAME} 대회전 CSV 업로드</title>
-          <link rel="stylesheet" href="/static/style.css">
+          <link rel="stylesheet" href="{asset_url('style.css')}">
+          {font_links()}
         </head>
         <body>
           <div class="top-bar">
@@ -1240,130 +3640,414 @@ def import_tournament_games():
     if not file:
         return "파일이 없습니다.", 400
 
-    raw = file.read()
-    text = None
-    for enc in ("utf-8-sig", "utf-8", "cp949"):
-        try:
-            text = raw.decode(enc)
-            break
-        except UnicodeDecodeError:
-            continue
+    job_id = job_runner.submit("import_tournament", upload=file)
+    return job_accepted_response(job_id, "대회전 CSV 업로드")
+
+# ================== 개인전 기록 초기화(시즌 리셋) ==================
+
+@mahjong_bp.route("/api/admin/reset_games", methods=["POST"])
+def reset_games():
+    """
+    모든 개인전 대국 기록을 삭제하고 ID도 다시 1부터 시작하도록 초기화합니다.
+    (badges / player_badges / archive 등은 건드리지 않음)
+    """
+    conn = get_db()
 
-    if text is None:
-        return "알 수 없는 인코딩입니다. UTF-8 또는 CP949로 저장해주세요.", 400
+    # games 테이블 전체 삭제 (+ 랭킹 집계)
+    conn.execute("DELETE FROM games")
+    conn.execute("DELETE FROM player_stats")
+    conn.execute("DELETE FROM game_participants WHERE game_table = 'games'")
 
-    import io as _io
-    sample = "\n".join(text.splitlines()[:5])
+    # SQLite AUTOINCREMENT 리셋 (선택사항이지만, 시즌별로 ID 깔끔하게 보이게 하려고)
     try:
-        dialect = csv.Sniffer().sniff(sample, delimiters=",;")
+        conn.execute("DELETE FROM sqlite_sequence WHERE name = 'games'")
     except Exception:
-        dialect = csv.excel
-        dialect.delimiter = ","
+        # sqlite_sequence가 없는 경우도 있으니 무시
+        pass
 
-    reader = csv.DictReader(_io.StringIO(text), dialect=dialect)
+    # 남은 기록으로 일별 스냅샷 다시 쌓기
+    refresh_daily_snapshots(conn)
+    log_table_reset(conn, "games")
+    bump_data_version(conn, "games")
+    publish_event(conn, "reload", {"table": "games", "reason": "reset"})
 
-    def pick(row, keys, default=""):
-        for k in keys:
-            if k in row and row[k] not in (None, ""):
-                return row[k]
-        return default
+    conn.commit()
 
-    def pick_int(row, keys, default=0):
-        val = pick(row, keys, None)
-        if val is None or val == "":
-            return default
-        try:
-            return int(float(val))
-        except (ValueError, TypeError):
-            return default
+    return jsonify({"ok": True})
 
+@mahjong_bp.route("/api/admin/reset_tournament", methods=["POST"])
+def reset_tournament():
+    """
+    모든 대회 대국 기록을 삭제하고 ID도 다시 1부터 시작하도록 초기화합니다.
+    (badges / player_badges / archive 등은 건드리지 않음)
+    """
     conn = get_db()
-    inserted = 0
 
-    for row in reader:
-        created_at = pick(row, ["created_at", "시간"])
-        if not created_at:
-            created_at = datetime.now().isoformat(timespec="minutes")
+    # tournament_games 테이블 전체 삭제
+    conn.execute("DELETE FROM tournament_games")
+    conn.execute("DELETE FROM game_participants WHERE game_table = 'tournament_games'")
 
-        p1_name = pick(row, ["player1_name", "P1 이름", "P1이름"])
-        p2_name = pick(row, ["player2_name", "P2 이름", "P2이름"])
-        p3_name = pick(row, ["player3_name", "P3 이름", "P3이름"])
-        p4_name = pick(row, ["player4_name", "P4 이름", "P4이름"])
+    # SQLite AUTOINCREMENT 리셋
+    try:
+        conn.execute("DELETE FROM sqlite_sequence WHERE name = 'tournament_games'")
+    except Exception:
+        pass
 
-        s1 = pick_int(row, ["player1_score", "P1 점수", "P1점수"])
-        s2 = pick_int(row, ["player2_score", "P2 점수", "P2점수"])
-        s3 = pick_int(row, ["player3_score", "P3 점수", "P3점수"])
-        s4 = pick_int(row, ["player4_score", "P4 점수", "P4점수"])
+    # 남은 기록으로 일별 스냅샷 다시 쌓기
+    refresh_daily_snapshots(conn)
+    log_table_reset(conn, "tournament_games")
+    bump_data_version(conn, "tournament_games")
+    publish_event(conn, "reload", {"table": "tournament_games", "reason": "reset"})
 
-        if not (p1_name or p2_name or p3_name or p4_name):
-            continue
+    conn.commit()
 
-        conn.execute("""
-            INSERT INTO tournament_games (
-                created_at,
-                player1_name, player2_name, player3_name, player4_name,
-                player1_score, player2_score, player3_score, player4_score
-            )
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, (created_at,
-              p1_name, p2_name, p3_name, p4_name,
-              s1, s2, s3, s4))
-        inserted += 1
+    return jsonify({"ok": True})
 
-    conn.commit()
-    conn.close()
 
-    print(f"[IMPORT_TOURNAMENT] inserted rows: {inserted}")
-    return redirect(url_for("mahjong.index_page"))
+@mahjong_bp.route("/api/admin/db_pool", methods=["GET"])
+def db_pool_stats():
+    """현재 워커의 SQLite 커넥션 풀 / 응답 캐시 / 실시간 푸시 상태"""
+    return jsonify({
+        "games": db_pool.stats(),
+        "schedules": schedule_db_pool.stats(),
+        "response_cache": response_cache.stats(),
+        "live_events": live_hub.stats(),
+        "jobs": jobs_db_pool.stats(),
+        "job_runner": job_runner.stats(),
+    })
 
-# ================== 개인전 기록 초기화(시즌 리셋) ==================
 
-@mahjong_bp.route("/api/admin/reset_games", methods=["POST"])
-def reset_games():
+@mahjong_bp.route("/api/admin/metrics", methods=["GET"])
+def metrics_api():
     """
-    모든 개인전 대국 기록을 삭제하고 ID도 다시 1부터 시작하도록 초기화합니다.
-    (badges / player_badges / archive 등은 건드리지 않음)
+    현재 워커의 요청 처리 시간 / 쿼리 수·시간 히스토그램과 느린 쿼리(실행 계획 포함).
+    ?format=prometheus 면 Prometheus 텍스트 형식 (워커마다 따로 수집됨)
     """
-    conn = get_db()
+    if request.args.get("format") == "prometheus":
+        return Response(app_metrics.prometheus(), content_type="text/plain; version=0.0.4; charset=utf-8")
+    return jsonify(app_metrics.snapshot())
+
+
+# ================== 백그라운드 작업 API ==================
+
+JOB_LIST_MAX = 100
+
+
+@mahjong_bp.route("/api/jobs/<int:job_id>", methods=["GET"])
+def job_status_api(job_id):
+    """업로드 / 재계산 작업 진행 상황 (status: queued / running / done / failed)"""
+    job_runner.ensure_started()
+    row = job_runner.get(job_id)
+    if row is None:
+        return jsonify({"error": "job not found"}), 404
+    return jsonify(job_entry(row))
+
+
+@mahjong_bp.route("/api/jobs", methods=["GET"])
+def list_jobs_api():
     try:
-        # games 테이블 전체 삭제
-        conn.execute("DELETE FROM games")
+        limit = min(max(int(request.args.get("limit", 20)), 1), JOB_LIST_MAX)
+    except ValueError:
+        return jsonify({"error": "invalid limit"}), 400
+    job_runner.ensure_started()
+    return jsonify([job_entry(r) for r in job_runner.recent(limit)])
+
+
+@mahjong_bp.route("/api/admin/jobs", methods=["POST"])
+def create_maintenance_job():
+    """pt 재계산 / 스냅샷 재생성 같은 무거운 작업을 큐에 넣기. body: {"kind": "recompute_pts"}"""
+    data = request.get_json(silent=True) or {}
+    kind = data.get("kind")
+    if kind not in MAINTENANCE_JOB_KINDS:
+        return jsonify({"error": f"kind must be one of {', '.join(MAINTENANCE_JOB_KINDS)}"}), 400
+    job_id = job_runner.submit(kind)
+    return jsonify({"job_id": job_id, "status": "queued",
+                    "status_url": url_for("mahjong.job_status_api", job_id=job_id)}), 202
+
+
+# ================== 델타 동기화 API ==================
+
+CHANGES_PAGE_MAX = 5000
+CHANGE_FETCH_CHUNK = 500   # put 행을 IN (...) 으로 읽을 때 한 번에 묶는 id 수
+
+# put 행을 목록 API 와 같은 형식으로 읽는 쿼리 ({ids} 자리에 IN 목록)
+CHANGE_ROW_QUERIES = {
+    "games": "SELECT * FROM games WHERE id IN ({ids})",
+    "tournament_games": "SELECT * FROM tournament_games WHERE id IN ({ids})",
+    "badges": "SELECT id, code, name, grade, description FROM badges WHERE id IN ({ids})",
+    "player_badges": """
+        SELECT
+            pb.id, pb.player_name, pb.badge_code, pb.granted_at,
+            b.name AS badge_name, b.grade AS badge_grade, b.description AS badge_description
+        FROM player_badges pb
+        LEFT JOIN badges b ON pb.badge_code = b.code
+        WHERE pb.id IN ({ids})
+    """,
+    "archives": """
+        SELECT a.id, a.name, a.created_at, COUNT(ag.id) AS game_count
+        FROM archives a
+        LEFT JOIN archive_games ag ON ag.archive_id = a.id
+        WHERE a.id IN ({ids})
+        GROUP BY a.id, a.name, a.created_at
+    """,
+}
 
-        # SQLite AUTOINCREMENT 리셋 (선택사항이지만, 시즌별로 ID 깔끔하게 보이게 하려고)
-        try:
-            conn.execute("DELETE FROM sqlite_sequence WHERE name = 'games'")
-        except Exception:
-            # sqlite_sequence가 없는 경우도 있으니 무시
-            pass
 
-        conn.commit()
-    finally:
-        conn.close()
+def fetch_change_rows(conn, table, ids):
+    rows = {}
+    for i in range(0, len(ids), CHANGE_FETCH_CHUNK):
+        chunk = ids[i:i + CHANGE_FETCH_CHUNK]
+        sql = CHANGE_ROW_QUERIES[table].format(ids=",".join("?" * len(chunk)))
+        for r in conn.execute(sql, chunk):
+            rows[r["id"]] = player_badge_entry(r) if table == "player_badges" else dict(r)
+    return rows
 
-    return jsonify({"ok": True})
 
-@mahjong_bp.route("/api/admin/reset_tournament", methods=["POST"])
-def reset_tournament():
+@mahjong_bp.route("/api/changes", methods=["GET"])
+def changes_api():
     """
-    모든 대회 대국 기록을 삭제하고 ID도 다시 1부터 시작하도록 초기화합니다.
-    (badges / player_badges / archive 등은 건드리지 않음)
+    since 이후 변경분 (델타 동기화).
+      ?since=<seq>    지난 응답의 seq (처음이면 0)
+      ?tables=games,badges  (기본: 전체)
+      ?limit=1000     (최대 5000, 0 이면 현재 seq 만)
+    응답: {"seq": 다음 since 값, "has_more": bool,
+           "changes": [{"seq", "table", "op": put|delete|reset, "id", "row"(put 만)}]}
     """
+    try:
+        since = int(request.args.get("since", 0))
+        limit = min(int(request.args.get("limit", 1000)), CHANGES_PAGE_MAX)
+        if since < 0 or limit < 0:
+            raise ValueError
+    except (TypeError, ValueError):
+        return jsonify({"error": "invalid since/limit"}), 400
+    tables = [t for t in (request.args.get("tables") or "").split(",") if t] or list(CHANGE_TABLES)
+    if any(t not in CHANGE_TABLES for t in tables):
+        return jsonify({"error": "unknown table"}), 400
+
     conn = get_db()
+    # 로그와 행을 같은 스냅샷에서 읽기
+    conn.execute("BEGIN")
     try:
-        # tournament_games 테이블 전체 삭제
-        conn.execute("DELETE FROM tournament_games")
+        if limit == 0:
+            seq = conn.execute("SELECT COALESCE(MAX(seq), 0) FROM change_log").fetchone()[0]
+            return jsonify({"seq": max(seq, since), "has_more": False, "changes": []})
+
+        entries = conn.execute(f"""
+            SELECT seq, table_name, row_id, op FROM change_log
+            WHERE seq > ? AND table_name IN ({",".join("?" * len(tables))})
+            ORDER BY seq ASC
+            LIMIT ?
+        """, (since, *tables, limit + 1)).fetchall()
+        has_more = len(entries) > limit
+        entries = entries[:limit]
+
+        put_ids = {}
+        for e in entries:
+            if e["op"] == "put":
+                put_ids.setdefault(e["table_name"], []).append(e["row_id"])
+        rows = {t: fetch_change_rows(conn, t, ids) for t, ids in put_ids.items()}
+
+        if entries:
+            seq = entries[-1]["seq"]
+        else:
+            seq = conn.execute("SELECT COALESCE(MAX(seq), 0) FROM change_log").fetchone()[0]
+    finally:
+        conn.rollback()
+
+    changes = []
+    for e in entries:
+        change = {"seq": e["seq"], "table": e["table_name"], "op": e["op"], "id": e["row_id"]}
+        if e["op"] == "put":
+            row = rows[e["table_name"]].get(e["row_id"])
+            if row is None:
+                continue
+            change["row"] = row
+        changes.append(change)
+    return jsonify({"seq": max(seq, since), "has_more": has_more, "changes": changes})
+
+
+# ================== 실시간 푸시 (SSE) ==================
+
+LIVE_POLL_INTERVAL = 0.5   # 워커별 알림 스레드가 live_events 를 확인하는 간격(초)
+LIVE_HEARTBEAT = 15        # 이벤트가 없을 때 연결 유지용 주석을 보내는 간격(초)
+LIVE_EVENTS_KEEP = 1000    # 재접속(Last-Event-ID) 이어받기용으로 남겨둘 최근 이벤트 수
+LIVE_QUEUE_MAX = 256       # 구독자별 대기 이벤트 한도 (넘치면 끊고 재접속으로 따라잡게 함)
+# 워커당 동시 SSE 연결 한도 (스레드 워커에서 일반 요청용 스레드를 남겨 두기 위함, 넘으면 503 → 폴링)
+LIVE_STREAM_MAX = int(os.environ.get("MAHJONG_LIVE_STREAM_MAX", "32"))
+
+
+def publish_event(conn, kind, payload):
+    """
+    변경 내용을 live_events 에 기록. 쓰기와 같은 트랜잭션이라 commit 된 변경만 전달됩니다.
+    (commit 은 호출한 쪽에서)
+    """
+    cur = conn.execute(
+        "INSERT INTO live_events (created_at, kind, payload) VALUES (?, ?, ?)",
+        (datetime.now().isoformat(timespec="seconds"), kind, json.dumps(payload, ensure_ascii=False)),
+    )
+    conn.execute("DELETE FROM live_events WHERE id <= ?", (cur.lastrowid - LIVE_EVENTS_KEEP,))
+
+
+def publish_game_added(conn, table, game_id):
+    """새 대국 한 판 (+ 개인전이면 바뀐 랭킹 행) 이벤트"""
+    game = dict(conn.execute(f"SELECT * FROM {table} WHERE id = ?", (game_id,)).fetchone())
+    payload = {"table": table, "game": game}
+    if table == "games":
+        payload["rankings"] = ranking_entries_for(conn, row_names(game))
+    publish_event(conn, "game_added", payload)
+
+
+class LiveEventHub:
+    """
+    워커(프로세스)마다 하나. 구독자가 있을 때만 알림 스레드 하나가 live_events 의 새 행을 읽어
+    각 구독자 큐로 나눠줍니다. 다른 gunicorn 워커가 기록한 이벤트도 같은 SQLite 파일로 전달됨.
+    """
 
-        # SQLite AUTOINCREMENT 리셋
+    def __init__(self, pool):
+        self.pool = pool
+        self._lock = threading.Lock()
+        self._subscribers = set()
+        self._thread = None
+        self._pid = os.getpid()
+        self._last_id = 0
+
+    def fetch_after(self, after_id):
+        """after_id 이후 이벤트 행들 (asgi.py 의 비동기 허브도 사용)"""
+        conn = self.pool.acquire()
         try:
-            conn.execute("DELETE FROM sqlite_sequence WHERE name = 'tournament_games'")
-        except Exception:
-            pass
+            return conn.execute(
+                "SELECT id, kind, payload FROM live_events WHERE id > ? ORDER BY id ASC",
+                (after_id,),
+            ).fetchall()
+        finally:
+            self.pool.release(conn)
+
+    def max_id(self):
+        conn = self.pool.acquire()
+        try:
+            return conn.execute("SELECT COALESCE(MAX(id), 0) FROM live_events").fetchone()[0]
+        finally:
+            self.pool.release(conn)
 
-        conn.commit()
-    finally:
-        conn.close()
+    def subscribe(self, last_event_id=None, limit=None):
+        """
+        (큐, 밀린 이벤트 목록) 반환. last_event_id 가 있으면 그 이후 이벤트를 먼저 돌려줌.
+        큐와 밀린 목록에 같은 이벤트가 겹칠 수 있으니 받는 쪽에서 id 로 걸러야 합니다.
+        구독자가 이미 limit 명이면 추가하지 않고 None (확인과 추가를 같은 잠금 안에서).
+        """
+        q = queue.Queue(LIVE_QUEUE_MAX)
+        with self._lock:
+            if self._pid != os.getpid():
+                # fork 된 워커: 부모의 구독자/스레드 정보는 버림
+                self._subscribers = set()
+                self._thread = None
+                self._pid = os.getpid()
+            if limit is not None and len(self._subscribers) >= limit:
+                return None
+            self._subscribers.add(q)
+            if self._thread is None:
+                self._last_id = self.max_id()
+                self._thread = threading.Thread(target=self._run, name="live-events", daemon=True)
+                self._thread.start()
+        backlog = self.fetch_after(last_event_id) if last_event_id is not None else []
+        return q, backlog
+
+    def unsubscribe(self, q):
+        with self._lock:
+            self._subscribers.discard(q)
+
+    def _run(self):
+        while True:
+            time.sleep(LIVE_POLL_INTERVAL)
+            with self._lock:
+                if not self._subscribers:
+                    self._thread = None
+                    return
+            try:
+                events = self.fetch_after(self._last_id)
+            except sqlite3.Error as e:
+                print(f"[LIVE] poll failed: {e}")
+                continue
+            if not events:
+                continue
+            self._last_id = events[-1]["id"]
+            with self._lock:
+                subscribers = list(self._subscribers)
+            for q in subscribers:
+                for ev in events:
+                    try:
+                        q.put_nowait(ev)
+                    except queue.Full:
+                        # 너무 밀린 구독자: 비우고 종료 신호 → 클라이언트가 Last-Event-ID 로 재접속
+                        with q.mutex:
+                            q.queue.clear()
+                        q.put_nowait(None)
+                        self.unsubscribe(q)
+                        break
+
+    def stats(self):
+        with self._lock:
+            return {"subscribers": len(self._subscribers), "running": self._thread is not None,
+                    "last_id": self._last_id, "pid": os.getpid()}
+
+
+live_hub = LiveEventHub(db_pool)
+
+
+def format_sse(event):
+    return f"id: {event['id']}\nevent: {event['kind']}\ndata: {event['payload']}\n\n"
+
+
+@mahjong_bp.route("/api/stream", methods=["GET"])
+def live_stream():
+    """
+    실시간 변경 알림 (Server-Sent Events).
+      event: game_added / game_deleted / badge_granted / badge_revoked / badge_deleted / reload
+    재접속 시 브라우저가 보내는 Last-Event-ID (또는 ?last_event_id=) 이후 이벤트부터 이어서 보냅니다.
+    연결 하나가 스레드 하나를 쓰므로 LIVE_STREAM 이 꺼져 있거나(sync 워커) 연결이 LIVE_STREAM_MAX 개면
+    503 을 돌려주고, 페이지는 /api/changes 폴링으로 대신합니다.
+    """
+    if not app.config["LIVE_STREAM"]:
+        return jsonify({"error": "live stream disabled"}), 503
 
-    return jsonify({"ok": True})
+    raw_last_id = request.headers.get("Last-Event-ID") or request.args.get("last_event_id")
+    try:
+        last_id = int(raw_last_id) if raw_last_id else None
+    except ValueError:
+        return jsonify({"error": "invalid Last-Event-ID"}), 400
+
+    subscription = live_hub.subscribe(last_id, limit=LIVE_STREAM_MAX)
+    if subscription is None:
+        return jsonify({"error": "too many live connections"}), 503
+    q, backlog = subscription
+
+    def generate():
+        sent = last_id or 0
+        try:
+            yield "retry: 3000\n\n"
+            for ev in backlog:
+                sent = ev["id"]
+                yield format_sse(ev)
+            while True:
+                try:
+                    ev = q.get(timeout=LIVE_HEARTBEAT)
+                except queue.Empty:
+                    yield ": keepalive\n\n"
+                    continue
+                if ev is None:
+                    return
+                if ev["id"] <= sent:
+                    continue
+                sent = ev["id"]
+                yield format_sse(ev)
+        finally:
+            live_hub.unsubscribe(q)
+
+    return Response(
+        generate(),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 # ================== 기본 페이지 ==================
@@ -1388,19 +4072,50 @@ def schedule_admin_page():
     return render_template("schedule_admin.html", club_name=CLUB_NAME)
 
 @schedule_bp.route("/api/events", methods=["GET"])
+@versioned_json("schedules", schedule=True)
 def get_schedule_events():
+    """
+    확정된 일정.
+      ?start=YYYY-MM-DD&end=YYYY-MM-DD  달력에 보이는 구간만 (start 포함, end 미포함 — FullCalendar 와 같음)
+    ISO 날짜시간(2025-03-01T00:00:00+09:00)도 앞 10자리 날짜로 받음. 둘 다 없으면 전체.
+    """
+    try:
+        start = parse_schedule_date(request.args.get("start"))
+        end = parse_schedule_date(request.args.get("end"))
+    except ValueError:
+        return jsonify({"error": "invalid start/end"}), 400
+
+    sql = "SELECT * FROM schedules WHERE status = 'confirmed'"
+    params = []
+    # (status, date, time_start) 인덱스로 구간 검색 + 정렬 없이 읽음
+    if start:
+        sql += " AND date >= ?"
+        params.append(start)
+    if end:
+        sql += " AND date < ?"
+        params.append(end)
+    sql += " ORDER BY date ASC, time_start ASC"
+
     conn = get_schedule_db()
-    cur = conn.execute("SELECT * FROM schedules WHERE status = 'confirmed' ORDER BY date ASC, time_start ASC")
-    rows = cur.fetchall()
-    conn.close()
+    rows = conn.execute(sql, params).fetchall()
     return jsonify([dict(row) for row in rows])
 
+
+def parse_schedule_date(value):
+    """'2025-03-01' 또는 '2025-03-01T00:00:00+09:00' -> '2025-03-01'. 비어 있으면 None, 잘못되면 ValueError"""
+    value = (value or "").strip()
+    if not value:
+        return None
+    value = value[:10]
+    datetime.strptime(value, "%Y-%m-%d")
+    return value
+
 @schedule_bp.route("/api/pending", methods=["GET"])
+@versioned_json("schedules", schedule=True)
 def get_pending_schedules():
     conn = get_schedule_db()
     cur = conn.execute("SELECT * FROM schedules WHERE status = 'pending' ORDER BY created_at DESC")
     rows = cur.fetchall()
-    conn.close()
     return jsonify([dict(row) for row in rows])
 
 @schedule_bp.route("/api/request", methods=["POST"])
@@ -1425,8 +4140,8 @@ def request_schedule():
         "VALUES (?, ?, ?, ?, ?, ?, ?, 'pending', ?)",
         (title, date, time_start, time_end, location, description, requester, created_at)
     )
+    bump_data_version(conn, "schedules")
     conn.commit()
-    conn.close()
 
     return jsonify({"ok": True, "message": "Schedule request submitted successfully."})
 
@@ -1434,24 +4149,29 @@ def request_schedule():
 def confirm_schedule(schedule_id):
     conn = get_schedule_db()
     conn.execute("UPDATE schedules SET status = 'confirmed' WHERE id = ?", (schedule_id,))
+    bump_data_version(conn, "schedules")
     conn.commit()
-    conn.close()
     return jsonify({"ok": True})
 
 @schedule_bp.route("/api/<int:schedule_id>", methods=["DELETE"])
 def delete_schedule(schedule_id):
     conn = get_schedule_db()
     conn.execute("DELETE FROM schedules WHERE id = ?", (schedule_id,))
+    bump_data_version(conn, "schedules")
     conn.commit()
-    conn.close()
     return jsonify({"ok": True})
 
 app.register_blueprint(mahjong_bp, url_prefix="/mahjong_rating")
 app.register_blueprint(schedule_bp, url_prefix="/schedule")
 
+# 스키마 마이그레이션 + 시작 시 정리 작업 (재계산 / 이벤트 기록 함수가 모두 정의된 뒤에 실행)
+with app.app_context():
+    init_db()
+    init_schedule_db()
+init_jobs_db()
+
 if __name__ == "__main__":
-    if not os.path.exists(DB_PATH):
-        init_db()
-    if not os.path.exists(SCHEDULE_DB_PATH):
-        init_schedule_db()
+    # DB 준비는 위의 모듈 로드 시 마이그레이션에서 끝남
+    # 내장 서버는 요청마다 스레드라 SSE 를 써도 다른 요청이 막히지 않음
+    app.config['LIVE_STREAM'] = True
     app.run(host="0.0.0.0", port=5000, debug=True)
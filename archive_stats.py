@@ -0,0 +1,84 @@
+"""
+아카이브 플레이어 통계 배치 계산 (script.js 의 calculateStatsFromGames / computePlayerDetailStats 서버 버전)
+
+compute_archive_stats 는 ProcessPoolExecutor 에서 돌릴 수 있도록 DB 경로만 받아 직접 읽습니다.
+저장(archive_player_stats)과 실행 방식은 app.py 쪽에서 처리.
+"""
+import sqlite3
+
+# archive_player_stats 에 저장하는 통계 컬럼 (player_stats 와 같은 이름 + 아카이브 전용 항목)
+STAT_COLUMNS = (
+    "games", "total_pt",
+    "rank1_count", "rank2_count", "rank3_count", "rank4_count",
+    "tobi_count", "max_score", "pos_pt_sum",
+)
+
+
+def empty_stats():
+    return {
+        "games": 0,
+        "total_pt": 0.0,
+        "rank1_count": 0,
+        "rank2_count": 0,
+        "rank3_count": 0,
+        "rank4_count": 0,
+        "tobi_count": 0,        # 점수가 0 미만으로 끝난 판 수
+        "max_score": None,
+        "pos_pt_sum": 0.0,      # 양수 pt 합 (시즌 점수의 대회 항목 입력값)
+    }
+
+
+def add_result(s, score, pt, rank):
+    s["games"] += 1
+    s["total_pt"] += pt
+    s[f"rank{rank}_count"] += 1
+    if score < 0:
+        s["tobi_count"] += 1
+    if s["max_score"] is None or score > s["max_score"]:
+        s["max_score"] = score
+    s["pos_pt_sum"] += max(pt, 0)
+
+
+def aggregate_player_stats(rows):
+    """
+    rows: (이름, 점수, pt, 등수) 이터러블 (game_participants 한 줄씩)
+    반환: {이름: 통계 딕셔너리}
+    """
+    out = {}
+    for name, score, pt, rank in rows:
+        name = (name or "").strip()
+        if not name:
+            continue
+        s = out.get(name)
+        if s is None:
+            s = out[name] = empty_stats()
+        add_result(s, score, pt, rank)
+    return out
+
+
+def merge_stats(items):
+    """여러 통계 딕셔너리 합치기 (통산 기록용)"""
+    total = empty_stats()
+    for s in items:
+        for col in STAT_COLUMNS:
+            if col == "max_score":
+                if s["max_score"] is not None and (total["max_score"] is None or s["max_score"] > total["max_score"]):
+                    total["max_score"] = s["max_score"]
+            else:
+                total[col] += s[col]
+    return total
+
+
+def compute_archive_stats(db_path, archive_id):
+    """아카이브 하나의 플레이어별 통계. (archive_id, {이름: 통계}) 반환 (별도 프로세스에서 실행 가능)"""
+    conn = sqlite3.connect(db_path, timeout=30.0)
+    try:
+        rows = conn.execute("""
+            SELECT gp.player_name, gp.score, gp.pt, gp.rank
+            FROM archive_games ag
+            JOIN game_participants gp ON gp.game_table = 'archive_games' AND gp.game_id = ag.id
+            WHERE ag.archive_id = ?
+        """, (archive_id,))
+        return archive_id, aggregate_player_stats(rows)
+    finally:
+        conn.close()
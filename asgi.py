@@ -0,0 +1,292 @@
+"""
+ASGI 실행 모드 (관전자 / 일정 페이지 동시 접속이 많을 때)
+
+    uvicorn asgi:application --host 0.0.0.0 --port 5000
+    gunicorn asgi:application -k uvicorn.workers.UvicornWorker -w 2 -b 0.0.0.0:5000
+
+- /mahjong_rating/api/stream (SSE) 는 이벤트 루프에서 직접 처리 → 연결마다 스레드를 쓰지 않음.
+- 나머지 요청은 기존 Flask 앱을 그대로 쓰되, SQLite 를 만지는 부분은 크기가 정해진
+  스레드 풀(ASGI_DB_THREADS)에서만 실행. 느린 업로드는 본문을 다 받은 뒤에 스레드로 넘깁니다.
+- 스트리밍 응답(CSV 내보내기 등)은 조각 단위로 스레드에서 꺼내 보내므로 중간에 루프를 막지 않음.
+
+개발용 `python app.py` (Flask 내장 서버) 와 gunicorn sync 워커 실행 방식도 그대로 동작합니다.
+"""
+import asyncio
+import contextvars
+import os
+import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs
+
+import app as flask_app
+
+ASGI_DB_THREADS = int(os.environ.get("ASGI_DB_THREADS", "8"))   # SQLite 작업용 스레드 수 (워커당)
+UPLOAD_SPOOL_MAX = 1024 * 1024    # 이보다 큰 요청 본문은 임시 파일에 받아 둠
+STREAM_PATH = "/mahjong_rating/api/stream"
+
+db_executor = ThreadPoolExecutor(max_workers=ASGI_DB_THREADS, thread_name_prefix="asgi-db")
+
+# SSE 는 아래 live_stream 코루틴이 처리하므로 연결이 스레드를 붙잡지 않음 → 페이지에서 켬
+flask_app.app.config["LIVE_STREAM"] = True
+
+
+async def run_db(fn, *args):
+    """SQLite 를 쓰는 동기 함수를 제한된 스레드 풀에서 실행"""
+    return await asyncio.get_running_loop().run_in_executor(db_executor, fn, *args)
+
+
+# ================== SSE (이벤트 루프에서 직접 처리) ==================
+
+class AsyncLiveHub:
+    """
+    app.LiveEventHub 의 비동기 버전. 구독자가 있을 때만 태스크 하나가 live_events 를
+    LIVE_POLL_INTERVAL 마다 확인하고, 각 연결의 asyncio.Queue 로 나눠줍니다.
+    """
+
+    def __init__(self, hub):
+        self.hub = hub
+        self._subscribers = set()
+        self._task = None
+        self._last_id = 0
+
+    async def subscribe(self, last_event_id=None):
+        q = asyncio.Queue(flask_app.LIVE_QUEUE_MAX)
+        self._subscribers.add(q)
+        if self._task is None or self._task.done():
+            self._last_id = await run_db(self.hub.max_id)
+            self._task = asyncio.get_running_loop().create_task(self._run())
+        backlog = []
+        if last_event_id is not None:
+            backlog = await run_db(self.hub.fetch_after, last_event_id)
+        return q, backlog
+
+    def unsubscribe(self, q):
+        self._subscribers.discard(q)
+
+    async def _run(self):
+        while self._subscribers:
+            await asyncio.sleep(flask_app.LIVE_POLL_INTERVAL)
+            try:
+                events = await run_db(self.hub.fetch_after, self._last_id)
+            except Exception as e:
+                print(f"[LIVE] poll failed: {e}", file=sys.stderr)
+                continue
+            if not events:
+                continue
+            self._last_id = events[-1]["id"]
+            for q in list(self._subscribers):
+                for ev in events:
+                    try:
+                        q.put_nowait(ev)
+                    except asyncio.QueueFull:
+                        # 너무 밀린 구독자: 끊고 Last-Event-ID 로 재접속하게 함
+                        while not q.empty():
+                            q.get_nowait()
+                        q.put_nowait(None)
+                        self.unsubscribe(q)
+                        break
+
+
+live_hub = AsyncLiveHub(flask_app.live_hub)
+
+
+def header_value(scope, name):
+    for k, v in scope.get("headers", []):
+        if k.decode("latin-1").lower() == name:
+            return v.decode("latin-1")
+    return None
+
+
+async def send_json_error(send, status, message):
+    body = flask_app.json.dumps({"error": message}).encode("utf-8")
+    await send({"type": "http.response.start", "status": status,
+                "headers": [(b"content-type", b"application/json"),
+                            (b"content-length", str(len(body)).encode())]})
+    await send({"type": "http.response.body", "body": body})
+
+
+async def live_stream(scope, receive, send):
+    """app.live_stream 과 같은 형식의 SSE. 연결은 코루틴 하나만 차지합니다."""
+    query = parse_qs(scope.get("query_string", b"").decode("latin-1"))
+    raw_last_id = header_value(scope, "last-event-id") or (query.get("last_event_id") or [None])[0]
+    try:
+        last_id = int(raw_last_id) if raw_last_id else None
+    except ValueError:
+        await send_json_error(send, 400, "invalid Last-Event-ID")
+        return
+
+    q, backlog = await live_hub.subscribe(last_id)
+    disconnected = asyncio.Event()
+
+    async def watch_disconnect():
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                disconnected.set()
+                return
+
+    watcher = asyncio.get_running_loop().create_task(watch_disconnect())
+
+    async def write(text):
+        await send({"type": "http.response.body", "body": text.encode("utf-8"), "more_body": True})
+
+    try:
+        await send({"type": "http.response.start", "status": 200, "headers": [
+            (b"content-type", b"text/event-stream; charset=utf-8"),
+            (b"cache-control", b"no-cache"),
+            (b"x-accel-buffering", b"no"),
+            (b"access-control-allow-origin", b"*"),
+        ]})
+        sent = last_id or 0
+        await write("retry: 3000\n\n")
+        for ev in backlog:
+            sent = ev["id"]
+            await write(flask_app.format_sse(ev))
+
+        while not disconnected.is_set():
+            getter = asyncio.ensure_future(q.get())
+            stopper = asyncio.ensure_future(disconnected.wait())
+            done, _ = await asyncio.wait({getter, stopper}, timeout=flask_app.LIVE_HEARTBEAT,
+                                         return_when=asyncio.FIRST_COMPLETED)
+            stopper.cancel()
+            if getter not in done:
+                getter.cancel()
+                if not disconnected.is_set():
+                    await write(": keepalive\n\n")
+                continue
+            ev = getter.result()
+            if ev is None:
+                break
+            if ev["id"] <= sent:
+                continue
+            sent = ev["id"]
+            await write(flask_app.format_sse(ev))
+        if not disconnected.is_set():
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+    except OSError:
+        pass
+    finally:
+        live_hub.unsubscribe(q)
+        watcher.cancel()
+
+
+# ================== 나머지 요청: Flask(WSGI) 를 스레드 풀에서 ==================
+
+async def read_body(receive):
+    """요청 본문을 이벤트 루프에서 끝까지 받아 둠 (느린 업로드가 스레드를 붙잡지 않게)"""
+    body = tempfile.SpooledTemporaryFile(max_size=UPLOAD_SPOOL_MAX)
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            body.close()
+            return None
+        body.write(message.get("body", b""))
+        if not message.get("more_body", False):
+            break
+    body.seek(0)
+    return body
+
+
+def build_environ(scope, body):
+    server = scope.get("server") or ("localhost", 80)
+    client = scope.get("client") or ("", 0)
+    path = scope["path"]
+    root_path = scope.get("root_path", "")
+    if root_path and path.startswith(root_path):
+        path = path[len(root_path):]
+    environ = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": root_path.encode("utf-8").decode("latin-1"),
+        "PATH_INFO": path.encode("utf-8").decode("latin-1"),
+        "QUERY_STRING": scope.get("query_string", b"").decode("latin-1"),
+        "SERVER_NAME": server[0],
+        "SERVER_PORT": str(server[1]),
+        "SERVER_PROTOCOL": f"HTTP/{scope.get('http_version', '1.1')}",
+        "REMOTE_ADDR": client[0],
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": body,
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": True,
+        "wsgi.run_once": False,
+    }
+    for k, v in scope.get("headers", []):
+        name = k.decode("latin-1").upper().replace("-", "_")
+        value = v.decode("latin-1")
+        if name == "CONTENT_TYPE":
+            environ["CONTENT_TYPE"] = value
+        elif name == "CONTENT_LENGTH":
+            environ["CONTENT_LENGTH"] = value
+        else:
+            key = f"HTTP_{name}"
+            environ[key] = f"{environ[key]},{value}" if key in environ else value
+    return environ
+
+
+def start_wsgi(environ):
+    """Flask 앱을 호출해서 (상태, 헤더, 응답 이터레이터, 첫 조각) 반환 (스레드에서 실행)"""
+    started = {}
+
+    def start_response(status, headers, exc_info=None):
+        started["status"] = int(status.split(" ", 1)[0])
+        started["headers"] = [(k.lower().encode("latin-1"), v.encode("latin-1")) for k, v in headers]
+
+    result = flask_app.app(environ, start_response)
+    iterator = iter(result)
+    first = next(iterator, None)
+    return started["status"], started["headers"], result, iterator, first
+
+
+def next_chunk(iterator):
+    return next(iterator, None)
+
+
+def close_result(result):
+    if hasattr(result, "close"):
+        result.close()
+
+
+async def wsgi_request(scope, receive, send):
+    body = await read_body(receive)
+    if body is None:
+        return
+    # 스트리밍 응답은 조각마다 다른 스레드에서 이어질 수 있으므로
+    # Flask 컨텍스트(contextvars)를 요청 단위 Context 하나에 묶어 둠
+    ctx = contextvars.Context()
+    try:
+        status, headers, result, iterator, chunk = await run_db(ctx.run, start_wsgi, build_environ(scope, body))
+        try:
+            await send({"type": "http.response.start", "status": status, "headers": headers})
+            while chunk is not None:
+                if chunk:
+                    await send({"type": "http.response.body", "body": chunk, "more_body": True})
+                chunk = await run_db(ctx.run, next_chunk, iterator)
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+        finally:
+            # 앱 컨텍스트 teardown (DB 커넥션 반납) 도 스레드 풀에서
+            await run_db(ctx.run, close_result, result)
+    finally:
+        body.close()
+
+
+async def lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            db_executor.shutdown(wait=False)
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
+async def application(scope, receive, send):
+    if scope["type"] == "lifespan":
+        await lifespan(receive, send)
+    elif scope["type"] == "http":
+        if scope["method"] == "GET" and scope["path"] == STREAM_PATH:
+            await live_stream(scope, receive, send)
+        else:
+            await wsgi_request(scope, receive, send)
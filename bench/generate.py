@@ -0,0 +1,209 @@
+"""
+벤치마크용 가짜 데이터 생성기
+
+실제 운영 DB 와 비슷한 모양의 데이터를 만들어 넣습니다.
+  - games / tournament_games / archive_games: 점수 합 100000, 100점 단위, 시즌 기간에 고르게 퍼진 시각
+  - 플레이어: 자주 오는 사람 / 가끔 오는 사람이 섞이도록 가중치를 둔 이름 풀
+  - badges / player_badges, schedules(확정 + 대기)
+
+app 을 import 하기 전에 MAHJONG_DATA_DIR 을 빈 디렉터리로 지정해야 운영 DB 를 건드리지 않습니다.
+(bench/run.py 가 크기마다 임시 디렉터리를 만들어 처리)
+
+    MAHJONG_DATA_DIR=/tmp/bench python bench/generate.py --rows 10k
+"""
+import argparse
+import os
+import random
+import sys
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+INSERT_BATCH = 5000               # insert_games_bulk 한 번에 넣는 판 수
+ARCHIVE_SIZE = 2000               # 아카이브 하나당 판 수
+SEASON_START = datetime(2024, 3, 1, 18, 0)
+SEASON_DAYS = 180
+
+SURNAMES = "김이박최정강조윤장임한오서신권황안송류홍"
+GIVEN = ["민준", "서연", "도윤", "하은", "시우", "지유", "주원", "서윤", "예준", "지민",
+         "현우", "수아", "건우", "하린", "우진", "다은", "선우", "채원", "연우", "지호"]
+LOCATIONS = ["동아리방", "학생회관 301호", "마작카페", "중앙도서관 세미나실"]
+GRADES = ["브론즈", "실버", "골드", "플래티넘"]
+
+
+def parse_size(text):
+    """'1k' / '10K' / '1m' / '2500' -> 정수"""
+    text = text.strip().lower()
+    mult = 1
+    if text.endswith("k"):
+        mult, text = 1000, text[:-1]
+    elif text.endswith("m"):
+        mult, text = 1000 * 1000, text[:-1]
+    return int(float(text) * mult)
+
+
+class Synth:
+    def __init__(self, seed=0, players=None):
+        self.rng = random.Random(seed)
+        count = players or 120
+        names = []
+        for i in range(count):
+            name = self.rng.choice(SURNAMES) + self.rng.choice(GIVEN)
+            names.append(name if name not in names else f"{name}{i}")
+        self.players = names
+        # 상위 몇 명이 대부분의 판을 치는 분포
+        self.weights = [1.0 / (i + 1) ** 0.8 for i in range(count)]
+
+    def table(self):
+        picked = set()
+        while len(picked) < 4:
+            picked.add(self.rng.choices(self.players, self.weights)[0])
+        names = list(picked)
+        self.rng.shuffle(names)
+        return names
+
+    def scores(self):
+        """4인 점수 (합 100000, 100점 단위, 가끔 마이너스)"""
+        while True:
+            cuts = sorted(self.rng.randint(0, 1000) for _ in range(3))
+            parts = [cuts[0], cuts[1] - cuts[0], cuts[2] - cuts[1], 1000 - cuts[2]]
+            scores = [p * 100 for p in parts]
+            # 한쪽으로 너무 쏠린 판은 줄이고, 토비(마이너스)는 조금만 나오게
+            shift = self.rng.choice([0, 0, 0, 0, 0, 5000, 10000])
+            if shift:
+                low = scores.index(min(scores))
+                high = scores.index(max(scores))
+                scores[low] -= shift
+                scores[high] += shift
+            if max(scores) <= 80000:
+                return scores
+
+    def created_at(self, i, total, days=SEASON_DAYS, start=SEASON_START):
+        base = start + timedelta(days=days * i / max(total, 1))
+        return (base + timedelta(minutes=self.rng.randint(0, 240))).isoformat(timespec="seconds")
+
+    def games(self, count, days=SEASON_DAYS, start=SEASON_START):
+        """[(created_at, names, scores), ...] (시간순)"""
+        return [(self.created_at(i, count, days, start), self.table(), self.scores()) for i in range(count)]
+
+
+def insert_games(app, conn, table, games, archive_id=None):
+    for i in range(0, len(games), INSERT_BATCH):
+        app.insert_games_bulk(conn, table, games[i:i + INSERT_BATCH],
+                              archive_id=archive_id, refresh_snapshots=False)
+        conn.commit()
+
+
+def populate(app, rows, seed=0):
+    """
+    rows 판 규모의 데이터를 채움 (games = rows, 나머지는 비율로).
+    반환: 테이블별로 넣은 행 수
+    """
+    synth = Synth(seed, players=max(40, min(400, rows // 50)))
+    counts = {}
+    with app.app.app_context():
+        conn = app.get_db()
+
+        insert_games(app, conn, "games", synth.games(rows))
+        counts["games"] = rows
+
+        tournament = max(rows // 4, 1)
+        insert_games(app, conn, "tournament_games", synth.games(tournament, days=30))
+        counts["tournament_games"] = tournament
+        app.refresh_daily_snapshots(conn)
+        conn.commit()
+
+        # 지난 시즌들 (아카이브 하나당 ARCHIVE_SIZE 판)
+        rule_set_id = app.current_rule(conn)["id"]
+        archive_ids = []
+        remaining = rows
+        season = 0
+        while remaining > 0:
+            size = min(ARCHIVE_SIZE, remaining)
+            start = SEASON_START - timedelta(days=SEASON_DAYS * (season + 1))
+            archive_id = conn.execute(
+                "INSERT INTO archives (name, created_at, rule_set_id) VALUES (?, ?, ?)",
+                (f"시즌 {season + 1}", start.isoformat(timespec="seconds"), rule_set_id),
+            ).lastrowid
+            insert_games(app, conn, "archive_games", synth.games(size, start=start), archive_id)
+            archive_ids.append(archive_id)
+            remaining -= size
+            season += 1
+        app.log_changes(conn, "archives", "put", archive_ids)
+        app.bump_data_version(conn, "archives")
+        conn.commit()
+        app.refresh_archive_stats(conn, archive_ids)
+        conn.commit()
+        counts["archives"] = len(archive_ids)
+        counts["archive_games"] = rows
+
+        badge_count = 30
+        conn.executemany(
+            "INSERT INTO badges (code, name, grade, description) VALUES (?, ?, ?, ?)",
+            [(100 + i, f"뱃지 {i + 1}", synth.rng.choice(GRADES), f"벤치마크용 뱃지 {i + 1}")
+             for i in range(badge_count)],
+        )
+        player_badges = max(rows // 10, 1)
+        conn.executemany(
+            "INSERT INTO player_badges (player_name, badge_code, granted_at) VALUES (?, ?, ?)",
+            [(synth.rng.choices(synth.players, synth.weights)[0],
+              100 + synth.rng.randrange(badge_count),
+              synth.created_at(i, player_badges)[:16]) for i in range(player_badges)],
+        )
+        app.bump_data_version(conn, "badges", "player_badges")
+        conn.commit()
+        counts["badges"] = badge_count
+        counts["player_badges"] = player_badges
+
+        sconn = app.get_schedule_db()
+        schedules = max(rows // 10, 1)
+        values = []
+        for i in range(schedules):
+            day = SEASON_START + timedelta(days=SEASON_DAYS * i / schedules)
+            hour = synth.rng.randint(10, 20)
+            values.append((
+                f"정기 모임 {i + 1}", day.strftime("%Y-%m-%d"),
+                f"{hour:02d}:00", f"{hour + 3:02d}:00",
+                synth.rng.choice(LOCATIONS), "", synth.rng.choice(synth.players),
+                "confirmed" if synth.rng.random() < 0.8 else "pending",
+                day.isoformat(timespec="seconds"),
+            ))
+        sconn.executemany("""
+            INSERT INTO schedules
+                (title, date, time_start, time_end, location, description, requester_name, status, created_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, values)
+        app.bump_data_version(sconn, "schedules")
+        sconn.commit()
+        counts["schedules"] = schedules
+    return counts
+
+
+def csv_upload(synth, count):
+    """import_games 에 올릴 CSV 바이트 (ID / 시간 / P1 이름 / P1 점수 / ... 형식)"""
+    lines = ["ID,시간,P1 이름,P1 점수,P2 이름,P2 점수,P3 이름,P3 점수,P4 이름,P4 점수"]
+    for i, (created_at, names, scores) in enumerate(synth.games(count, days=7, start=SEASON_START + timedelta(days=SEASON_DAYS))):
+        cells = [str(i + 1), created_at]
+        for name, score in zip(names, scores):
+            cells += [name, str(score)]
+        lines.append(",".join(cells))
+    return ("\ufeff" + "\n".join(lines) + "\n").encode("utf-8")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="벤치마크용 가짜 데이터 생성")
+    parser.add_argument("--rows", default="10k", help="games 행 수 (1k / 10k / 100k / 1m ...)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    if not os.environ.get("MAHJONG_DATA_DIR"):
+        parser.error("MAHJONG_DATA_DIR 을 지정하세요 (운영 DB 보호)")
+
+    import app
+    counts = populate(app, parse_size(args.rows), args.seed)
+    print(counts)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,248 @@
+"""
+자주 불리는 엔드포인트 벤치마크
+
+크기마다 임시 디렉터리에 가짜 데이터(bench/generate.py)를 채운 뒤, Flask test client 로
+아래 엔드포인트를 호출해 지연 시간 백분위 / 처리량 / 최대 RSS 를 JSON 으로 출력합니다.
+
+  list_games        /api/games?limit=100 (커서로 다음 페이지까지)
+  list_games_full   /api/games (전체, FULL_LIST_MAX_ROWS 이하일 때만)
+  list_games_compact  /api/games?format=columnar + Accept-Encoding: br, gzip (같은 조건)
+  export_games      /export (CSV 스트리밍을 끝까지 읽음)
+  import_games      /import (CSV 업로드 → 작업이 끝날 때까지)
+  archives_api      /api/archives (COUNT + LEFT JOIN)
+  player_badges     /api/player_badges
+  schedule_events   /schedule/api/events (전체)
+  schedule_month    /schedule/api/events?start=&end= (달력 한 달 구간)
+
+캐시되는 GET 은 응답 캐시를 비우고 잰 값(uncached)과 같은 요청을 반복한 값(cached)을 따로 냅니다.
+크기마다 별도 프로세스에서 돌리므로 RSS 는 그 크기만의 값입니다.
+
+    python bench/run.py --sizes 1k,10k --iterations 50 --out bench.json
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+import generate  # noqa: E402
+
+FULL_LIST_MAX_ROWS = 100 * 1000   # 이보다 크면 전체 목록 응답이 너무 커서 생략
+PAGE_LIMIT = 100
+IMPORT_ROWS = 500                 # import_games 한 번에 올리는 판 수
+JOB_WAIT_SECONDS = 300
+
+
+def peak_rss_mb():
+    """지금까지의 최대 RSS (리눅스는 KB, macOS 는 byte 단위)"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == "darwin":
+        peak /= 1024
+    return round(peak / 1024, 1)
+
+
+def summarize(latencies, total_seconds, total_bytes):
+    ms = sorted(x * 1000 for x in latencies)
+
+    def pct(p):
+        return round(ms[min(len(ms) - 1, int(round(p / 100 * (len(ms) - 1))))], 3)
+
+    return {
+        "requests": len(ms),
+        "p50_ms": pct(50),
+        "p90_ms": pct(90),
+        "p99_ms": pct(99),
+        "max_ms": round(ms[-1], 3),
+        "mean_ms": round(statistics.fmean(ms), 3),
+        "throughput_rps": round(len(ms) / total_seconds, 1) if total_seconds else None,
+        "bytes_per_request": total_bytes // len(ms),
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def measure(fn, iterations, before=None):
+    """fn() -> 응답 바이트 수. before 는 매 호출 전에 실행(시간에 포함 안 함)"""
+    latencies = []
+    total_bytes = 0
+    started = time.perf_counter()
+    for i in range(iterations):
+        if before:
+            before()
+        t0 = time.perf_counter()
+        total_bytes += fn(i)
+        latencies.append(time.perf_counter() - t0)
+    return summarize(latencies, time.perf_counter() - started, total_bytes)
+
+
+def get_bytes(client, url, **kwargs):
+    resp = client.get(url, **kwargs)
+    if resp.status_code != 200:
+        raise RuntimeError(f"{url} -> {resp.status_code}")
+    body = resp.get_data()
+    resp.close()
+    return len(body)
+
+
+def cached_pair(app, client, url, iterations, headers=None):
+    """같은 URL 을 응답 캐시 없이 / 캐시된 상태로 각각 측정 (bytes 는 전송 크기)"""
+    cache = app.response_cache
+    uncached = measure(lambda i: get_bytes(client, url, headers=headers), iterations, before=cache.clear)
+    get_bytes(client, url, headers=headers)
+    cached = measure(lambda i: get_bytes(client, url, headers=headers), iterations)
+    return {"uncached": uncached, "cached": cached}
+
+
+def bench_list_pages(app, client, iterations):
+    """limit=100 페이지를 커서로 따라가며 (끝나면 처음부터)"""
+    state = {"cursor": None}
+
+    def page(i):
+        url = f"/mahjong_rating/api/games?limit={PAGE_LIMIT}"
+        if state["cursor"]:
+            url += f"&cursor={state['cursor']}"
+        resp = client.get(url)
+        if resp.status_code != 200:
+            raise RuntimeError(f"{url} -> {resp.status_code}")
+        state["cursor"] = resp.headers.get("X-Next-Cursor")
+        return len(resp.get_data())
+
+    uncached = measure(page, iterations, before=app.response_cache.clear)
+    # 같은 페이지들을 한 번 훑어 캐시를 채운 뒤 다시 측정
+    state["cursor"] = None
+    for i in range(iterations):
+        page(i)
+    state["cursor"] = None
+    cached = measure(page, iterations)
+    return {"uncached": uncached, "cached": cached}
+
+
+def bench_import(client, synth, iterations):
+    """CSV 업로드부터 작업 완료까지 (accept_ms 는 202 를 받기까지)"""
+    accept = []
+    bodies = [generate.csv_upload(synth, IMPORT_ROWS) for _ in range(iterations)]
+
+    def upload(i):
+        t0 = time.perf_counter()
+        resp = client.post("/mahjong_rating/import?format=json",
+                           data={"file": (io.BytesIO(bodies[i]), "bench.csv")},
+                           content_type="multipart/form-data")
+        accept.append(time.perf_counter() - t0)
+        if resp.status_code != 202:
+            raise RuntimeError(f"import -> {resp.status_code}")
+        status_url = resp.get_json()["status_url"]
+        deadline = time.monotonic() + JOB_WAIT_SECONDS
+        while time.monotonic() < deadline:
+            job = client.get(status_url).get_json()
+            if job["status"] == "done":
+                return len(bodies[i])
+            if job["status"] == "failed":
+                raise RuntimeError(f"import job failed: {job['error']}")
+            time.sleep(0.01)
+        raise RuntimeError("import job timed out")
+
+    result = measure(upload, iterations)
+    result["rows_per_upload"] = IMPORT_ROWS
+    result["accept_p50_ms"] = round(statistics.median(accept) * 1000, 3)
+    return result
+
+
+def run_size(rows, iterations, seed):
+    """MAHJONG_DATA_DIR 이 지정된 자식 프로세스에서 실행"""
+    import app
+
+    t0 = time.perf_counter()
+    counts = generate.populate(app, rows, seed)
+    generate_seconds = time.perf_counter() - t0
+    client = app.app.test_client()
+
+    scenarios = {"list_games": bench_list_pages(app, client, iterations)}
+    if rows <= FULL_LIST_MAX_ROWS:
+        scenarios["list_games_full"] = cached_pair(
+            app, client, "/mahjong_rating/api/games", max(1, min(iterations, 10)))
+        scenarios["list_games_compact"] = cached_pair(
+            app, client, "/mahjong_rating/api/games?format=columnar", max(1, min(iterations, 10)),
+            headers={"Accept-Encoding": "br, gzip"})
+    scenarios["export_games"] = measure(
+        lambda i: get_bytes(client, "/mahjong_rating/export"), max(1, min(iterations, 5)))
+    scenarios["archives_api"] = cached_pair(app, client, "/mahjong_rating/api/archives", iterations)
+    scenarios["player_badges"] = cached_pair(app, client, "/mahjong_rating/api/player_badges", iterations)
+    scenarios["schedule_events"] = cached_pair(app, client, "/schedule/api/events", iterations)
+    scenarios["schedule_month"] = cached_pair(
+        app, client, "/schedule/api/events?start=2024-04-01&end=2024-05-01", iterations)
+    # 데이터를 늘리므로 마지막에
+    scenarios["import_games"] = bench_import(client, generate.Synth(seed + 1), max(1, min(iterations, 5)))
+
+    return {
+        "rows": rows,
+        "counts": counts,
+        "generate_seconds": round(generate_seconds, 2),
+        "db_bytes": os.path.getsize(app.DB_PATH),
+        "scenarios": scenarios,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="엔드포인트 벤치마크")
+    parser.add_argument("--sizes", default="1k,10k", help="쉼표로 구분 (1k,10k,100k,1m)")
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", help="결과 JSON 파일 (없으면 표준 출력)")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        # 앱 로그가 표준 출력에 섞이지 않게 결과는 데이터 디렉터리의 파일로
+        result = run_size(generate.parse_size(args.child), args.iterations, args.seed)
+        with open(os.path.join(os.environ["MAHJONG_DATA_DIR"], "result.json"), "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False)
+        return
+
+    results = []
+    for size in args.sizes.split(","):
+        with tempfile.TemporaryDirectory(prefix="mahjong-bench-") as data_dir:
+            env = dict(os.environ, MAHJONG_DATA_DIR=data_dir)
+            print(f"[BENCH] {size} ...", file=sys.stderr)
+            subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--child", size,
+                 "--iterations", str(args.iterations), "--seed", str(args.seed)],
+                env=env, stdout=sys.stderr, check=True,
+            )
+            with open(os.path.join(data_dir, "result.json"), encoding="utf-8") as f:
+                result = json.load(f)
+            result["size"] = size
+            results.append(result)
+
+    try:
+        import numpy
+        numpy_version = numpy.__version__
+    except ImportError:
+        numpy_version = None
+    report = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "numpy": numpy_version,
+        "iterations": args.iterations,
+        "seed": args.seed,
+        "results": results,
+    }
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
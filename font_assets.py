@@ -0,0 +1,181 @@
+"""
+제목 폰트(gyeonggi_title_medium.ttf) 서브셋 / WOFF2 변환 (fontTools)
+
+원본 TTF 는 한글 전체가 들어 있어 2.9MB 라 첫 화면 제목이 늦게 뜹니다. 그래서
+  - 템플릿 / JS 의 UI 문구, app.py 의 문자열, 동아리 이름, ASCII 에 쓰인 글자만 남긴 서브셋 WOFF2
+  - 전체 글자 WOFF2 (사용자가 입력한 이름처럼 서브셋에 없는 글자가 나올 때만 받음)
+를 static/build/ 에 내용 해시 이름으로 만들고, 두 @font-face 를 담은 CSS 를 함께 만듭니다.
+서브셋 쪽 unicode-range 를 실제 글자 목록으로 지정하므로, 브라우저는 서브셋에 없는 글자가
+화면에 나올 때만 전체 폰트를 내려받습니다. 두 쪽 모두 font-display: swap.
+
+fontTools / brotli 가 없으면 빌드를 건너뛰고 원본 TTF 를 그대로 씁니다 (선택 사항).
+
+    python font_assets.py           # 직접 빌드
+"""
+import ast
+import glob
+import hashlib
+import io
+import json
+import os
+import sys
+
+from image_assets import BUILD_SUBDIR, file_hash, write_hashed
+
+try:
+    from fontTools import subset as ft_subset
+    from fontTools.ttLib import TTFont
+    import brotli  # noqa: F401  (WOFF2 압축에 필요)
+except ImportError:   # 없으면 원본 TTF 로 동작
+    TTFont = None
+
+HAS_FONTTOOLS = TTFont is not None
+
+FONT_SOURCE = "gyeonggi_title_medium.ttf"
+FONT_FAMILY = "GyeonggiTitle"
+FONT_WEIGHT = 500
+MANIFEST_NAME = "fonts.json"
+
+# 항상 서브셋에 넣는 글자 (ASCII + 자주 쓰는 문장부호)
+BASE_TEXT = "".join(chr(c) for c in range(0x20, 0x7F)) + "·…‘’“”「」『』→←↑↓★☆※~ㆍ"
+
+
+def python_strings(path):
+    """파이썬 파일의 문자열 상수 (docstring 제외) — 인라인 HTML 페이지 문구용"""
+    with open(path, encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+    docstrings = set()
+    for node in ast.walk(tree):
+        if isinstance(node, (ast.Module, ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            if node.body and isinstance(node.body[0], ast.Expr) and isinstance(node.body[0].value, ast.Constant):
+                docstrings.add(id(node.body[0].value))
+    return "".join(node.value for node in ast.walk(tree)
+                   if isinstance(node, ast.Constant) and isinstance(node.value, str) and id(node) not in docstrings)
+
+
+def collect_text(root_dir, extra_text=""):
+    """서브셋에 넣을 글자 (정렬된 문자열)"""
+    chars = set(BASE_TEXT) | set(extra_text)
+    for path in glob.glob(os.path.join(root_dir, "templates", "*.html")) + \
+            glob.glob(os.path.join(root_dir, "static", "*.js")):
+        with open(path, encoding="utf-8") as f:
+            chars |= set(f.read())
+    chars |= set(python_strings(os.path.join(root_dir, "app.py")))
+    return "".join(sorted(c for c in chars if c.isprintable()))
+
+
+def unicode_ranges(codepoints):
+    """[0x41, 0x42, 0x43, 0xAC00] -> 'U+41-43, U+AC00'"""
+    out = []
+    cps = sorted(codepoints)
+    i = 0
+    while i < len(cps):
+        j = i
+        while j + 1 < len(cps) and cps[j + 1] == cps[j] + 1:
+            j += 1
+        out.append(f"U+{cps[i]:X}" if i == j else f"U+{cps[i]:X}-{cps[j]:X}")
+        i = j + 1
+    return ", ".join(out)
+
+
+def woff2_bytes(font):
+    font.flavor = "woff2"
+    buf = io.BytesIO()
+    font.save(buf)
+    return buf.getvalue()
+
+
+def font_face(url, ranges):
+    return (
+        "@font-face {\n"
+        f"  font-family: '{FONT_FAMILY}';\n"
+        f"  src: url('{url}') format('woff2');\n"
+        f"  font-weight: {FONT_WEIGHT};\n"
+        "  font-style: normal;\n"
+        "  font-display: swap;\n"
+        f"  unicode-range: {ranges};\n"
+        "}\n"
+    )
+
+
+def build(static_dir, text, sources):
+    out_dir = os.path.join(static_dir, BUILD_SUBDIR)
+    os.makedirs(out_dir, exist_ok=True)
+    src = os.path.join(static_dir, FONT_SOURCE)
+
+    full = TTFont(src)
+    covered = set(full.getBestCmap())
+    full_path = write_hashed(out_dir, "gyeonggi_title_medium.full", "woff2", woff2_bytes(full))
+
+    wanted = sorted(ord(c) for c in text if ord(c) in covered)
+    font = TTFont(src)
+    options = ft_subset.Options()
+    options.hinting = False          # 제목 크기에서는 힌팅 차이가 거의 없음
+    options.desubroutinize = True
+    subsetter = ft_subset.Subsetter(options)
+    subsetter.populate(unicodes=wanted)
+    subsetter.subset(font)
+    subset_path = write_hashed(out_dir, "gyeonggi_title_medium.subset", "woff2", woff2_bytes(font))
+
+    # 같은 family 의 @font-face 는 나중에 선언한 쪽을 먼저 확인하므로 서브셋을 뒤에
+    css = (
+        "/* font_assets.py 가 생성 — 직접 고치지 말 것 */\n"
+        + font_face(os.path.basename(full_path), unicode_ranges(covered))
+        + font_face(os.path.basename(subset_path), unicode_ranges(wanted))
+    )
+    css_path = write_hashed(out_dir, "fonts", "css", css.encode("utf-8"))
+
+    manifest = {
+        "sources": sources,
+        "css": css_path,
+        "subset": subset_path,
+        "full": full_path,
+        "glyphs": len(wanted),
+    }
+    path = os.path.join(out_dir, MANIFEST_NAME)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=1)
+    os.replace(tmp, path)
+    return manifest
+
+
+def ensure_built(static_dir, root_dir, extra_text=""):
+    """
+    원본 폰트 / 쓰인 글자가 그대로면 기존 빌드를, 아니면 다시 빌드해서 manifest 반환.
+    fontTools 가 없거나 원본이 없으면 None.
+    """
+    src = os.path.join(static_dir, FONT_SOURCE)
+    if not HAS_FONTTOOLS or not os.path.exists(src):
+        return None
+    text = collect_text(root_dir, extra_text)
+    sources = {"font": file_hash(src), "text": hashlib.sha256(text.encode("utf-8")).hexdigest()}
+    try:
+        with open(os.path.join(static_dir, BUILD_SUBDIR, MANIFEST_NAME), encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        manifest = None
+    if manifest and manifest.get("sources") == sources and all(
+            os.path.exists(os.path.join(static_dir, manifest[k])) for k in ("css", "subset", "full")):
+        return manifest
+    return build(static_dir, text, sources)
+
+
+def main():
+    root_dir = os.path.dirname(os.path.abspath(__file__))
+    if not HAS_FONTTOOLS:
+        print("fontTools / brotli 가 설치되어 있지 않습니다 (pip install fonttools brotli)")
+        return 1
+    import app
+    static_dir = os.path.join(root_dir, "static")
+    manifest = ensure_built(static_dir, root_dir, app.CLUB_NAME)
+    before = os.path.getsize(os.path.join(static_dir, FONT_SOURCE))
+    for key in ("subset", "full"):
+        size = os.path.getsize(os.path.join(static_dir, manifest[key]))
+        print(f"{key}: {manifest[key]} ({size // 1024} KB, 원본 {before // 1024} KB)")
+    print(f"glyphs: {manifest['glyphs']}, css: {manifest['css']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,29 @@
+"""
+gunicorn 설정 (gunicorn 을 이 디렉터리에서 실행하면 자동으로 읽힘)
+
+    gunicorn app:app                                             # gthread 워커 (기본)
+    gunicorn asgi:application -k uvicorn.workers.UvicornWorker   # ASGI (SSE 연결은 코루틴 하나)
+
+실시간 푸시(/mahjong_rating/api/stream, SSE)는 탭 하나가 응답 하나를 계속 붙잡습니다.
+sync 워커에서는 탭 몇 개만 열려도 워커가 전부 막히므로, 워커가 스레드 / 비동기 방식일 때만
+post_fork 에서 MAHJONG_LIVE_STREAM=1 을 켭니다. `-k sync --threads 1` 로 띄우면 페이지는 /api/changes 폴링으로
+동작합니다. (threads 가 2 이상이면 gunicorn 이 sync 를 gthread 로 바꿈)
+(preload_app 을 켜면 앱을 fork 전에 불러오므로 MAHJONG_LIVE_STREAM 을 환경 변수로 직접 지정할 것)
+"""
+import os
+
+bind = os.environ.get("GUNICORN_BIND", "0.0.0.0:5000")
+workers = int(os.environ.get("GUNICORN_WORKERS", "2"))
+worker_class = "gthread"
+threads = int(os.environ.get("GUNICORN_THREADS", "32"))
+
+
+def post_fork(server, worker):
+    """워커가 앱을 불러오기 전에 SSE 사용 여부 / 워커당 연결 한도를 정함"""
+    worker_class_str = server.cfg.worker_class_str
+    if worker_class_str == "sync":
+        return
+    os.environ.setdefault("MAHJONG_LIVE_STREAM", "1")
+    if worker_class_str == "gthread":
+        # 스레드 절반은 일반 요청용으로 남겨 둠
+        os.environ.setdefault("MAHJONG_LIVE_STREAM_MAX", str(max(1, server.cfg.threads // 2)))
@@ -0,0 +1,183 @@
+"""
+정적 이미지 최적화 (Pillow)
+
+static/ 의 원본 PNG 로부터
+  - 화면에 실제로 쓰이는 폭에 맞춘 WebP 여러 장 + 가장 큰 폭의 PNG (WebP 미지원 브라우저용)
+  - 파비콘 세트 (16/32/48 ICO, 32·192·512 PNG, 180 apple-touch-icon)
+을 static/build/ 에 내용 해시가 들어간 이름으로 만들고, 목록을 static/build/images.json 에 적습니다.
+원본이 바뀌지 않았으면 다시 만들지 않습니다 (앱 시작 시 ensure_built 로 확인).
+
+    python image_assets.py          # 직접 빌드 (배포 스크립트 등에서)
+
+템플릿에서는 app.py 가 등록한 picture() / image_url() 로 씁니다.
+"""
+import hashlib
+import io
+import json
+import os
+import sys
+
+from PIL import Image
+
+BUILD_SUBDIR = "build"
+MANIFEST_NAME = "images.json"
+WEBP_QUALITY = 82
+WEBP_METHOD = 4          # 6 은 2% 작아지는 대신 20배 넘게 느려서 앱 시작 시 빌드에 부적합
+HASH_LEN = 10
+
+# 원본 -> 만들 폭 목록 (원본보다 큰 폭은 만들지 않음)
+# 캐릭터: 데스크톱에서 높이 88vh (폭 약 48vh), 800px 이하에서는 숨김
+# 장식: CSS 폭 80~110px → 1x / 2x
+IMAGE_WIDTHS = {
+    "left_char.png": (320, 480, 640),
+    "right_char.png": (320, 480, 640),
+    "blue_1.png": (120, 240),
+    "blue_2.png": (120, 240),
+    "orange_1.png": (120, 240),
+    "orange_2.png": (120, 240),
+}
+
+ICON_SOURCE = "icon.png"
+ICO_SIZES = (16, 32, 48)
+ICON_PNG_SIZES = {"icon-32": 32, "icon-192": 192, "icon-512": 512, "apple-touch-icon": 180}
+
+
+def file_hash(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(64 * 1024), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def source_hashes(static_dir):
+    names = sorted(set(IMAGE_WIDTHS) | {ICON_SOURCE})
+    return {name: file_hash(os.path.join(static_dir, name))
+            for name in names if os.path.exists(os.path.join(static_dir, name))}
+
+
+def build_config():
+    """빌드 설정 (바뀌면 원본이 같아도 다시 빌드)"""
+    return {"widths": IMAGE_WIDTHS, "ico": ICO_SIZES, "icons": ICON_PNG_SIZES,
+            "webp": [WEBP_QUALITY, WEBP_METHOD]}
+
+
+def write_hashed(out_dir, stem, ext, data):
+    """내용 해시를 붙인 이름으로 저장 (같은 내용이면 그대로 둠). static 기준 상대 경로 반환"""
+    digest = hashlib.sha256(data).hexdigest()[:HASH_LEN]
+    name = f"{stem}.{digest}.{ext}"
+    path = os.path.join(out_dir, name)
+    if not os.path.exists(path):
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    return f"{BUILD_SUBDIR}/{name}"
+
+
+def encode(img, fmt, **kwargs):
+    buf = io.BytesIO()
+    img.save(buf, fmt, **kwargs)
+    return buf.getvalue()
+
+
+def resize_to_width(img, width):
+    if width >= img.width:
+        return img
+    height = round(img.height * width / img.width)
+    return img.resize((width, height), Image.LANCZOS)
+
+
+def build_image(src_path, widths, out_dir):
+    stem = os.path.splitext(os.path.basename(src_path))[0]
+    with Image.open(src_path) as opened:
+        img = opened.convert("RGBA")
+    targets = sorted({min(w, img.width) for w in widths})
+    webp = []
+    for w in targets:
+        variant = resize_to_width(img, w)
+        data = encode(variant, "WEBP", quality=WEBP_QUALITY, method=WEBP_METHOD)
+        webp.append([w, write_hashed(out_dir, f"{stem}-{w}w", "webp", data)])
+    largest = resize_to_width(img, targets[-1])
+    fallback = write_hashed(out_dir, f"{stem}-{targets[-1]}w", "png", encode(largest, "PNG", optimize=True))
+    return {
+        "width": largest.width,
+        "height": largest.height,
+        "fallback": fallback,
+        "webp": webp,
+    }
+
+
+def build_icons(src_path, out_dir):
+    with Image.open(src_path) as opened:
+        img = opened.convert("RGBA")
+    icons = {"favicon.ico": write_hashed(out_dir, "favicon", "ico",
+                                         encode(img, "ICO", sizes=[(s, s) for s in ICO_SIZES]))}
+    for name, size in ICON_PNG_SIZES.items():
+        resized = img.resize((size, size), Image.LANCZOS)
+        icons[name] = write_hashed(out_dir, name, "png", encode(resized, "PNG", optimize=True))
+    return icons
+
+
+def build(static_dir, hashes=None):
+    """static/build/ 에 최적화 이미지를 만들고 manifest 딕셔너리 반환"""
+    out_dir = os.path.join(static_dir, BUILD_SUBDIR)
+    os.makedirs(out_dir, exist_ok=True)
+    manifest = {"sources": hashes or source_hashes(static_dir), "config": build_config(),
+                "images": {}, "icons": {}}
+    for name, widths in IMAGE_WIDTHS.items():
+        src = os.path.join(static_dir, name)
+        if os.path.exists(src):
+            manifest["images"][name] = build_image(src, widths, out_dir)
+    icon_src = os.path.join(static_dir, ICON_SOURCE)
+    if os.path.exists(icon_src):
+        manifest["icons"] = build_icons(icon_src, out_dir)
+
+    path = os.path.join(out_dir, MANIFEST_NAME)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=1)
+    os.replace(tmp, path)
+    return manifest
+
+
+def load_manifest(static_dir):
+    try:
+        with open(os.path.join(static_dir, BUILD_SUBDIR, MANIFEST_NAME), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def manifest_files_exist(static_dir, manifest):
+    paths = [p for img in manifest["images"].values()
+             for p in [img["fallback"]] + [w[1] for w in img["webp"]]]
+    paths += list(manifest["icons"].values())
+    return all(os.path.exists(os.path.join(static_dir, p)) for p in paths)
+
+
+def ensure_built(static_dir):
+    """원본 해시 / 설정이 manifest 와 같고 파일이 다 있으면 그대로, 아니면 다시 빌드. manifest 반환"""
+    hashes = source_hashes(static_dir)
+    manifest = load_manifest(static_dir)
+    # JSON 을 거치면 튜플이 리스트가 되므로 한 번 직렬화한 값끼리 비교
+    config = json.loads(json.dumps(build_config()))
+    if (manifest and manifest.get("sources") == hashes and manifest.get("config") == config
+            and manifest_files_exist(static_dir, manifest)):
+        return manifest
+    return build(static_dir, hashes)
+
+
+def main():
+    static_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static")
+    manifest = build(static_dir)
+    for name, img in manifest["images"].items():
+        before = os.path.getsize(os.path.join(static_dir, name))
+        after = os.path.getsize(os.path.join(static_dir, img["webp"][-1][1]))
+        print(f"{name}: {before // 1024} KB -> {after // 1024} KB (WebP {img['webp'][-1][0]}w)")
+    for name, path in manifest["icons"].items():
+        print(f"{name}: {path}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,291 @@
+"""
+요청 / SQL 계측 (워커 프로세스별)
+
+- 요청별 처리 시간, 그 요청에서 실행한 쿼리 수 / 쿼리 시간 → 히스토그램
+- SQLite 커넥션을 ProfiledConnection 으로 열면 execute 마다 시간을 재고,
+  SLOW_QUERY_MS 를 넘는 문장은 EXPLAIN QUERY PLAN 과 함께 보관
+- snapshot() 은 JSON 용 딕셔너리, prometheus() 는 Prometheus 텍스트 형식
+
+Flask 와는 무관하게 동작합니다. 요청 구분은 begin_request / finish_request 로 app.py 에서.
+"""
+import contextvars
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+SLOW_QUERY_MS = float(os.environ.get("SLOW_QUERY_MS", "50"))   # 이보다 오래 걸린 쿼리는 실행 계획까지 기록
+SLOW_QUERY_KEEP = 50            # 보관하는 느린 쿼리 종류 수 (오래된 것부터 버림)
+
+# 히스토그램 구간 (초). Prometheus 기본값과 비슷하게, 대신 1ms 쪽을 더 촘촘하게
+REQUEST_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+QUERY_COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 500)
+
+_current = contextvars.ContextVar("metrics_request", default=None)
+_WS_RE = re.compile(r"\s+")
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)    # 마지막 칸은 +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        i = 0
+        while i < len(self.buckets) and value > self.buckets[i]:
+            i += 1
+        self.counts[i] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def quantile(self, q):
+        """구간 경계로 어림한 백분위 (정확한 값이 아니라 '이 구간 이하', 최댓값을 넘지 않게)"""
+        if not self.count:
+            return None
+        target = q * self.count
+        seen = 0
+        for bound, c in zip(self.buckets, self.counts):
+            seen += c
+            if seen >= target:
+                return min(bound, self.max)
+        return self.max
+
+    def as_dict(self, scale=1.0):
+        return {
+            "count": self.count,
+            "sum": round(self.sum * scale, 3),
+            "max": round(self.max * scale, 3),
+            "p50": _scaled(self.quantile(0.5), scale),
+            "p90": _scaled(self.quantile(0.9), scale),
+            "p99": _scaled(self.quantile(0.99), scale),
+            # [상한, 누적 횟수] 목록 (Prometheus 의 le 와 같은 의미)
+            "buckets": [[round(b * scale, 4), c] for b, c in zip(self.buckets, self.cumulative())]
+                       + [["+Inf", self.count]],
+        }
+
+    def cumulative(self):
+        out = []
+        total = 0
+        for c in self.counts[:-1]:
+            total += c
+            out.append(total)
+        return out
+
+
+def _scaled(value, scale):
+    return None if value is None else round(value * scale, 3)
+
+
+class RequestStats:
+    """요청 하나 동안 실행한 쿼리 수 / 시간"""
+    __slots__ = ("endpoint", "queries", "query_seconds")
+
+    def __init__(self, endpoint):
+        self.endpoint = endpoint
+        self.queries = 0
+        self.query_seconds = 0.0
+
+
+class Metrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started_at = time.time()
+        self._requests = {}        # (endpoint, method) -> Histogram (초)
+        self._statuses = {}        # (endpoint, method, status) -> 횟수
+        self._request_queries = {}  # endpoint -> Histogram (쿼리 수)
+        self._request_sql = {}     # endpoint -> Histogram (요청 안 쿼리 시간 합, 초)
+        self._queries = {}         # db 이름 -> Histogram (초)
+        self._slow = OrderedDict()  # (db, sql) -> 느린 쿼리 기록
+
+    # ---- 요청 ----
+
+    def begin_request(self, endpoint):
+        stats = RequestStats(endpoint)
+        _current.set(stats)
+        return stats
+
+    def finish_request(self, stats, method, status, seconds):
+        if _current.get() is stats:
+            _current.set(None)
+        key = (stats.endpoint, method)
+        with self._lock:
+            hist = self._requests.get(key)
+            if hist is None:
+                hist = self._requests[key] = Histogram(REQUEST_BUCKETS)
+            hist.observe(seconds)
+            skey = (stats.endpoint, method, status)
+            self._statuses[skey] = self._statuses.get(skey, 0) + 1
+            hist = self._request_queries.get(stats.endpoint)
+            if hist is None:
+                hist = self._request_queries[stats.endpoint] = Histogram(QUERY_COUNT_BUCKETS)
+            hist.observe(stats.queries)
+            hist = self._request_sql.get(stats.endpoint)
+            if hist is None:
+                hist = self._request_sql[stats.endpoint] = Histogram(REQUEST_BUCKETS)
+            hist.observe(stats.query_seconds)
+
+    # ---- 쿼리 ----
+
+    def observe_query(self, conn, sql, params, seconds, many=False):
+        stats = _current.get()
+        if stats is not None:
+            stats.queries += 1
+            stats.query_seconds += seconds
+        with self._lock:
+            hist = self._queries.get(conn.db_name)
+            if hist is None:
+                hist = self._queries[conn.db_name] = Histogram(QUERY_BUCKETS)
+            hist.observe(seconds)
+        if seconds * 1000 >= SLOW_QUERY_MS:
+            self._record_slow(conn, sql, params, seconds, many, stats)
+
+    def _record_slow(self, conn, sql, params, seconds, many, stats):
+        text = _WS_RE.sub(" ", sql).strip()
+        key = (conn.db_name, text)
+        with self._lock:
+            entry = self._slow.get(key)
+        plan = entry["plan"] if entry else None
+        if plan is None and not many:
+            plan = explain(conn, sql, params)
+        with self._lock:
+            entry = self._slow.pop(key, None) or {
+                "db": conn.db_name, "sql": text, "count": 0, "max_ms": 0.0, "total_ms": 0.0,
+            }
+            entry["count"] += 1
+            entry["max_ms"] = round(max(entry["max_ms"], seconds * 1000), 3)
+            entry["total_ms"] = round(entry["total_ms"] + seconds * 1000, 3)
+            entry["last_ms"] = round(seconds * 1000, 3)
+            entry["last_at"] = time.strftime("%Y-%m-%dT%H:%M:%S")
+            entry["endpoint"] = stats.endpoint if stats else None
+            entry["plan"] = plan
+            self._slow[key] = entry
+            while len(self._slow) > SLOW_QUERY_KEEP:
+                self._slow.popitem(last=False)
+
+    # ---- 출력 ----
+
+    def snapshot(self):
+        """JSON 용 (시간 단위는 ms)"""
+        with self._lock:
+            requests = {}
+            for (endpoint, method), hist in sorted(self._requests.items()):
+                requests.setdefault(endpoint, {})[method] = hist.as_dict(1000)
+            statuses = {}
+            for (endpoint, method, status), n in sorted(self._statuses.items()):
+                statuses.setdefault(endpoint, {})[f"{method} {status}"] = n
+            per_request = {
+                endpoint: {
+                    "queries": self._request_queries[endpoint].as_dict(),
+                    "sql_ms": self._request_sql[endpoint].as_dict(1000),
+                }
+                for endpoint in sorted(self._request_queries)
+            }
+            queries = {db: hist.as_dict(1000) for db, hist in sorted(self._queries.items())}
+            slow = sorted((dict(e) for e in self._slow.values()), key=lambda e: -e["max_ms"])
+        return {
+            "pid": os.getpid(),
+            "uptime_seconds": round(time.time() - self.started_at, 1),
+            "slow_query_ms": SLOW_QUERY_MS,
+            "requests": requests,
+            "statuses": statuses,
+            "request_sql": per_request,
+            "queries": queries,
+            "slow_queries": slow,
+        }
+
+    def prometheus(self, prefix="mahjong"):
+        """Prometheus 텍스트 노출 형식 (시간 단위는 초)"""
+        lines = []
+        with self._lock:
+            _prom_histograms(lines, f"{prefix}_request_duration_seconds", "요청 처리 시간",
+                             {(("endpoint", e), ("method", m)): h for (e, m), h in self._requests.items()})
+            lines.append(f"# HELP {prefix}_requests_total 요청 수 (상태 코드별)")
+            lines.append(f"# TYPE {prefix}_requests_total counter")
+            for (endpoint, method, status), n in sorted(self._statuses.items()):
+                labels = _prom_labels((("endpoint", endpoint), ("method", method), ("status", str(status))))
+                lines.append(f"{prefix}_requests_total{{{labels}}} {n}")
+            _prom_histograms(lines, f"{prefix}_request_queries", "요청 하나에서 실행한 쿼리 수",
+                             {(("endpoint", e),): h for e, h in self._request_queries.items()})
+            _prom_histograms(lines, f"{prefix}_request_sql_seconds", "요청 하나에서 쿼리에 쓴 시간",
+                             {(("endpoint", e),): h for e, h in self._request_sql.items()})
+            _prom_histograms(lines, f"{prefix}_sql_duration_seconds", "쿼리 실행 시간",
+                             {(("db", db),): h for db, h in self._queries.items()})
+            lines.append(f"# HELP {prefix}_slow_queries 느린 쿼리 종류별 횟수 (SLOW_QUERY_MS 이상)")
+            lines.append(f"# TYPE {prefix}_slow_queries gauge")
+            for e in self._slow.values():
+                labels = _prom_labels((("db", e["db"]), ("sql", e["sql"][:200])))
+                lines.append(f"{prefix}_slow_queries{{{labels}}} {e['count']}")
+        return "\n".join(lines) + "\n"
+
+
+def _prom_escape(value):
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _prom_labels(pairs):
+    return ",".join(f'{k}="{_prom_escape(v)}"' for k, v in pairs)
+
+
+def _prom_histograms(lines, name, help_text, series):
+    lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} histogram")
+    for labels, hist in sorted(series.items()):
+        for bound, c in zip(hist.buckets, hist.cumulative()):
+            lines.append(f"{name}_bucket{{{_prom_labels(labels + (('le', f'{bound:g}'),))}}} {c}")
+        lines.append(f"{name}_bucket{{{_prom_labels(labels + (('le', '+Inf'),))}}} {hist.count}")
+        lines.append(f"{name}_sum{{{_prom_labels(labels)}}} {hist.sum:.6f}")
+        lines.append(f"{name}_count{{{_prom_labels(labels)}}} {hist.count}")
+
+
+def explain(conn, sql, params):
+    """EXPLAIN QUERY PLAN 결과 (detail 문자열 목록). 실패하면 None"""
+    try:
+        rows = sqlite3.Connection.execute(conn, "EXPLAIN QUERY PLAN " + sql, params or ()).fetchall()
+    except sqlite3.Error:
+        return None
+    return [r[-1] for r in rows]
+
+
+class ProfiledConnection(sqlite3.Connection):
+    """
+    execute / executemany / executescript 시간을 metrics 에 기록하는 커넥션.
+    sqlite3.connect(..., factory=ProfiledConnection) 으로 연 뒤 db_name / metrics 를 지정.
+    재는 시간은 execute 호출 구간이라 정렬 / 집계(첫 행에서 끝남)는 포함되고,
+    단순 스캔 결과를 나중에 fetch 하는 시간은 빠집니다.
+    """
+    db_name = "?"
+    metrics = None
+
+    def execute(self, sql, params=()):
+        if self.metrics is None:
+            return super().execute(sql, params)
+        t0 = time.perf_counter()
+        try:
+            return super().execute(sql, params)
+        finally:
+            self.metrics.observe_query(self, sql, params, time.perf_counter() - t0)
+
+    def executemany(self, sql, seq):
+        if self.metrics is None:
+            return super().executemany(sql, seq)
+        t0 = time.perf_counter()
+        try:
+            return super().executemany(sql, seq)
+        finally:
+            self.metrics.observe_query(self, sql, None, time.perf_counter() - t0, many=True)
+
+    def executescript(self, script):
+        if self.metrics is None:
+            return super().executescript(script)
+        t0 = time.perf_counter()
+        try:
+            return super().executescript(script)
+        finally:
+            self.metrics.observe_query(self, script, None, time.perf_counter() - t0, many=True)
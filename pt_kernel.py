@@ -0,0 +1,84 @@
+"""
+pt / 등수 일괄 계산 커널
+
+여러 판의 점수를 (N, 4) 배열로 한 번에 계산합니다. NumPy 가 있으면 벡터 연산,
+없으면 같은 결과를 내는 한 판씩 계산으로 동작 (NumPy 는 선택 사항).
+우마 / 반환점은 인자로 받고, 상수와 DB 처리는 app.py 쪽에서.
+"""
+try:
+    import numpy as np
+except ImportError:   # NumPy 없이도 동작 (느린 경로)
+    np = None
+
+HAS_NUMPY = np is not None
+VECTOR_MIN_ROWS = 64   # 이보다 적은 판은 배열을 만드는 비용이 더 커서 한 판씩 계산
+
+
+# ---- 한 판 계산 (기준 구현) ----
+
+def calc_order(scores):
+    """점수 내림차순 자리 순서 (동점이면 앞자리 우선)"""
+    return sorted(range(4), key=lambda i: scores[i], reverse=True)
+
+
+def calc_pts(scores, uma, return_score):
+    """4인 점수 -> 우마/오카 반영 pt"""
+    uma_for_player = [0, 0, 0, 0]
+    for rank, idx in enumerate(calc_order(scores)):
+        uma_for_player[idx] = uma[rank]
+    return [(scores[i] - return_score) / 1000.0 + uma_for_player[i] for i in range(4)]
+
+
+def calc_ranks(scores):
+    """4인 점수 -> 각 자리의 등수(1~4)"""
+    ranks = [0, 0, 0, 0]
+    for rank, idx in enumerate(calc_order(scores)):
+        ranks[idx] = rank + 1
+    return ranks
+
+
+# ---- 여러 판 일괄 계산 ----
+
+def score_games(scores, uma, return_score):
+    """
+    scores: 판마다 4인 점수 목록 (N, 4)
+    반환: (pts, ranks) — 판마다 [pt 4개] (소수 첫째 자리 반올림), [등수 4개] 의 리스트
+    """
+    if not HAS_NUMPY or len(scores) < VECTOR_MIN_ROWS:
+        pts = [[round(p, 1) for p in calc_pts(s, uma, return_score)] for s in scores]
+        return pts, [calc_ranks(s) for s in scores]
+
+    arr = np.asarray(scores, dtype=np.int64).reshape(-1, 4)
+    n = arr.shape[0]
+    # 안정 정렬이라 동점이면 앞자리가 높은 등수 (calc_order 와 같음)
+    order = np.argsort(-arr, axis=1, kind="stable")
+    ranks = np.empty_like(order)
+    ranks[np.arange(n)[:, None], order] = np.arange(1, 5)
+
+    diff = arr - return_score
+    raw = diff / 1000.0 + np.asarray(uma, dtype=np.float64)[ranks - 1]
+    pts = np.round(raw, 1)
+    # 100점 단위가 아닌 점수(xx50)는 반올림 경계라 round() 와 어긋날 수 있으니 그 칸만 다시 계산
+    ties = np.nonzero(diff % 100 == 50)
+    for r, c in zip(*ties):
+        pts[r, c] = round(float(raw[r, c]), 1)
+    return pts.tolist(), ranks.tolist()
+
+
+def aggregate_players(names, pts, ranks):
+    """
+    판별 이름 / pt / 등수 (각 (N, 4)) -> {이름: [판수, pt 합, 1등, 2등, 3등, 4등]}
+    빈 이름 칸은 건너뜀. 입력이 파이썬 리스트라 배열로 바꾸는 비용이 루프와 비슷해서
+    여기는 dict 한 번 훑기로 충분합니다.
+    """
+    out = {}
+    for row_names, row_pts, row_ranks in zip(names, pts, ranks):
+        for i in range(4):
+            name = (row_names[i] or "").strip()
+            if not name:
+                continue
+            d = out.setdefault(name, [0, 0.0, 0, 0, 0, 0])
+            d[0] += 1
+            d[1] += row_pts[i]
+            d[1 + row_ranks[i]] += 1
+    return out
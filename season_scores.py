@@ -0,0 +1,73 @@
+"""
+시즌 점수 계산 (script.js 의 calculateSeasonScore / buildSeasonSummary 서버 버전)
+
+DB 접근 없이 순수 계산만 담당합니다. 쿼리와 캐시는 app.py 쪽에서 처리.
+"""
+import math
+import re
+
+# 기본 시즌 구간: 2025년 1월 ~ 6월
+SEASON_YEAR2 = 25
+SEASON_FROM = 1
+SEASON_TO = 6
+SEASON_MIN_GAMES = 4   # 시즌 랭킹에 들어가는 최소 개인전 판수
+
+# "25년 3월 대회", "2025-03월 대회" 등
+SEASON_ARCHIVE_RE = re.compile(r"(?:20)?(\d{2})\s*[-년]?\s*(\d{1,2})\s*월")
+
+
+def archive_in_season(name, year2, month_from, month_to):
+    """아카이브 이름이 해당 시즌의 월례 대회인지 ("대회" 포함 + 연/월 범위)"""
+    name = name or ""
+    if "대회" not in name:
+        return False
+    m = SEASON_ARCHIVE_RE.search(name)
+    if not m:
+        return False
+    return int(m.group(1)) == year2 and month_from <= int(m.group(2)) <= month_to
+
+
+def calculate_season_score(total_pt, games, t_join, t_sum):
+    total_pt_score = 500 * (2 / math.pi) * math.atan(total_pt / 250)
+    games_score = 200 * (1 - math.pow(0.95, games))
+    tournament_score = min(t_join, 3) * 50 + 150 * (1 - math.pow(0.995, max(t_sum, 0)))
+    return {
+        "total_pt_score": total_pt_score,
+        "games_score": games_score,
+        "tournament_score": tournament_score,
+        "season_score": total_pt_score + games_score + tournament_score,
+    }
+
+
+def tournament_stats(rows):
+    """
+    rows: (archive_id, player_name, 양수 pt 합) 이터러블
+    반환: {이름: {"join_count": 참가한 대회 수, "pt_sum": 양수 pt 합}}
+    """
+    out = {}
+    for archive_id, name, pt_sum in rows:
+        s = out.setdefault(name, {"join_count": 0, "pt_sum": 0.0})
+        s["join_count"] += 1
+        s["pt_sum"] += pt_sum or 0.0
+    return out
+
+
+def build_season_summary(players, t_stats, min_games=SEASON_MIN_GAMES):
+    """
+    players: {"name", "games", "total_pt"} 딕셔너리 목록 (개인전 누적)
+    t_stats: tournament_stats() 결과
+    시즌 점수 내림차순 목록을 반환
+    """
+    summary = []
+    for p in players:
+        if (p["games"] or 0) < min_games:
+            continue
+        t = t_stats.get(p["name"]) or {"join_count": 0, "pt_sum": 0.0}
+        row = {"name": p["name"]}
+        row.update(calculate_season_score(p["total_pt"] or 0.0, p["games"],
+                                          t["join_count"], t["pt_sum"]))
+        row["tournament_join"] = t["join_count"]
+        row["tournament_pt_sum"] = t["pt_sum"]
+        summary.append(row)
+    summary.sort(key=lambda r: r["season_score"], reverse=True)
+    return summary
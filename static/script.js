@@ -3,13 +3,19 @@ const API_BASE = "/mahjong_rating";
 const UMA_VALUES = (window.GAME_CONFIG && window.GAME_CONFIG.uma) ? window.GAME_CONFIG.uma : [50, 10, -10, -30];
 const RETURN_SCORE = (window.GAME_CONFIG && window.GAME_CONFIG.return_score) ? Number(window.GAME_CONFIG.return_score) : 30000;
 
-// 전체 게임 / 플레이어 요약 캐시 (통계 화면용)
+// 전체 게임 / 플레이어 요약 캐시
 let ALL_GAMES = [];
+let ALL_GAMES_LOADED = false;  // ✅ /api/rankings 가 실패했을 때만 전체 기록 로드
+let PLAYER_GAMES = { name: "", games: [], tournament: [] }; // ✅ 선택한 플레이어의 대국만 (/api/players/<name>/games)
+const GAME_PAGE_SIZE = 50;     // 대국 기록 한 페이지
+let GAMES_NEXT_CURSOR = null;  // 다음 페이지 커서 (X-Next-Cursor)
+let CHANGES_SEQ = null;        // 화면 캐시(대국 표 / 대회 / 뱃지 / 아카이브)가 반영한 /api/changes 시퀀스
 let PLAYER_SUMMARY = [];       // ✅ 개인 레이팅 표(4판 이상) 전용
 let PLAYER_SUMMARY_ALL = [];   // ✅ 게임 기준 전체 플레이어(필터 전)
 let STATS_PLAYER_LIST = [];    // ✅ 개인별 통계 셀렉트 전용(뱃지 포함)
 
 let ALL_BADGES = [];
+let STATS_PLAYER_BADGES = { name: "", badges: [] }; // 개인별 통계에 표시 중인 뱃지
 
 let RANKING_VIEW_MODE = "pt"; // "pt" | "season"
 let TOURNAMENT_STATS = {};    // { [name]: { games, sumPosPt } }
@@ -30,13 +36,13 @@ let ARCHIVE_RANKING_SORT = { key: "total_pt", dir: "desc" }; // 아카이브 전
 
 // ===== 대회 전용 =====
 let TOURNAMENT_GAMES = [];
+let TOURNAMENT_LOADED = false; // 대회 탭을 처음 열 때 전체 로드, 이후엔 변경분만 반영
 
 let STATS_BADGE_ONLY_START = -1; // ✅ 셀렉트에서 "뱃지만 보유" 구역 시작 인덱스
 
 const SEASON_YEAR2 = 25;  // 2025 -> 25
 const SEASON_FROM = 1;
 const SEASON_TO = 6;
-let SEASON_TOURNAMENT_STATS = null; // { [name]: { joinCount, ptSum } }
 
 
 // ======================= 유틸리티 함수 =======================
@@ -59,6 +65,24 @@ function calcPts(scores) {
   });
 }
 
+// 서버가 저장해 둔 pt / 등수 (player1_pt.., player1_rank..)가 있으면 그대로 사용
+function gamePts(g, scores) {
+  if (g && g.player1_pt != null) {
+    return [g.player1_pt, g.player2_pt, g.player3_pt, g.player4_pt].map(Number);
+  }
+  return calcPts(scores);
+}
+
+function gameRanks(g, scores) {
+  if (g && g.player1_rank != null) {
+    return [g.player1_rank, g.player2_rank, g.player3_rank, g.player4_rank].map(Number);
+  }
+  const order = scores.map((s, i) => ({ s, i })).sort((a, b) => b.s - a.s);
+  const ranks = [0, 0, 0, 0];
+  order.forEach((o, pos) => (ranks[o.i] = pos + 1));
+  return ranks;
+}
+
 // 시간 포맷 (UTC -> KST)
 function formatKoreanTime(isoString) {
   if (!isoString) return "";
@@ -121,12 +145,37 @@ async function fetchJSON(url, options = {}) {
     throw new Error(msg);
   }
   try {
-    return await res.json();
+    return decodeColumnar(await res.json());
   } catch (_) {
     return null;
   }
 }
 
+// ?format=columnar 응답(열마다 배열 + 선수 이름 사전)을 객체 배열로 풀기. 다른 응답은 그대로
+function decodeColumnar(data) {
+  if (!data || data.format !== "columnar") return data;
+  const keys = Object.keys(data.columns);
+  const names = new Set(data.name_columns);
+  const rows = new Array(data.count);
+  for (let i = 0; i < data.count; i++) {
+    const row = {};
+    for (const key of keys) {
+      const value = data.columns[key][i];
+      row[key] = names.has(key) ? data.players[value] : value;
+    }
+    rows[i] = row;
+  }
+  return rows;
+}
+
+// 대국 목록 한 페이지 조회 (다음 페이지 커서는 X-Next-Cursor 헤더)
+async function fetchGamePage(url) {
+  const res = await fetch(url);
+  if (!res.ok) throw new Error(`HTTP ${res.status}`);
+  const games = decodeColumnar(await res.json());
+  return { games: games || [], nextCursor: res.headers.get("X-Next-Cursor") };
+}
+
 // 정렬 화살표 업데이트
 // 정렬 화살표 업데이트 (삭제됨)
 function updateSortIndicatorsForTable(tableId, sortState) {
@@ -148,29 +197,25 @@ function sortPlayersByState(list, sortState) {
   return arr;
 }
 
-// 시즌 점수 계산 (공통)
-function calculateSeasonScore(totalPt, games, tJoin, tSum) {
-  const totalPtScore = 500 * (2 / Math.PI) * Math.atan(totalPt / 250);
-  const gamesScore = 200 * (1 - Math.pow(0.95, games));
-  const tournamentScore = (Math.min(tJoin, 3) * 50) + 150 * (1 - Math.pow(0.995, Math.max(tSum, 0)));
-  const sum = totalPtScore + gamesScore + tournamentScore;
-  return { totalPtScore, gamesScore, tournamentScore, sum };
-}
-
-
 // ======================= 공통 렌더링 함수 =======================
 
 // 1. 대국 기록 리스트 렌더링 (개인전, 아카이브, 대회전)
-// options: { onDelete: async (id) => { ... }, useIndexNumbering: bool }
+// options: { onDelete: async (id) => { ... }, useIndexNumbering: bool, append: bool, prepend: bool }
 function renderGameList(tbodyId, games, options = {}) {
   const tbody = document.getElementById(tbodyId);
   if (!tbody) return;
 
-  tbody.innerHTML = "";
-  if (!games || games.length === 0) {
+  const keep = options.append || options.prepend;
+  if (!keep) tbody.innerHTML = "";
+  if (!keep && (!games || games.length === 0)) {
     tbody.innerHTML = '<tr><td colspan="7" class="ranking-placeholder">기록이 없습니다.</td></tr>';
     return;
   }
+  if (options.prepend) {
+    const placeholder = tbody.querySelector(".ranking-placeholder");
+    if (placeholder) placeholder.closest("tr").remove();
+  }
+  const firstRow = tbody.firstChild;
 
   games.forEach((g, index) => {
     const scores = [
@@ -182,14 +227,13 @@ function renderGameList(tbodyId, games, options = {}) {
       g.player3_name, g.player4_name,
     ].map((n) => (n || "").trim());
 
-    const pts = calcPts(scores);
+    const pts = gamePts(g, scores);
 
-    const order = scores.map((s, i) => ({ s, i })).sort((a, b) => b.s - a.s);
-    const ranks = [0, 0, 0, 0];
-    order.forEach((o, idx) => (ranks[o.i] = idx + 1));
+    const ranks = gameRanks(g, scores);
 
     const tr = document.createElement("tr");
     tr.className = ""
+    if (g.id) tr.dataset.gameId = g.id;
 
     // ID, Time (use index if useIndexNumbering is true)
     const displayId = options.useIndexNumbering ? (index + 1) : (g.id || "");
@@ -220,7 +264,8 @@ function renderGameList(tbodyId, games, options = {}) {
       tdDel.appendChild(btn);
     }
 
-    tbody.appendChild(tr);
+    if (options.prepend) tbody.insertBefore(tr, firstRow);
+    else tbody.appendChild(tr);
   });
 }
 
@@ -238,11 +283,9 @@ function calculateStatsFromGames(games) {
       g.player3_name, g.player4_name,
     ].map((n) => (n || "").trim());
 
-    const pts = calcPts(scores);
+    const pts = gamePts(g, scores);
 
-    const order = scores.map((s, i) => ({ s, i })).sort((a, b) => b.s - a.s);
-    const ranks = [0, 0, 0, 0];
-    order.forEach((o, idx) => (ranks[o.i] = idx + 1));
+    const ranks = gameRanks(g, scores);
 
     for (let i = 0; i < 4; i++) {
       const name = names[i];
@@ -314,7 +357,7 @@ function renderRankingTable(tbodyId, players, sortState, tableIdForIndicators, e
 
 // ======================= 앱 초기화 =======================
 
-document.addEventListener("DOMContentLoaded", () => {
+document.addEventListener("DOMContentLoaded", async () => {
   setupViewSwitch();
 
   setupPersonalForm();
@@ -330,14 +373,236 @@ document.addEventListener("DOMContentLoaded", () => {
 
   setupAdminView();
   setupChartFilters(); // Added chart filters setup
+
+  const moreBtn = document.getElementById("games-more-btn");
+  if (moreBtn) moreBtn.addEventListener("click", loadMoreGames);
   setupMobileSwipe(); // 모바일 스와이프
 
+  // 목록을 받기 전의 변경 시퀀스를 먼저 기록 (그 사이 변경은 첫 동기화 때 다시 반영됨)
+  await initChangeSeq();
   loadGamesAndRanking(); // 개인전 데이터 로드
   reloadBadgeList();
   reloadArchiveList();
+  setupLiveUpdates(); // 다른 기기에서 입력한 대국/뱃지 실시간 반영
 });
 
 
+// ======================= 실시간 업데이트 (SSE / 폴링) =======================
+// /api/stream 이벤트로 전체를 다시 받지 않고 바뀐 부분만 반영.
+// 서버가 SSE 를 못 쓰는 실행 방식(sync 워커)이거나 연결이 거절되면 /api/changes 폴링으로 대신함
+
+const LIVE_POLL_MS = 15000;
+let LIVE_SYNC_TIMER = null;
+let CHANGE_POLLING = false;
+
+function setupLiveUpdates() {
+  if (!window.GAME_CONFIG.live_stream || !window.EventSource) {
+    startChangePolling();
+    return;
+  }
+  const source = new EventSource(`${API_BASE}/api/stream`);
+  const on = (kind, fn) => source.addEventListener(kind, (e) => {
+    try { fn(JSON.parse(e.data)); } catch (err) { console.warn(err); }
+  });
+
+  // 대국 추가/삭제는 이벤트에 랭킹까지 실려 오므로 바로 반영, 나머지는 /api/changes 로 변경분만
+  on("game_added", onLiveGameAdded);
+  on("game_deleted", onLiveGameDeleted);
+  ["badge_granted", "badge_revoked", "badge_deleted", "reload"].forEach((kind) => on(kind, scheduleChangeSync));
+
+  // 503 등으로 브라우저가 재접속을 포기하면 폴링으로 전환
+  source.onerror = () => {
+    if (source.readyState === EventSource.CLOSED) startChangePolling();
+  };
+}
+
+// 탭이 보이는 동안 LIVE_POLL_MS 마다 /api/changes 변경분 반영
+function startChangePolling() {
+  if (CHANGE_POLLING) return;
+  CHANGE_POLLING = true;
+  const tick = async () => {
+    if (!document.hidden) await syncChanges();
+    setTimeout(tick, LIVE_POLL_MS);
+  };
+  setTimeout(tick, LIVE_POLL_MS);
+}
+
+// 여러 이벤트가 몰려와도 한 번만 동기화
+function scheduleChangeSync() {
+  clearTimeout(LIVE_SYNC_TIMER);
+  LIVE_SYNC_TIMER = setTimeout(syncChanges, 300);
+}
+
+function onLiveGameAdded({ table, game, rankings }) {
+  if (table === "tournament_games") {
+    if (TOURNAMENT_GAMES.some((g) => g.id === game.id)) return;
+    TOURNAMENT_GAMES.unshift(game);
+    renderTournamentView();
+    return;
+  }
+  if (table !== "games") return;
+
+  const tbody = document.getElementById("games-tbody");
+  if (tbody && !tbody.querySelector(`tr[data-game-id="${game.id}"]`)) {
+    renderGameList("games-tbody", [game], { ...PERSONAL_GAME_LIST_OPTIONS, prepend: true });
+  }
+  ALL_GAMES_LOADED = false;
+  applyLiveRankings(rankings);
+}
+
+function onLiveGameDeleted({ table, id, rankings }) {
+  if (table === "tournament_games") {
+    TOURNAMENT_GAMES = TOURNAMENT_GAMES.filter((g) => g.id !== id);
+    renderTournamentView();
+    return;
+  }
+  if (table !== "games") return;
+
+  const tr = document.querySelector(`#games-tbody tr[data-game-id="${id}"]`);
+  if (tr) tr.remove();
+  ALL_GAMES_LOADED = false;
+  applyLiveRankings(rankings);
+}
+
+// 바뀐 플레이어 행만 교체하고 랭킹 표/시즌 점수 다시 그리기
+async function applyLiveRankings(rankings) {
+  if (!rankings || !rankings.length) return;
+  const byName = new Map((PLAYER_SUMMARY_ALL || []).map((p) => [p.name, p]));
+  rankings.forEach((r) => {
+    if (r.removed) byName.delete(r.name);
+    else byName.set(r.name, r);
+  });
+  PLAYER_SUMMARY_ALL = [...byName.values()];
+  PLAYER_SUMMARY = PLAYER_SUMMARY_ALL.filter((p) => (p.games || 0) >= 4);
+  SEASON_SUMMARY = await buildSeasonSummary();
+  renderMainRanking();
+}
+
+// ======================= 델타 동기화 (/api/changes) =======================
+// 한 번 받은 목록은 CHANGES_SEQ 이후 변경분(put / delete / reset)만 받아 화면 캐시에 반영
+// (개인전 대국 표, 대회 기록, 뱃지 목록, 개인별 통계 뱃지, 아카이브 목록)
+
+let CHANGES_SYNC = Promise.resolve();
+
+async function initChangeSeq() {
+  try {
+    CHANGES_SEQ = (await fetchJSON(`${API_BASE}/api/changes?limit=0`)).seq;
+  } catch (err) {
+    console.warn(err);
+  }
+}
+
+// 여러 곳에서 동시에 불려도 차례대로 (같은 변경분을 두 번 받지 않게)
+function syncChanges() {
+  CHANGES_SYNC = CHANGES_SYNC.then(pullChanges).catch((err) => console.warn(err));
+  return CHANGES_SYNC;
+}
+
+async function pullChanges() {
+  if (CHANGES_SEQ === null) {
+    // 시작할 때 시퀀스를 못 받았으면 지금부터 기록하고 한 번 전체를 다시 받음
+    await initChangeSeq();
+    if (CHANGES_SEQ !== null) {
+      loadGamesAndRanking();
+      reloadBadgeList();
+      reloadArchiveList();
+      if (TOURNAMENT_LOADED) loadTournamentGamesAndRanking();
+    }
+    return;
+  }
+  const changes = [];
+  let hasMore = true;
+  while (hasMore) {
+    const res = await fetchJSON(`${API_BASE}/api/changes?since=${CHANGES_SEQ}`);
+    changes.push(...(res.changes || []));
+    CHANGES_SEQ = res.seq;
+    hasMore = res.has_more;
+  }
+  if (changes.length) applyChanges(changes);
+}
+
+// 목록 캐시에 변경 하나 적용 (put: 추가/교체, delete: 삭제, reset: 비움)
+function patchById(list, { op, id, row }) {
+  if (op === "reset") return [];
+  const rest = (list || []).filter((x) => x.id !== id);
+  if (op === "put") rest.push(row);
+  return rest;
+}
+
+function applyChanges(changes) {
+  const byTable = {};
+  changes.forEach((c) => (byTable[c.table] = byTable[c.table] || []).push(c));
+
+  const games = byTable.games || [];
+  if (games.length) {
+    ALL_GAMES_LOADED = false;
+    // 리셋이나 대량 가져오기는 첫 페이지를 새로 받는 편이 가벼움
+    if (games.length > GAME_PAGE_SIZE || games.some((c) => c.op === "reset")) {
+      loadGamesAndRanking();
+    } else {
+      games.forEach(patchGameRow);
+      reloadRankings();
+    }
+  }
+  if (byTable.tournament_games && TOURNAMENT_LOADED) {
+    byTable.tournament_games.forEach((c) => { TOURNAMENT_GAMES = patchById(TOURNAMENT_GAMES, c); });
+    TOURNAMENT_GAMES.sort((a, b) => (b.id || 0) - (a.id || 0));
+    renderTournamentView();
+  }
+  if (byTable.badges) {
+    byTable.badges.forEach((c) => { ALL_BADGES = patchById(ALL_BADGES, c); });
+    ALL_BADGES.sort((a, b) => a.code - b.code);
+    renderBadgeList();
+  }
+  if (byTable.player_badges) patchPlayerBadges(byTable.player_badges);
+  if (byTable.archives) {
+    byTable.archives.forEach((c) => { ARCHIVES = patchById(ARCHIVES, c); });
+    ARCHIVES.sort((a, b) => b.id - a.id);
+    // 선택해 둔 아카이브가 바뀐 경우에만 그 기록을 다시 받음
+    const sel = document.getElementById("archive-select");
+    renderArchiveList(!!sel && byTable.archives.some((c) => c.op === "reset" || String(c.id) === sel.value));
+  }
+}
+
+// 대국 표(불러온 페이지)에 보이는 행만 교체/삭제하고, 더 최신 대국이면 맨 위에 추가
+function patchGameRow({ op, id, row }) {
+  const tbody = document.getElementById("games-tbody");
+  if (!tbody) return;
+  const old = tbody.querySelector(`tr[data-game-id="${id}"]`);
+  if (op === "delete") {
+    if (old) old.remove();
+    return;
+  }
+  const newest = tbody.querySelector("tr[data-game-id]");
+  if (!old && newest && id < Number(newest.dataset.gameId)) return; // 아직 안 불러온 예전 페이지
+  renderGameList("games-tbody", [row], { ...PERSONAL_GAME_LIST_OPTIONS, prepend: true });
+  if (old) old.replaceWith(tbody.firstElementChild);
+}
+
+// 개인별 통계에 보이는 플레이어의 뱃지, 그리고 뱃지만 받은 새 플레이어는 셀렉트에 추가
+function patchPlayerBadges(changes) {
+  const shown = STATS_PLAYER_BADGES;
+  let shownChanged = false;
+  let listChanged = false;
+  changes.forEach((c) => {
+    const name = c.op === "put" ? c.row.player_name : null;
+    if (shown.name && (c.op === "reset" || name === shown.name || shown.badges.some((b) => b.id === c.id))) {
+      shown.badges = patchById(shown.badges, c);
+      shownChanged = true;
+    }
+    if (name && !STATS_PLAYER_LIST.some((p) => p.name === name)) {
+      STATS_PLAYER_LIST.push({ name, games: 0, total_pt: 0 });
+      listChanged = true;
+    }
+  });
+  if (shownChanged) {
+    shown.badges.sort((a, b) => String(a.granted_at).localeCompare(String(b.granted_at)) || a.id - b.id);
+    renderStatsPlayerBadges();
+  }
+  if (listChanged) setStatsPlayerList(STATS_PLAYER_LIST);
+}
+
+
 // ======================= View Switch =======================
 function setupViewSwitch() {
   const views = {
@@ -389,12 +654,9 @@ function setupViewSwitch() {
       setTimeout(() => { if (typeof setupMobileSwipe === 'function') setupMobileSwipe(); }, 50);
 
       if (target === "stats") updateStatsPlayerSelect();
-      if (target === "archive") reloadArchiveList();
-      if (target === "tournament") loadTournamentGamesAndRanking();
-      if (target === "admin") {
-        reloadBadgeList();
-        reloadArchiveList();
-      }
+      // 처음 한 번 받은 목록은 변경분만 반영
+      if (target === "tournament" && !TOURNAMENT_LOADED) loadTournamentGamesAndRanking();
+      else if (target === "archive" || target === "tournament" || target === "admin") syncChanges();
     });
   });
 
@@ -486,48 +748,87 @@ function setupPersonalForm() {
   });
 }
 
+const PERSONAL_GAME_LIST_OPTIONS = {
+  onDelete: (id) => {
+    showConfirm("이 판을 삭제할까요?", async () => {
+      try {
+        await fetchJSON(`${API_BASE}/api/games/${id}`, { method: "DELETE" });
+        await loadGamesAndRanking();
+      } catch (e) { console.error(e); alert("삭제 실패"); }
+    });
+  }
+};
+
+// 개인전 전체 기록 (/api/rankings 실패 시 직접 집계용) - 대국이 바뀌면 다음 호출 때 다시 로드
+async function ensureAllGames() {
+  if (ALL_GAMES_LOADED) return ALL_GAMES;
+  try {
+    const games = await fetchJSON(`${API_BASE}/api/games?format=columnar`);
+    ALL_GAMES = (games || []).slice().sort((a, b) => (b.id || 0) - (a.id || 0));
+    ALL_GAMES_LOADED = true;
+  } catch (err) {
+    console.error(err);
+  }
+  return ALL_GAMES;
+}
+
+function updateGamesMoreButton() {
+  const btn = document.getElementById("games-more-btn");
+  if (btn) btn.style.display = GAMES_NEXT_CURSOR ? "" : "none";
+}
+
+async function loadMoreGames() {
+  if (!GAMES_NEXT_CURSOR) return;
+  try {
+    const page = await fetchGamePage(`${API_BASE}/api/games?format=columnar&limit=${GAME_PAGE_SIZE}&cursor=${GAMES_NEXT_CURSOR}`);
+    GAMES_NEXT_CURSOR = page.nextCursor;
+    renderGameList("games-tbody", page.games, { ...PERSONAL_GAME_LIST_OPTIONS, append: true });
+  } catch (err) {
+    console.error(err);
+  }
+  updateGamesMoreButton();
+}
+
 async function loadGamesAndRanking() {
-  let games = [];
+  let page;
   try {
-    games = await fetchJSON(`${API_BASE}/api/games`);
+    page = await fetchGamePage(`${API_BASE}/api/games?format=columnar&limit=${GAME_PAGE_SIZE}`);
   } catch (err) {
     console.error(err);
     return;
   }
-  // 최신순 정렬
-  games = (games || []).slice().sort((a, b) => (b.id || 0) - (a.id || 0));
-  ALL_GAMES = games;
+  const games = page.games;
+  GAMES_NEXT_CURSOR = page.nextCursor;
+  ALL_GAMES_LOADED = false; // 다음 통계 조회 때 새로 로드
 
-  // 1. 대국 기록 렌더링
-  renderGameList("games-tbody", games, {
-    onDelete: (id) => {
-      showConfirm("이 판을 삭제할까요?", async () => {
-        try {
-          await fetchJSON(`${API_BASE}/api/games/${id}`, { method: "DELETE" });
-          await loadGamesAndRanking();
-        } catch (e) { console.error(e); alert("삭제 실패"); }
-      });
-    }
-  });
+  // 1. 대국 기록 렌더링 (최신 페이지만)
+  renderGameList("games-tbody", games, PERSONAL_GAME_LIST_OPTIONS);
+  updateGamesMoreButton();
 
-  // 2. 플레이어 통계 계산
-  const players = calculateStatsFromGames(games);
-  PLAYER_SUMMARY_ALL = players;
-  PLAYER_SUMMARY = players.filter((p) => (p.games || 0) >= 4); // 4판 이상
+  await reloadRankings();
+}
 
-  // 3. 대회 데이터 로드 (시즌 점수용)
+// 서버 집계 순위로 랭킹 / 시즌 점수 / 통계 셀렉트 갱신 (대국 표는 그대로)
+async function reloadRankings() {
+  // 2. 플레이어 통계 (서버 집계 /api/rankings)
+  let players = [];
   try {
-    const tg = await fetchJSON(`${API_BASE}/api/tournament_games`);
-    TOURNAMENT_GAMES = tg || [];
-  } catch (e) { console.warn(e); TOURNAMENT_GAMES = []; }
+    players = await fetchJSON(`${API_BASE}/api/rankings`);
+  } catch (err) {
+    console.warn(err);
+    players = calculateStatsFromGames(await ensureAllGames());
+  }
+  players = players || [];
+  PLAYER_SUMMARY_ALL = players;
+  PLAYER_SUMMARY = players.filter((p) => (p.games || 0) >= 4); // 4판 이상
 
-  // 4. 시즌 점수 계산
-  SEASON_SUMMARY = await buildSeasonSummary(PLAYER_SUMMARY_ALL);
+  // 3. 시즌 점수 계산
+  SEASON_SUMMARY = await buildSeasonSummary();
 
-  // 5. 랭킹 렌더링
+  // 4. 랭킹 렌더링
   renderMainRanking();
 
-  // 6. 통계 셀렉트 업데이트
+  // 5. 통계 셀렉트 업데이트
   // updateStatsPlayerSelect(); // (renderMainRanking나 rebuildStatsPlayerList에서 호출됨)
   await rebuildStatsPlayerList();
 }
@@ -558,7 +859,11 @@ async function rebuildStatsPlayerList() {
     });
   } catch (e) { console.warn("Failed to load badges:", e); }
 
-  const all = Array.from(map.values());
+  setStatsPlayerList(Array.from(map.values()));
+}
+
+// 대국 있는 플레이어(pt순) 다음에 뱃지만 있는 플레이어(이름순)
+function setStatsPlayerList(all) {
   const withGames = all.filter(p => p.games > 0).sort((a, b) => b.total_pt - a.total_pt || b.games - a.games || String(a.name).localeCompare(String(b.name)));
   const badgeOnly = all.filter(p => p.games === 0).sort((a, b) => String(a.name).localeCompare(String(b.name)));
 
@@ -566,7 +871,7 @@ async function rebuildStatsPlayerList() {
   updateStatsPlayerSelect();
 }
 
-function updateStatsPlayerSelect() {
+async function updateStatsPlayerSelect() {
   const select = document.getElementById("stats-player-select");
   if (!select) return;
   const prev = select.value;
@@ -590,6 +895,22 @@ function updateStatsPlayerSelect() {
   }
 }
 
+// 선택한 플레이어가 참가한 개인전/대회 기록만 서버에서 로드
+async function loadPlayerGames(name) {
+  const base = `${API_BASE}/api/players/${encodeURIComponent(name)}/games`;
+  try {
+    const [games, tournament] = await Promise.all([
+      fetchJSON(`${base}?format=columnar`),
+      fetchJSON(`${base}?format=columnar&table=tournament_games`),
+    ]);
+    PLAYER_GAMES = { name, games: games || [], tournament: tournament || [] };
+  } catch (err) {
+    console.error(err);
+    PLAYER_GAMES = { name, games: [], tournament: [] };
+  }
+  return PLAYER_GAMES;
+}
+
 function computePlayerDetailStats(playerName, games) {
   let totalGames = 0, totalPt = 0, rankCounts = [0, 0, 0, 0];
   let tobiCount = 0, maxScore = null;
@@ -601,10 +922,8 @@ function computePlayerDetailStats(playerName, games) {
     const idx = names.indexOf(playerName);
     if (idx === -1) return;
 
-    const pts = calcPts(scores);
-    const order = scores.map((s, i) => ({ s, i })).sort((a, b) => b.s - a.s);
-    const ranks = [0, 0, 0, 0];
-    order.forEach((o, pos) => ranks[o.i] = pos + 1);
+    const pts = gamePts(g, scores);
+    const ranks = gameRanks(g, scores);
 
     const myRank = ranks[idx];
     totalGames++;
@@ -642,7 +961,7 @@ function computePlayerDetailStats(playerName, games) {
   };
 }
 
-function renderStatsForPlayer(name) {
+async function renderStatsForPlayer(name) {
   const summaryDiv = document.getElementById("stats-summary");
   const rankSection = document.getElementById("stats-rank-section");
   const gamesSection = document.getElementById("stats-games-section");
@@ -690,6 +1009,8 @@ function renderStatsForPlayer(name) {
 
   if (chartHint) chartHint.style.display = "none";
 
+  await loadPlayerGames(name);
+
   renderHistoryGraph(name, "week"); // Render graph (default: 1 week)
 
   // 하위 차트(등수 및 포인트 추이) - 버튼 초기화 후 기본 10판으로 렌더
@@ -699,7 +1020,7 @@ function renderStatsForPlayer(name) {
   renderRecentRankTrend(name, 10);
   renderGameIdPtChart(name, 10);
 
-  const detail = computePlayerDetailStats(name, ALL_GAMES);
+  const detail = computePlayerDetailStats(name, PLAYER_GAMES.games);
 
   // Summary
   summaryDiv.innerHTML = `
@@ -777,41 +1098,55 @@ function renderStatsForPlayer(name) {
 async function loadPlayerBadgesForStats(name) {
   const container = document.getElementById("stats-badges");
   if (!container) return;
-  container.innerHTML = "";
+  STATS_PLAYER_BADGES = { name: name || "", badges: [] };
   if (!name) {
-    container.innerHTML = '<p class="hint-text">플레이어를 선택하세요.</p>';
+    renderStatsPlayerBadges();
     return;
   }
   try {
     const badges = await fetchJSON(`${API_BASE}/api/player_badges/by_player/${encodeURIComponent(name)}`);
-    if (!badges || !badges.length) {
-      container.innerHTML = '<p class="hint-text">보유 뱃지 없음</p>';
-      return;
-    }
-    const list = document.createElement("div");
-    list.className = "badge-list-inner";
-    badges.forEach(b => {
-      const chip = document.createElement("div");
-      chip.className = `badge-chip badge-grade-${b.grade || "기타"}`;
-      const main = document.createElement("div");
-      main.className = "badge-main";
-      main.textContent = b.name;
-      chip.appendChild(main);
-      if (b.description) {
-        const desc = document.createElement("div");
-        desc.className = "badge-desc";
-        desc.textContent = b.description;
-        chip.appendChild(desc);
-      }
-      list.appendChild(chip);
-    });
-    container.appendChild(list);
+    if (STATS_PLAYER_BADGES.name !== name) return; // 그 사이 다른 플레이어를 선택
+    STATS_PLAYER_BADGES.badges = badges || [];
+    renderStatsPlayerBadges();
   } catch (e) {
     console.error(e);
     container.innerHTML = '<p class="hint-text">로드 실패</p>';
   }
 }
 
+function renderStatsPlayerBadges() {
+  const container = document.getElementById("stats-badges");
+  if (!container) return;
+  const { name, badges } = STATS_PLAYER_BADGES;
+  container.innerHTML = "";
+  if (!name) {
+    container.innerHTML = '<p class="hint-text">플레이어를 선택하세요.</p>';
+    return;
+  }
+  if (!badges.length) {
+    container.innerHTML = '<p class="hint-text">보유 뱃지 없음</p>';
+    return;
+  }
+  const list = document.createElement("div");
+  list.className = "badge-list-inner";
+  badges.forEach(b => {
+    const chip = document.createElement("div");
+    chip.className = `badge-chip badge-grade-${b.grade || "기타"}`;
+    const main = document.createElement("div");
+    main.className = "badge-main";
+    main.textContent = b.name;
+    chip.appendChild(main);
+    if (b.description) {
+      const desc = document.createElement("div");
+      desc.className = "badge-desc";
+      desc.textContent = b.description;
+      chip.appendChild(desc);
+    }
+    list.appendChild(chip);
+  });
+  container.appendChild(list);
+}
+
 
 // ======================= 아카이브 =======================
 
@@ -901,9 +1236,7 @@ function renderArchiveRecentRankTrend(targetName, limit = 10) {
     const idx = names.indexOf(targetName);
     if (idx !== -1) {
       const scores = [g.player1_score, g.player2_score, g.player3_score, g.player4_score].map(Number);
-      const order = scores.map((s, i) => ({ s, i })).sort((a, b) => b.s - a.s);
-      const ranks = [0, 0, 0, 0];
-      order.forEach((o, pos) => ranks[o.i] = pos + 1);
+      const ranks = gameRanks(g, scores);
 
       myGames.push({
         id: g.id,
@@ -1011,7 +1344,7 @@ function renderArchiveGameIdPtChart(targetName, limit = 10) {
     const names = [g.player1_name, g.player2_name, g.player3_name, g.player4_name].map(n => (n || "").trim());
     const idx = names.indexOf(targetName);
     if (idx === -1) return;
-    const pts = calcPts(scores);
+    const pts = gamePts(g, scores);
     allCum = +(allCum + pts[idx]).toFixed(1);
     cumByGame.set(g.id, allCum);
   });
@@ -1058,7 +1391,7 @@ function calculateArchiveDailyHistory(targetName) {
 
     const scores = [Number(game.player1_score), Number(game.player2_score), Number(game.player3_score), Number(game.player4_score)];
     const names = [game.player1_name, game.player2_name, game.player3_name, game.player4_name].map(n => (n || "").trim());
-    const pts = calcPts(scores);
+    const pts = gamePts(game, scores);
 
     names.forEach((name, idx) => {
       if (!name) return;
@@ -1186,7 +1519,11 @@ async function reloadArchiveList() {
   let archives = [];
   try { archives = await fetchJSON(`${API_BASE}/api/archives`); } catch (e) { console.error(e); }
   ARCHIVES = archives || [];
+  renderArchiveList();
+}
 
+// ARCHIVES 로 관리 목록 / 선택 드롭다운 그리기. reloadSelected 가 false 면 선택한 아카이브 기록은 다시 받지 않음
+function renderArchiveList(reloadSelected = true) {
   // Admin List
   const tbody = document.getElementById("archive-list-tbody");
   if (tbody) {
@@ -1224,7 +1561,7 @@ async function reloadArchiveList() {
     });
     if (prev && ARCHIVES.some(a => String(a.id) === String(prev))) {
       sel.value = prev;
-      loadArchiveGames(prev);
+      if (reloadSelected) loadArchiveGames(prev);
     } else {
       loadArchiveGames("");
     }
@@ -1243,15 +1580,19 @@ async function loadArchiveGames(id) {
   }
 
   try {
-    let games = await fetchJSON(`${API_BASE}/api/archives/${id}/games`);
+    // 대국 목록과 서버에서 미리 계산해 둔 플레이어 통계를 함께 받음
+    let [games, stats] = await Promise.all([
+      fetchJSON(`${API_BASE}/api/archives/${id}/games?format=columnar`),
+      fetchJSON(`${API_BASE}/api/archives/${id}/stats`),
+    ]);
     games = (games || []).slice().sort((a, b) => (b.id || 0) - (a.id || 0));
     CURRENT_ARCHIVE_GAMES = games;
 
     // 1. Render Games (with index-based numbering)
     renderGameList("archive-games-tbody", games, { useIndexNumbering: true });
 
-    // 2. Calc Stats
-    ARCHIVE_PLAYER_SUMMARY = calculateStatsFromGames(games);
+    // 2. Stats (/api/archives/<id>/stats)
+    ARCHIVE_PLAYER_SUMMARY = (stats && stats.players) || [];
 
     // 3. Render Ranking
     renderRankingTable("archive-ranking-tbody", ARCHIVE_PLAYER_SUMMARY, ARCHIVE_RANKING_SORT, "archive-ranking-table", "데이터 없음");
@@ -1417,10 +1758,18 @@ function setupTournamentForm() {
 
 async function loadTournamentGamesAndRanking() {
   let games = [];
-  try { games = await fetchJSON(`${API_BASE}/api/tournament_games`); } catch (e) { console.error(e); }
+  try {
+    games = await fetchJSON(`${API_BASE}/api/tournament_games?format=columnar`);
+    TOURNAMENT_LOADED = true;
+  } catch (e) { console.error(e); }
   games = (games || []).slice().sort((a, b) => (b.id || 0) - (a.id || 0));
   TOURNAMENT_GAMES = games;
+  renderTournamentView();
+}
 
+// TOURNAMENT_GAMES 로 대회 기록/순위 다시 그리기 (실시간 이벤트에서도 사용)
+function renderTournamentView() {
+  const games = TOURNAMENT_GAMES;
   renderGameList("tournament-games-tbody", games, {
     onDelete: (id) => {
       showConfirm("삭제?", async () => {
@@ -1475,76 +1824,16 @@ function renderMainRanking() {
   }
 }
 
-async function buildSeasonSummary(playersAll) {
-  // Need archive stats
-  const seasonT = await loadSeasonTournamentStats(); // helper
-  return playersAll.filter(p => p.games >= 4).map(p => {
-    const totalPt = p.total_pt;
-    const games = p.games;
-    const t = seasonT?.[p.name] || { joinCount: 0, ptSum: 0 };
-
-    // Formula (Use Helper)
-    const scores = calculateSeasonScore(totalPt, games, t.joinCount, t.ptSum);
-
-    return {
-      name: p.name,
-      total_pt_score: scores.totalPtScore,
-      games_score: scores.gamesScore,
-      tournament_score: scores.tournamentScore,
-      season_score: scores.sum
-    };
-  }).sort((a, b) => b.season_score - a.season_score);
-}
-
-
-async function loadSeasonTournamentStats() {
-  if (SEASON_TOURNAMENT_STATS) return SEASON_TOURNAMENT_STATS;
-
-  // Fetch archives, filter by MONTHLY TOURNAMENT pattern
-  let archives = [];
-  try { archives = await fetchJSON(`${API_BASE}/api/archives`); } catch (e) { return {}; }
-
-  // Pattern: "YYYY MM월" or "YY MM월" matching SEASON_YEAR2
-  // Minimal pattern check:
-  const target = archives.filter(a => {
-    const s = (a.name || "");
-    if (!s.includes("대회")) return false;
-    const m = s.match(/(?:20)?(\d{2})\s*[-년]?\s*(\d{1,2})\s*월/);
-    if (!m) return false;
-    return Number(m[1]) === SEASON_YEAR2 && Number(m[2]) >= SEASON_FROM && Number(m[2]) <= SEASON_TO;
-  });
-
-  const map = {}; // name -> { joined: Set, ptSum: 0 }
-
-  for (const a of target) {
-    let games = [];
-    try { games = await fetchJSON(`${API_BASE}/api/archives/${a.id}/games`); } catch (e) { continue; }
-
-    const appeared = new Set();
-    games.forEach(g => {
-      const scores = [g.player1_score, g.player2_score, g.player3_score, g.player4_score].map(Number);
-      const names = [g.player1_name, g.player2_name, g.player3_name, g.player4_name].map(n => (n || "").trim());
-      const pts = calcPts(scores);
-
-      names.forEach((n, i) => {
-        if (!n) return;
-        appeared.add(n);
-        if (!map[n]) map[n] = { joined: new Set(), ptSum: 0 };
-        map[n].ptSum += Math.max(pts[i], 0); // Only positive
-      });
-    });
-
-    appeared.forEach(n => {
-      if (map[n]) map[n].joined.add(a.id);
-    });
+// 시즌 점수는 서버에서 한 번에 계산 (/api/season_scores, 아카이브 구성별 캐시)
+async function buildSeasonSummary() {
+  const qs = `year=${SEASON_YEAR2}&from=${SEASON_FROM}&to=${SEASON_TO}`;
+  try {
+    const data = await fetchJSON(`${API_BASE}/api/season_scores?${qs}`);
+    return data?.players || [];
+  } catch (e) {
+    console.warn(e);
+    return [];
   }
-
-  const out = {};
-  Object.keys(map).forEach(n => {
-    out[n] = { joinCount: map[n].joined.size, ptSum: map[n].ptSum };
-  });
-  SEASON_TOURNAMENT_STATS = out;
-  return out;
 }
 
 function renderSeasonRankingTable() {
@@ -1642,6 +1931,11 @@ async function reloadBadgeList() {
   let badges = [];
   try { badges = await fetchJSON(`${API_BASE}/api/badges`); } catch (e) { }
   ALL_BADGES = badges;
+  renderBadgeList();
+}
+
+function renderBadgeList() {
+  const badges = ALL_BADGES;
 
   // List
   const tbody = document.getElementById("badge-list-tbody");
@@ -1743,178 +2037,24 @@ async function loadAdminPlayerBadges(name) {
 // ==========================================
 
 let statsChart = null; // Chart.js instance
+let HISTORY_REQUEST_SEQ = 0; // 기간 버튼 연타 시 마지막 요청만 그리기
 
-// 날짜별 이력 계산
-// Returns: { dates: [], totalPts: [], seasonScores: [], totalPtRanks: [], seasonScoreRanks: [] }
-function calculateDailyHistory(targetName) {
-  // 1. 모든 게임(일반 + 대회)을 시간순 정렬
-  let all = [...ALL_GAMES, ...TOURNAMENT_GAMES];
-  all.sort((a, b) => new Date(a.created_at) - new Date(b.created_at));
-
-  // 플레이어별 상태 추적
-  let stats = {};
-
-  // 날짜별 스냅샷
-  let history = [];
-
-  // 헬퍼: 현재 상태에서 시즌 스코어 계산
-  const getSeasonScore = (s) => {
-    if (!s) return 0;
-    const tJoin = s.tournament ? s.tournament.join : 0;
-    const tSum = s.tournament ? s.tournament.sum : 0;
-    return calculateSeasonScore(s.total_pt, s.games, tJoin, tSum).sum;
-  };
-
-  // 게임 순회
-  let currentDate = null;
-
-  all.forEach(game => {
-    // 날짜 체크 (YYYY-MM-DD)
-    const d = new Date(game.created_at);
-    const dateStr = d.toISOString().split('T')[0];
-
-    if (currentDate && currentDate !== dateStr) {
-      // 날짜가 바뀌기 직전 스냅샷 저장
-      snapshot(history, currentDate, stats, targetName, getSeasonScore);
-    }
-    currentDate = dateStr;
-
-    // 게임 반영
-    const scores = [
-      Number(game.player1_score), Number(game.player2_score),
-      Number(game.player3_score), Number(game.player4_score),
-    ];
-    const names = [
-      game.player1_name, game.player2_name,
-      game.player3_name, game.player4_name,
-    ].map((n) => (n || "").trim());
-
-    // pt 계산
-    const pts = calcPts(scores);
-
-    names.forEach((name, idx) => {
-      if (!name) return;
-      if (!stats[name]) stats[name] = { total_pt: 0, games: 0, tournament: { join: 0, sum: 0 } };
-
-      const pt = pts[idx];
-
-      if (game.is_tournament_flag) {
-        stats[name].tournament.join += 1;
-        stats[name].tournament.sum += pt;
-      } else {
-        stats[name].total_pt += pt;
-        stats[name].games += 1;
-      }
-    });
-  });
-
-  // 마지막 날짜 스냅샷
-  if (currentDate) {
-    snapshot(history, currentDate, stats, targetName, getSeasonScore);
-  }
-
-  return history;
-}
-
-// 스냅샷 저장 헬퍼
-function snapshot(history, date, stats, targetName, scoreFn) {
-  if (!stats[targetName]) {
-    // 아직 데뷔 전이면 0으로라도 기록? 아니면 기록 없음?
-    // 그래프 연결을 위해 0으로 기록하는게 나을 수 있음.
-    // 하지만 여기선 데뷔 이후부터만 표시하도록 함.
-    return;
-  }
-
-  // 전체 플레이어 랭킹 산출
-  let players = Object.keys(stats);
-
-  // 1. Total PT Rank
-  players.sort((a, b) => stats[b].total_pt - stats[a].total_pt);
-  let ptRank = players.indexOf(targetName) + 1;
-
-  // 2. Season Score Rank
-  players.sort((a, b) => scoreFn(stats[b]) - scoreFn(stats[a]));
-  let seasonRank = players.indexOf(targetName) + 1;
-
-  history.push({
-    date: date,
-    total_pt: stats[targetName].total_pt,
-    season_score: scoreFn(stats[targetName]),
-    pt_rank: ptRank,
-    season_rank: seasonRank,
-    total_players: players.length // 전체 플레이어 수 저장
-  });
-}
-
-function renderHistoryGraph(targetName, range) {
+// 날짜별 이력 그래프 (서버의 일별 스냅샷 사용)
+// data: [{ date, total_pt, season_score, pt_rank, season_rank, total_players }]
+async function renderHistoryGraph(targetName, range) {
   const ctx = document.getElementById("stats-daily-chart");
   if (!ctx) return;
 
-  // 대회 게임 식별용 플래그 마킹
-  TOURNAMENT_GAMES.forEach(g => g.is_tournament_flag = true);
-  ALL_GAMES.forEach(g => g.is_tournament_flag = false);
-
-  const fullHistory = calculateDailyHistory(targetName);
-
-  // 기간 필터링
-  let data = fullHistory;
-
-  // 기준 날짜를 마지막 플레이 날짜로 설정 (데이터가 없으면 오늘 기준)
-  let referenceDate = new Date();
-  if (fullHistory.length > 0) {
-    referenceDate = new Date(fullHistory[fullHistory.length - 1].date);
-  }
-
-  // 시작 날짜 계산
-  let startDate = new Date(referenceDate);
-  if (range === 'week') {
-    startDate.setDate(startDate.getDate() - 6); // 7일간 (오늘 포함)
-  } else if (range === 'month') {
-    startDate.setDate(startDate.getDate() - 29); // 30일간
-  } else {
-    // 'all': 첫 기록 날짜부터
-    if (fullHistory.length > 0) {
-      startDate = new Date(fullHistory[0].date);
-    }
-  }
-
-  // 날짜 간격 메우기 (Gap Filling)
-  data = [];
-  let currentDate = new Date(startDate);
-
-  // 시작일 이전의 가장 최근 상태 찾기
-  // (범위 시작일 전의 마지막 기록을 초기값으로 사용)
-  let lastState = null;
-  const startStr = startDate.toISOString().split('T')[0];
-
-  // fullHistory는 날짜순 정렬되어 있다고 가정
-  for (let h of fullHistory) {
-    if (h.date < startStr) lastState = h;
-    else break;
-  }
-
-  // 기준일까지 하루씩 증가
-  while (currentDate <= referenceDate) {
-    const dateStr = currentDate.toISOString().split('T')[0];
-
-    // 해당 날짜에 기록이 있는지 확인
-    const match = fullHistory.find(h => h.date === dateStr);
-
-    if (match) {
-      lastState = match;
-    }
-
-    // 상태가 있으면 기록 (없으면, 즉 데뷔 전이면 null 채우거나 스킵)
-    // 여기서는 null을 넣으면 그래프가 끊김. 
-    // 그냥 lastState가 있을 때만 push? 
-    // 데뷔 전 날짜는 표시 안하는게 맞음.
-    if (lastState) {
-      // date만 현재 날짜로 바꿔서 push (참조 끊기 위해 spread 사용)
-      data.push({ ...lastState, date: dateStr });
-    }
-
-    currentDate.setDate(currentDate.getDate() + 1);
+  const seq = ++HISTORY_REQUEST_SEQ;
+  let data = [];
+  try {
+    const qs = `range=${encodeURIComponent(range || "week")}`;
+    data = await fetchJSON(`${API_BASE}/api/players/${encodeURIComponent(targetName)}/history?${qs}`);
+  } catch (e) {
+    console.warn(e);
   }
+  if (seq !== HISTORY_REQUEST_SEQ) return;
+  data = data || [];
 
   // y1 축 범위 설정을 위한 최대 등수 계산 (해당 기간 내 최대 참여 인원수)
   let maxRank = 10;
@@ -2027,16 +2167,11 @@ function renderGameIdPtChart(targetName, limit = 10) {
     statsGameIdPtChart = null;
   }
 
-  if (!targetName || !ALL_GAMES || ALL_GAMES.length === 0) return;
+  if (!targetName || PLAYER_GAMES.name !== targetName) return;
 
-  // 해당 플레이어가 참가한 게임만 시간순(ID 오름차순)으로 추출
-  const myGames = ALL_GAMES
-    .filter(g => {
-      const names = [g.player1_name, g.player2_name, g.player3_name, g.player4_name]
-        .map(n => (n || "").trim());
-      return names.includes(targetName);
-    })
-    .slice() // ALL_GAMES는 내림차순이므로 복사 후 역순
+  // 해당 플레이어가 참가한 게임(서버에서 이미 필터됨)을 시간순(ID 오름차순)으로
+  const myGames = PLAYER_GAMES.games
+    .slice() // 내림차순이므로 복사 후 역순
     .reverse();
 
   if (myGames.length === 0) return;
@@ -2061,7 +2196,7 @@ function renderGameIdPtChart(targetName, limit = 10) {
       .map(n => (n || "").trim());
     const idx = names.indexOf(targetName);
     if (idx === -1) return;
-    const pts = calcPts(scores);
+    const pts = gamePts(g, scores);
     allCum = +(allCum + pts[idx]).toFixed(1);
     cumByGame.set(g.id, allCum);
   });
@@ -2191,7 +2326,8 @@ function renderRecentRankTrend(targetName, limit = 10) {
   if (!ctx) return;
 
   // 플레이어 게임 데이터 추출 (최신순)
-  let all = [...ALL_GAMES, ...TOURNAMENT_GAMES];
+  const own = PLAYER_GAMES.name === targetName ? PLAYER_GAMES : { games: [], tournament: [] };
+  let all = [...own.games, ...own.tournament];
   all.sort((a, b) => new Date(b.created_at) - new Date(a.created_at));
 
   const myGames = [];
@@ -2200,9 +2336,7 @@ function renderRecentRankTrend(targetName, limit = 10) {
     const idx = names.indexOf(targetName);
     if (idx !== -1) {
       const scores = [g.player1_score, g.player2_score, g.player3_score, g.player4_score].map(Number);
-      const order = scores.map((s, i) => ({ s, i })).sort((a, b) => b.s - a.s);
-      const ranks = [0, 0, 0, 0];
-      order.forEach((o, pos) => ranks[o.i] = pos + 1);
+      const ranks = gameRanks(g, scores);
 
       myGames.push({
         id: g.id,
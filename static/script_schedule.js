@@ -22,7 +22,12 @@ document.addEventListener('DOMContentLoaded', function() {
     height: window.innerHeight - 150,
     events: async function(info, successCallback, failureCallback) {
       try {
-        const response = await fetch('/schedule/api/events');
+        // 화면에 보이는 구간만 요청 (end 는 FullCalendar 처럼 미포함)
+        const params = new URLSearchParams({
+          start: info.startStr.slice(0, 10),
+          end: info.endStr.slice(0, 10)
+        });
+        const response = await fetch(`/schedule/api/events?${params}`);
         const data = await response.json();
         
         // Transform backend data to FullCalendar event objects
@@ -0,0 +1,254 @@
+"""
+정적 파일 지문(내용 해시) + 미리 압축 + 외부 라이브러리 고정
+
+  - ASSET_FILES (CSS / JS, static/vendor/ 라이브러리 포함)를 static/build/<이름>.<해시>.<확장자> 로 복사
+  - static/build/ 의 텍스트 파일(css / js / ico)마다 .gz (+ brotli 가 있으면 .br) 를 미리 만들어 둠
+  - 목록은 static/build/assets.json. 원본이 그대로면 다시 만들지 않음 (앱 시작 시 ensure_built)
+
+Chart.js / FullCalendar 는 VENDOR_LIBS 의 npm 배포 파일(dist, 라이선스 머리 주석 포함)을 그대로
+static/vendor/ 에 두고 (대회장 LAN 처럼 인터넷이 없어도 동작하도록) 같이 커밋합니다.
+`vendor` 명령이 레지스트리의 dist.integrity 로 tarball 을 확인한 뒤 파일의 sha256 을
+static/vendor/vendor.lock.json 에 고정합니다. 파일이 없거나 잠금과 다르면 그 파일만 지문을 붙이지 않고
+(원본 URL 그대로) 앱이 오류를 남깁니다. CDN 으로 대신 연결하지 않음.
+
+    python static_assets.py vendor   # static/vendor/ 확인, 없거나 버전이 바뀐 파일은 npm 에서 받아 고정
+    python static_assets.py          # 빌드만 (vendor 파일에 문제가 있으면 종료 코드 1)
+    python static_assets.py clean    # static/build/ 지우기
+"""
+import base64
+import gzip
+import hashlib
+import io
+import json
+import os
+import shutil
+import sys
+import tarfile
+import urllib.request
+
+from image_assets import BUILD_SUBDIR, file_hash, write_hashed
+
+try:
+    import brotli
+except ImportError:   # 없으면 gzip 만
+    brotli = None
+
+MANIFEST_NAME = "assets.json"
+VENDOR_DIR = "vendor"
+VENDOR_LOCK = "vendor.lock.json"
+NPM_REGISTRY = "https://registry.npmjs.org"
+
+# static/vendor/<파일명> -> npm 패키지 / 버전 / 패키지 안의 파일 (사이트가 CDN 으로 쓰던 버전)
+VENDOR_LIBS = {
+    "chart.umd.js": {"package": "chart.js", "version": "4.4.7", "file": "dist/chart.umd.js"},
+    "fullcalendar.global.min.js": {"package": "fullcalendar", "version": "6.1.15", "file": "index.global.min.js"},
+}
+
+# 지문을 붙여 내보내는 파일 (static 기준)
+ASSET_FILES = (
+    "style.css",
+    "script.js",
+    "script_schedule.js",
+    "script_schedule_admin.js",
+) + tuple(f"{VENDOR_DIR}/{name}" for name in VENDOR_LIBS)
+
+PRECOMPRESS_EXTS = (".css", ".js", ".ico")
+PRECOMPRESS_MIN_BYTES = 1024    # 이보다 작으면 압축 이득이 헤더 비용보다 작음
+
+
+class VendorError(Exception):
+    """npm 에서 받은 파일이 integrity / 잠금 해시와 다르거나, 커밋된 파일이 잠금과 다름"""
+
+
+# ---- vendor 라이브러리 ----
+
+def load_vendor_lock(static_dir):
+    try:
+        with open(os.path.join(static_dir, VENDOR_DIR, VENDOR_LOCK), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def locked_entry(lock, name):
+    """잠금 항목이 VENDOR_LIBS 의 패키지 / 버전과 같을 때만 돌려줌"""
+    lib, entry = VENDOR_LIBS[name], lock.get(name)
+    if entry and all(entry.get(k) == lib[k] for k in ("package", "version", "file")):
+        return entry
+    return None
+
+
+def vendor_problems(static_dir):
+    """[(파일명, 이유)] — 비어 있으면 static/vendor/ 가 vendor.lock.json 과 일치"""
+    lock = load_vendor_lock(static_dir)
+    problems = []
+    for name, lib in VENDOR_LIBS.items():
+        entry = locked_entry(lock, name)
+        path = os.path.join(static_dir, VENDOR_DIR, name)
+        if entry is None:
+            problems.append((name, f"{lib['package']}@{lib['version']} 이 잠금에 없음"))
+        elif not os.path.exists(path):
+            problems.append((name, "파일 없음"))
+        elif file_hash(path) != entry["sha256"]:
+            problems.append((name, "잠금 해시와 다름 (줄바꿈 변환 등)"))
+    return problems
+
+
+def sri(data):
+    return "sha512-" + base64.b64encode(hashlib.sha512(data).digest()).decode("ascii")
+
+
+def fetch_npm_file(lib, entry=None):
+    """npm tarball 을 받아 integrity 확인 후 lib["file"] 내용과 잠금 항목 반환"""
+    if entry is None:
+        meta_url = f"{NPM_REGISTRY}/{lib['package']}/{lib['version']}"
+        with urllib.request.urlopen(meta_url, timeout=30) as resp:
+            dist = json.load(resp)["dist"]
+        entry = {**lib, "tarball": dist["tarball"], "integrity": dist["integrity"]}
+    with urllib.request.urlopen(entry["tarball"], timeout=60) as resp:
+        tgz = resp.read()
+    if sri(tgz) not in entry["integrity"].split():
+        raise VendorError(f"{entry['tarball']}: integrity 가 맞지 않습니다")
+    with tarfile.open(fileobj=io.BytesIO(tgz), mode="r:gz") as tar:
+        data = tar.extractfile(f"package/{lib['file']}").read()
+    digest = hashlib.sha256(data).hexdigest()
+    if entry.get("sha256", digest) != digest:
+        raise VendorError(f"{lib['package']}@{lib['version']} {lib['file']}: 잠금 해시와 다릅니다")
+    return data, {**entry, "sha256": digest}
+
+
+def vendor(static_dir):
+    """
+    static/vendor/ 를 vendor.lock.json 과 맞춤.
+      - 잠금과 같은 파일은 그대로 (네트워크 안 씀)
+      - 없어진 파일은 잠금의 tarball 을 다시 받아 integrity / sha256 확인 후 복원
+      - 잠금에 없는 (새로 넣었거나 버전을 바꾼) 파일은 레지스트리에서 받아 잠금에 기록
+    커밋된 파일이 잠금과 다르면 덮어쓰지 않고 VendorError (git checkout 으로 되돌릴 것)
+    """
+    out_dir = os.path.join(static_dir, VENDOR_DIR)
+    os.makedirs(out_dir, exist_ok=True)
+    lock = load_vendor_lock(static_dir)
+    for name, lib in VENDOR_LIBS.items():
+        path = os.path.join(out_dir, name)
+        entry = locked_entry(lock, name)
+        if entry and os.path.exists(path):
+            if file_hash(path) != entry["sha256"]:
+                raise VendorError(f"{VENDOR_DIR}/{name}: 커밋된 파일이 잠금 해시와 다릅니다")
+            print(f"{name}: OK ({lib['package']}@{lib['version']})")
+            continue
+        data, lock[name] = fetch_npm_file(lib, entry)
+        with open(path, "wb") as f:
+            f.write(data)
+        print(f"{name}: {lib['package']}@{lib['version']} {lib['file']} 받음 ({len(data) // 1024} KB)")
+
+    lock = {name: lock[name] for name in VENDOR_LIBS}
+    with open(os.path.join(out_dir, VENDOR_LOCK), "w", encoding="utf-8") as f:
+        json.dump(lock, f, indent=1)
+        f.write("\n")
+
+
+# ---- 빌드 ----
+
+def precompress(path):
+    """path.gz / path.br 생성 (이미 있으면 그대로). 이름에 해시가 있으므로 내용이 바뀔 일은 없음"""
+    if os.path.getsize(path) < PRECOMPRESS_MIN_BYTES:
+        return
+    with open(path, "rb") as f:
+        data = f.read()
+    outputs = [(".gz", lambda d: gzip.compress(d, compresslevel=9, mtime=0))]
+    if brotli is not None:
+        outputs.append((".br", lambda d: brotli.compress(d, quality=11)))
+    for ext, compress in outputs:
+        target = path + ext
+        if os.path.exists(target):
+            continue
+        tmp = f"{target}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(compress(data))
+        os.replace(tmp, target)
+
+
+def precompress_all(out_dir):
+    """이미지 / 폰트 빌드가 만든 CSS, ICO 까지 build/ 의 텍스트 파일 전부 (압축본이 없는 것만)"""
+    for entry in os.listdir(out_dir):
+        if entry.endswith(PRECOMPRESS_EXTS):
+            precompress(os.path.join(out_dir, entry))
+
+
+def source_hashes(static_dir):
+    """잠금과 맞지 않는 vendor 파일은 빼고 (지문 없이 원본 URL 로 나감)"""
+    bad = {f"{VENDOR_DIR}/{name}" for name, _ in vendor_problems(static_dir)}
+    return {name: file_hash(os.path.join(static_dir, name))
+            for name in ASSET_FILES if name not in bad and os.path.exists(os.path.join(static_dir, name))}
+
+
+def build(static_dir, hashes=None):
+    out_dir = os.path.join(static_dir, BUILD_SUBDIR)
+    os.makedirs(out_dir, exist_ok=True)
+    hashes = hashes or source_hashes(static_dir)
+    files = {}
+    for name in hashes:
+        stem, ext = os.path.splitext(os.path.basename(name))
+        with open(os.path.join(static_dir, name), "rb") as f:
+            files[name] = write_hashed(out_dir, stem, ext.lstrip("."), f.read())
+
+    precompress_all(out_dir)
+
+    manifest = {"sources": hashes, "files": files}
+    path = os.path.join(out_dir, MANIFEST_NAME)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=1)
+    os.replace(tmp, path)
+    return manifest
+
+
+def ensure_built(static_dir):
+    """원본이 그대로이고 결과 파일이 다 있으면 기존 목록, 아니면 다시 빌드"""
+    hashes = source_hashes(static_dir)
+    try:
+        with open(os.path.join(static_dir, BUILD_SUBDIR, MANIFEST_NAME), encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        manifest = None
+    if manifest and manifest.get("sources") == hashes and all(
+            os.path.exists(os.path.join(static_dir, p)) for p in manifest["files"].values()):
+        # 폰트 CSS 처럼 이 빌드와 따로 다시 만들어진 파일이 있을 수 있음
+        precompress_all(os.path.join(static_dir, BUILD_SUBDIR))
+        return manifest
+    return build(static_dir, hashes)
+
+
+def clean(static_dir):
+    """static/build/ 를 통째로 지움 (다음 시작 때 전부 다시 만듦)"""
+    shutil.rmtree(os.path.join(static_dir, BUILD_SUBDIR), ignore_errors=True)
+
+
+def main():
+    static_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static")
+    args = sys.argv[1:]
+    if args == ["vendor"]:
+        try:
+            vendor(static_dir)
+        except VendorError as e:
+            print(e, file=sys.stderr)
+            return 1
+    elif args == ["clean"]:
+        clean(static_dir)
+        return 0
+    elif args:
+        print(__doc__)
+        return 1
+    manifest = build(static_dir)
+    for name, path in manifest["files"].items():
+        sizes = [os.path.getsize(os.path.join(static_dir, path + ext))
+                 for ext in ("", ".gz", ".br") if os.path.exists(os.path.join(static_dir, path + ext))]
+        print(f"{name} -> {path} ({' / '.join(f'{s // 1024} KB' for s in sizes)})")
+    problems = vendor_problems(static_dir)
+    for name, why in problems:
+        print(f"{VENDOR_DIR}/{name}: {why} — python static_assets.py vendor", file=sys.stderr)
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())